@@ -1,91 +1,259 @@
 import argparse
 import sys
+import time
+from fractions import Fraction
+from pathlib import Path
+from typing import Optional, TextIO, TYPE_CHECKING
 
-from lark import UnexpectedInput, Tree
-from lark.exceptions import VisitError
-
-from odf.checker.checker import check_formulas
-from odf.core.constants import SEPARATOR_LENGTH
-from odf.core.exceptions import ODFError
-from odf.models.exceptions import CrossReferenceError
-from odf.models.validation import validate_disruption_tree_references, \
-    validate_unique_node_names
-from odf.parser.parser import parse
-from odf.transformers.disruption_tree import DisruptionTreeTransformer
-from odf.transformers.exceptions import MyVisitError
-from odf.transformers.object_graph import ObjectGraphTransformer
-
-
-def extract_parse_trees(parse_tree: Tree):
-    assert parse_tree.data == "start"
-
-    attack_parse_tree = None
-    fault_parse_tree = None
-    object_parse_tree = None
-    formulas_parse_tree = None
-    for child in parse_tree.children:
-        if child.data == "attack_tree":
-            attack_parse_tree = child
-        elif child.data == "fault_tree":
-            fault_parse_tree = child
-        elif child.data == "object_graph":
-            object_parse_tree = child
-        elif child.data == "doglog":
-            formulas_parse_tree = child
-
-    assert (attack_parse_tree is not None and fault_parse_tree is not None and
-            object_parse_tree is not None and formulas_parse_tree is not None)
-
-    return [attack_parse_tree, fault_parse_tree,
-            object_parse_tree, formulas_parse_tree]
-
-
-def execute_str(odl_text):
-    parse_tree = parse(odl_text)
-    [attack_parse_tree, fault_parse_tree,
-     object_parse_tree, formulas_parse_tree] = extract_parse_trees(parse_tree)
-    try:
-        object_graph = ObjectGraphTransformer().transform(object_parse_tree)
-    except VisitError as e:
-        if not isinstance(e.orig_exc, ODFError): raise
-        raise MyVisitError(e, "object graph")
-    try:
-        attack_tree = DisruptionTreeTransformer(object_graph).transform(
-            attack_parse_tree)
-    except VisitError as e:
-        if not isinstance(e.orig_exc, ODFError): raise
-        raise MyVisitError(e, "attack tree")
-    try:
-        fault_tree = DisruptionTreeTransformer(object_graph).transform(
-            fault_parse_tree)
-    except VisitError as e:
-        if not isinstance(e.orig_exc, ODFError): raise
-        raise MyVisitError(e, "fault tree")
+from lark import UnexpectedInput
+
+from odf.checker.checker import check_formulas, check_formula, new_context
+from odf.checker.layer1.scenarios import ScenarioOptions, SCENARIO_FORMATS
+from odf.checker.ordering import DEFAULT_ORDERING, ORDERINGS
+from odf.checker.portfolio import Portfolio, DEFAULT_NODE_BUDGET, PICKS
+from odf.core.constants import SEPARATOR_LENGTH, COLOR_GRAY, COLOR_RESET
+from odf.loaders.model_cache import cache_file_for, model_key, Models
+from odf.loaders.odf_file import load_str
+from odf.loaders.order_cache import OrderFiles, models_key, load_order, \
+    save_order, order_file_for
+from odf.loaders.structured import load_json, load_csv
+from odf.models.exceptions import CrossReferenceError, ModelDataError, \
+    ModelErrors
+from odf.parser.formulas import split_formulas, parse_formula
+from odf.parser.sections import split_sections, parse_section, find_section
+from odf.transformers.exceptions import MyVisitError, MissingSectionError, \
+    DuplicateSectionError
+from odf.transformers.truncation import Truncation
+from odf.utils.reconstructor import reconstruct
+
+if TYPE_CHECKING:
+    from odf.checker.context import ModelContext
+
+
+def execute_str(odl_text, check_syntax=False,
+                cache_file: Optional[Path] = None,
+                ordering: str = DEFAULT_ORDERING,
+                orders: OrderFiles = OrderFiles(),
+                portfolio: Optional[Portfolio] = None,
+                scenarios: Optional[ScenarioOptions] = None):
+    """Execute the text of an ODF file."""
+    models, formulas_parse_tree = load_str(odl_text, cache_file)
+
+    if check_syntax:
+        print("Syntax OK")
+        return
+
+    context = model_context(models, ordering, orders, portfolio)
+    check_formulas(formulas_parse_tree, *models, context,
+                   scenarios=scenarios)
+    save_context_order(models, context, orders)
+
+
+def execute_stream(odl_text, formulas: TextIO,
+                   cache_file: Optional[Path] = None,
+                   ordering: str = DEFAULT_ORDERING,
+                   orders: OrderFiles = OrderFiles(),
+                   portfolio: Optional[Portfolio] = None,
+                   scenarios: Optional[ScenarioOptions] = None):
+    """Load the models of an ODF file once and check the formulas read from
+    a separate stream, one at a time.
 
-    validate_models(attack_tree, fault_tree, object_graph)
+    The `[formulas]` section of the ODF file is optional and ignored. Results
+    are printed as soon as each formula has been checked, and a formula that
+    fails to parse is reported without stopping the stream.
+    """
+    models, _ = load_str(odl_text, cache_file, with_formulas=False)
+    check_stream(models, formulas, ordering, orders, portfolio, scenarios)
 
-    check_formulas(formulas_parse_tree, attack_tree, fault_tree,
-                   object_graph)
 
+def execute_import(model_file: TextIO, model_format: str,
+                   formulas: Optional[TextIO] = None, check_syntax=False,
+                   ordering: str = DEFAULT_ORDERING,
+                   orders: OrderFiles = OrderFiles(),
+                   portfolio: Optional[Portfolio] = None,
+                   scenarios: Optional[ScenarioOptions] = None):
+    """Import models from a JSON or CSV file (see `odf.loaders.structured`)
+    and check the formulas read from a separate stream."""
+    load = load_json if model_format == "json" else load_csv
+    models = load(model_file)
 
-def validate_models(attack_tree, fault_tree, object_graph):
-    validate_unique_node_names(attack_tree, fault_tree, object_graph)
-    validate_disruption_tree_references(attack_tree, object_graph)
-    validate_disruption_tree_references(fault_tree, object_graph)
+    if check_syntax or formulas is None:
+        print("Models OK")
+        return
 
+    check_stream(models, formulas, ordering, orders, portfolio, scenarios)
 
-def main(odl_text: str):
+
+def check_stream(models: Models, formulas: TextIO,
+                 ordering: str = DEFAULT_ORDERING,
+                 orders: OrderFiles = OrderFiles(),
+                 portfolio: Optional[Portfolio] = None,
+                 scenarios: Optional[ScenarioOptions] = None):
+    """Check the formulas read from a stream against the models, one at a
+    time."""
+    context = model_context(models, ordering, orders, portfolio)
+
+    for i, (text, line) in enumerate(split_formulas(formulas)):
+        try:
+            formula = parse_formula(text)
+        except UnexpectedInput as e:
+            print(f"Parse error in formula {i + 1} (line {line}):\n{e}\n",
+                  file=sys.stderr)
+            continue
+        check_formula(i + 1, formula, *models, context, scenarios)
+        sys.stdout.flush()
+    save_context_order(models, context, orders)
+
+
+def model_context(models: Models, ordering: str,
+                  orders: OrderFiles,
+                  portfolio: Optional[Portfolio] = None) -> "ModelContext":
+    """Create the context for checking formulas against the models, starting
+    from their saved variable order if there is one."""
+    initial_order = None
+    if orders.load_from is not None:
+        initial_order = load_order(orders.load_from, models_key(models))
+    return new_context(*models, ordering, initial_order, portfolio)
+
+
+def save_context_order(models: Models, context: "ModelContext",
+                       orders: OrderFiles):
+    """Save the variable order that dynamic reordering ended up with, so
+    that the next run can start from it."""
+    if orders.save_to is None:
+        return
     try:
-        return execute_str(odl_text)
-    except UnexpectedInput as e:
-        print(f"Parse error:\n{e}\n", file=sys.stderr)
-        sys.exit(1)
-    except MyVisitError as e:
+        save_order(orders.save_to, models_key(models),
+                   context.current_order())
+    except OSError as e:
+        print(f"Could not save the variable order: {e}", file=sys.stderr)
+
+
+class FormulaWatcher:
+    """Re-checks an ODF file after edits, doing as little work as possible.
+
+    The models and their BDD context are kept while the model sections of the
+    file are unchanged, and only formulas whose reconstructed text was not
+    checked in the previous version of the file are checked again.
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None,
+                 ordering: str = DEFAULT_ORDERING,
+                 orders: OrderFiles = OrderFiles(),
+                 portfolio: Optional[Portfolio] = None,
+                 scenarios: Optional[ScenarioOptions] = None):
+        self.cache_file = cache_file
+        self.ordering = ordering
+        self.orders = orders
+        self.portfolio = portfolio
+        self.scenarios = scenarios
+        self.model_key: Optional[str] = None
+        self.models: Optional[Models] = None
+        self.context: Optional["ModelContext"] = None
+        self.checked: set[str] = set()
+
+    def update(self, odl_text: str):
+        key = model_key(odl_text)
+        if self.models is None or key is None or key != self.model_key:
+            self.models, formulas_parse_tree = load_str(odl_text,
+                                                        self.cache_file)
+            self.model_key = key
+            self.context = model_context(self.models, self.ordering,
+                                         self.orders, self.portfolio)
+            self.checked = set()
+        else:
+            _, sections = split_sections(odl_text)
+            formulas_parse_tree = parse_section(
+                odl_text, find_section(sections, "doglog"))
+
+        formulas = [(formula, reconstruct(formula, multiline=False))
+                    for formula in formulas_parse_tree.children]
+        unchanged = sum(1 for _, text in formulas if text in self.checked)
+        if unchanged:
+            print(f"\n{COLOR_GRAY}Skipping {unchanged} unchanged"
+                  f" formula(s){COLOR_RESET}")
+        for i, (formula, text) in enumerate(formulas):
+            if text not in self.checked:
+                check_formula(i + 1, formula, *self.models, self.context,
+                              self.scenarios)
+        self.checked = {text for _, text in formulas}
+        save_context_order(self.models, self.context, self.orders)
+
+
+def watch(path: Path, cache_file: Optional[Path] = None,
+          interval: float = 0.5, ordering: str = DEFAULT_ORDERING,
+          orders: OrderFiles = OrderFiles(),
+          portfolio: Optional[Portfolio] = None,
+          scenarios: Optional[ScenarioOptions] = None):
+    """Check the ODF file every time it is modified, until interrupted."""
+    watcher = FormulaWatcher(cache_file, ordering, orders, portfolio,
+                             scenarios)
+    last_modified = None
+    while True:
+        try:
+            modified = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            modified = None
+        if modified is not None and modified != last_modified:
+            last_modified = modified
+            print(f"\n{'=' * SEPARATOR_LENGTH}\nChecking {path}")
+            try:
+                watcher.update(path.read_text())
+            except LOAD_ERRORS as e:
+                report_load_error(e)
+            sys.stdout.flush()
+        time.sleep(interval)
+
+
+LOAD_ERRORS = (UnexpectedInput, MissingSectionError, DuplicateSectionError,
+               MyVisitError, CrossReferenceError, ModelErrors, ModelDataError)
+
+
+def report_load_error(e: Exception):
+    """Print an error that prevented an ODF file from being loaded."""
+    if isinstance(e, MyVisitError):
         print(f"Error in {e.part}: {e.visit_error.orig_exc}\n",
               file=sys.stderr)
-        sys.exit(1)
-    except CrossReferenceError as e:
+    elif isinstance(e, ModelDataError):
+        print(f"Invalid model data: {e}\n", file=sys.stderr)
+    elif isinstance(e, CrossReferenceError):
         print(f"Cross-reference validation error: {e}\n", file=sys.stderr)
+    elif isinstance(e, ModelErrors):
+        print(f"Invalid models: {e}\n", file=sys.stderr)
+    else:
+        print(f"Parse error:\n{e}\n", file=sys.stderr)
+
+
+def main(odl_text: str, check_syntax=False,
+         cache_file: Optional[Path] = None,
+         formulas: Optional[TextIO] = None,
+         ordering: str = DEFAULT_ORDERING,
+         orders: OrderFiles = OrderFiles(),
+         portfolio: Optional[Portfolio] = None,
+         scenarios: Optional[ScenarioOptions] = None):
+    try:
+        if formulas is not None and not check_syntax:
+            return execute_stream(odl_text, formulas, cache_file, ordering,
+                                  orders, portfolio, scenarios)
+        return execute_str(odl_text, check_syntax, cache_file, ordering,
+                           orders, portfolio, scenarios)
+    except LOAD_ERRORS as e:
+        report_load_error(e)
+        sys.exit(1)
+
+
+def main_import(model_file: TextIO, model_format: str, check_syntax=False,
+                formulas: Optional[TextIO] = None,
+                ordering: str = DEFAULT_ORDERING,
+                orders: OrderFiles = OrderFiles(),
+                portfolio: Optional[Portfolio] = None,
+                scenarios: Optional[ScenarioOptions] = None):
+    try:
+        return execute_import(model_file, model_format, formulas,
+                              check_syntax, ordering, orders, portfolio,
+                              scenarios)
+    except LOAD_ERRORS as e:
+        report_load_error(e)
         sys.exit(1)
 
 
@@ -96,15 +264,138 @@ if __name__ == "__main__":
     argparser.add_argument("file",
                            help="path to the ODF file you want to execute",
                            type=argparse.FileType("r"))
+    argparser.add_argument("--check-syntax", action="store_true",
+                           help="only parse the file and validate the models,"
+                                " without checking the formulas")
+    argparser.add_argument("--no-cache", action="store_true",
+                           help="do not read or write the compiled models"
+                                " cache in the user's cache directory and the"
+                                " variable order (.odfo) next to the file")
+    argparser.add_argument("--formulas", metavar="FILE",
+                           type=argparse.FileType("r"),
+                           help="check the formulas in FILE ('-' for stdin)"
+                                " one at a time against the models of the ODF"
+                                " file, instead of its [formulas] section")
+    argparser.add_argument("--watch", action="store_true",
+                           help="keep running and check the file again every"
+                                " time it changes, re-checking only new or"
+                                " modified formulas")
+    argparser.add_argument("--format", choices=["odf", "json", "csv"],
+                           help="format of the file (by default derived from"
+                                " its extension); the models of JSON and CSV"
+                                " files are imported directly, and their"
+                                " formulas are read with --formulas")
+    argparser.add_argument("--var-order", choices=list(ORDERINGS),
+                           default=DEFAULT_ORDERING,
+                           help="heuristic for the initial order of the BDD"
+                                " variables (default: %(default)s)")
+    argparser.add_argument("--import-order", metavar="FILE", type=Path,
+                           help="start from the variable order saved for the"
+                                " models in FILE, if there is one, instead of"
+                                " the .odfo file next to the file")
+    argparser.add_argument("--export-order", metavar="FILE", type=Path,
+                           help="save the final variable order of the models"
+                                " to FILE, instead of the .odfo file next to"
+                                " the file")
+    argparser.add_argument("--portfolio", metavar="WORKERS", type=int,
+                           help="when the BDD of a formula exceeds the node"
+                                " budget, build it under all variable orders"
+                                " in up to WORKERS parallel processes and"
+                                " keep the winning order")
+    argparser.add_argument("--node-budget", metavar="NODES", type=int,
+                           default=DEFAULT_NODE_BUDGET,
+                           help="node budget of --portfolio (default:"
+                                " %(default)s)")
+    argparser.add_argument("--portfolio-pick", choices=PICKS,
+                           default="first",
+                           help="the order that wins with --portfolio: the"
+                                " first to finish within the budget or the"
+                                " one with the smallest BDD (default:"
+                                " %(default)s)")
+    argparser.add_argument("--limit", metavar="N", type=int,
+                           help="report at most N minimal risk scenarios per"
+                                " [[...]] query, the smallest first")
+    argparser.add_argument("--count-only", action="store_true",
+                           help="only count the minimal risk scenarios of"
+                                " [[...]] queries, without enumerating them")
+    argparser.add_argument("--scenarios-format", choices=SCENARIO_FORMATS,
+                           default="text",
+                           help="format of the minimal risk scenarios; ndjson"
+                                " and csv write a record per scenario as soon"
+                                " as it is generated (default: %(default)s)")
+    argparser.add_argument("--scenarios-out", metavar="FILE",
+                           type=argparse.FileType("w"),
+                           help="write the ndjson or csv records of the"
+                                " scenarios to FILE instead of the standard"
+                                " output")
+    argparser.add_argument("--max-order", metavar="N", type=int,
+                           help="only compute the minimal risk scenarios"
+                                " with at most N events (unless a query sets"
+                                " order=...)")
+    argparser.add_argument("--min-prob", metavar="P", type=Fraction,
+                           help="only compute the minimal risk scenarios"
+                                " with a probability of at least P (unless a"
+                                " query sets prob=...)")
+    argparser.add_argument("--top", metavar="K", type=int,
+                           help="only report the K most likely minimal risk"
+                                " scenarios (unless a query sets top=...)")
     args = argparser.parse_args()
 
+    model_format = args.format or {".json": "json", ".csv": "csv"}.get(
+        Path(args.file.name).suffix.lower(), "odf")
+    if model_format != "odf" and args.watch:
+        argparser.error("--watch is only supported for ODF files")
+
+    cache_file = order_file = None
+    if not args.no_cache and args.file is not sys.stdin:
+        cache_file = cache_file_for(Path(args.file.name))
+        order_file = order_file_for(Path(args.file.name))
+    orders = OrderFiles(args.import_order or order_file,
+                        args.export_order or order_file)
+    portfolio = None
+    if args.portfolio is not None:
+        if args.portfolio < 1 or args.node_budget < 1:
+            argparser.error("--portfolio and --node-budget must be positive")
+        portfolio = Portfolio(args.portfolio, args.node_budget,
+                              args.portfolio_pick)
+    if any(value is not None and value < 0 for value in
+           (args.limit, args.max_order, args.min_prob, args.top)):
+        argparser.error("--limit, --max-order, --min-prob and --top must not"
+                        " be negative")
+    if args.scenarios_out and args.scenarios_format == "text":
+        argparser.error("--scenarios-out requires --scenarios-format ndjson"
+                        " or csv")
+    scenarios = ScenarioOptions(args.limit, args.count_only,
+                                args.scenarios_format, args.scenarios_out,
+                                Truncation(args.max_order, args.min_prob,
+                                           args.top))
+
+    if args.watch:
+        args.file.close()
+        try:
+            watch(Path(args.file.name), cache_file,
+                  ordering=args.var_order, orders=orders,
+                  portfolio=portfolio, scenarios=scenarios)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
     print(f"Processing ODF File: {args.file.name}")
     print("=" * SEPARATOR_LENGTH)
 
     try:
-        file_text = args.file.read()
-        main(file_text)
+        if model_format == "odf":
+            main(args.file.read(), args.check_syntax, cache_file,
+                 args.formulas, args.var_order, orders, portfolio, scenarios)
+        else:
+            main_import(args.file, model_format, args.check_syntax,
+                        args.formulas, args.var_order, orders, portfolio,
+                        scenarios)
         print("\n\nProcessing Complete.")
     finally:
         if args.file and not args.file.closed:
             args.file.close()
+        if args.formulas and args.formulas is not sys.stdin:
+            args.formulas.close()
+        if args.scenarios_out:
+            args.scenarios_out.close()
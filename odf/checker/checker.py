@@ -1,9 +1,9 @@
 import sys
+from typing import Optional, TYPE_CHECKING
+
 from lark import Tree
 
-from odf.checker.layer1.check_layer1 import check_layer1_query
-from odf.checker.layer2.check_layer2 import check_layer2_query
-from odf.checker.layer3.check_layer3 import check_layer3_query
+from odf.checker.ordering import DEFAULT_ORDERING
 from odf.core.constants import SEPARATOR_LENGTH, COLOR_GRAY, COLOR_RESET, \
     COLOR_RED
 from odf.core.exceptions import ODFError
@@ -11,34 +11,79 @@ from odf.models.disruption_tree import DisruptionTree
 from odf.models.object_graph import ObjectGraph
 from odf.utils.reconstructor import reconstruct
 
+if TYPE_CHECKING:
+    from odf.checker.context import ModelContext
+    from odf.checker.layer1.scenarios import ScenarioOptions
+    from odf.checker.portfolio import Portfolio
+
 SEPARATOR = "-" * SEPARATOR_LENGTH
 
 
 def check_formulas(formulas_parse_tree: Tree, attack_tree: DisruptionTree,
-                   fault_tree: DisruptionTree, object_graph: ObjectGraph):
+                   fault_tree: DisruptionTree, object_graph: ObjectGraph,
+                   context: Optional["ModelContext"] = None,
+                   ordering: str = DEFAULT_ORDERING,
+                   scenarios: Optional["ScenarioOptions"] = None):
+    if context is None:
+        # One context for the whole file, so that all formulas share the BDDs
+        # built for the disruption trees
+        context = new_context(attack_tree, fault_tree, object_graph,
+                              ordering)
+
     for i, formula in enumerate(formulas_parse_tree.children):
-        formula_string = reconstruct(formula, multiline=True)
-
-        print("\n\n" + SEPARATOR)
-        print(f"{COLOR_GRAY}Processing Formula {i + 1}:{COLOR_RESET}")
-        print(f"  {formula_string}")
-        print(SEPARATOR)
-
-        try:
-            match formula.data:
-                case "layer1_query":
-                    check_layer1_query(formula, attack_tree,
-                                       fault_tree, object_graph)
-                case "layer2_query":
-                    check_layer2_query(formula.children[0], attack_tree,
-                                       fault_tree, object_graph)
-                case "layer3_query":
-                    check_layer3_query(formula.children[0], attack_tree,
-                                       fault_tree, object_graph)
-                case _:
-                    raise AssertionError(
-                        f"Unexpected formula type: {formula.data}")
-        except ODFError as e:
-            print(
-                f"  {COLOR_RED}ERROR{COLOR_RESET}: An error occurred while processing the formula:\n  {e}",
-                file=sys.stderr)
+        check_formula(i + 1, formula, attack_tree, fault_tree, object_graph,
+                      context, scenarios)
+
+
+def new_context(attack_tree: DisruptionTree, fault_tree: DisruptionTree,
+                object_graph: ObjectGraph,
+                ordering: str = DEFAULT_ORDERING,
+                initial_order: Optional[list[str]] = None,
+                portfolio: Optional["Portfolio"] = None) -> "ModelContext":
+    # The checkers and the context are imported on first use, so that CUDD
+    # (and the ADD extension for layer 3) is only loaded for the layers a file
+    # uses
+    from odf.checker.context import ModelContext
+    return ModelContext(attack_tree, fault_tree, object_graph, ordering,
+                        initial_order, portfolio)
+
+
+def check_formula(number: int, formula: Tree, attack_tree: DisruptionTree,
+                  fault_tree: DisruptionTree, object_graph: ObjectGraph,
+                  context: "ModelContext",
+                  scenarios: Optional["ScenarioOptions"] = None):
+    """Check a single formula (a `doglog_formula` parse tree) and print the
+    results, reporting the scenarios of layer 1 queries as set in
+    `scenarios`."""
+    formula_string = reconstruct(formula, multiline=True)
+
+    print("\n\n" + SEPARATOR)
+    print(f"{COLOR_GRAY}Processing Formula {number}:{COLOR_RESET}")
+    print(f"  {formula_string}")
+    print(SEPARATOR)
+
+    try:
+        match formula.data:
+            case "layer1_query":
+                from odf.checker.layer1.check_layer1 import \
+                    check_layer1_query
+                check_layer1_query(formula, attack_tree,
+                                   fault_tree, object_graph, context,
+                                   scenarios, number)
+            case "layer2_query":
+                from odf.checker.layer2.check_layer2 import \
+                    check_layer2_query
+                check_layer2_query(formula.children[0], attack_tree,
+                                   fault_tree, object_graph, context)
+            case "layer3_query":
+                from odf.checker.layer3.check_layer3 import \
+                    check_layer3_query
+                check_layer3_query(formula.children[0], attack_tree,
+                                   fault_tree, object_graph, context)
+            case _:
+                raise AssertionError(
+                    f"Unexpected formula type: {formula.data}")
+    except ODFError as e:
+        print(
+            f"  {COLOR_RED}ERROR{COLOR_RESET}: An error occurred while processing the formula:\n  {e}",
+            file=sys.stderr)
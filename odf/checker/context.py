@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Iterator, TYPE_CHECKING
+
+from dd import cudd
+from lark import Tree
+
+from odf.checker.ordering import DEFAULT_ORDERING, variable_order, \
+    adopt_order
+from odf.models.disruption_tree import DisruptionTree
+from odf.models.object_graph import ObjectGraph
+
+if TYPE_CHECKING:
+    from dd import cudd_add
+    from odf.checker.portfolio import Portfolio
+
+NodeTable = dict[str, cudd.Function]
+# Per tree, maps a set of evidence nodes to the nodes affected by that evidence
+# and their BDDs, from the least to the most recently used. The empty set maps
+# to the BDDs of all unaffected nodes.
+NodeBDDTables = dict[DisruptionTree, OrderedDict[
+    frozenset[str], tuple[frozenset[str], NodeTable]]]
+# Maps node condition parse trees to their BDDs. Lark trees compare and hash
+# structurally, so nodes with identical conditions share one entry. The
+# conditions are those of the model, so the table does not grow with the
+# number of formulas.
+ConditionTable = dict[Tree, cudd.Function]
+
+# The number of overlay tables (for distinct sets of evidence nodes) that are
+# kept per tree. The BDDs in the tables cannot be garbage collected by CUDD,
+# so the least recently used overlays are dropped; the base table is kept for
+# the lifetime of the context.
+MAX_OVERLAY_TABLES = 16
+
+
+class ModelContext:
+    """Compilation context shared by all formulas checked against one model.
+
+    The context owns a single CUDD manager in which every object property and
+    every attack and fault tree node is declared once, with all object
+    properties above all events. All formulas of all layers are compiled in
+    this manager, so identical (sub)formulas hit CUDD's unique table and
+    computed cache instead of being rebuilt from scratch for every formula.
+
+    The initial order of the variables is chosen by one of the heuristics of
+    `odf.checker.ordering`, unless an order saved by an earlier run (see
+    `current_order`) is given. The object properties and the events are then
+    registered as two variable groups, so that dynamic reordering (sifting)
+    only changes the order within each block and never moves a property in
+    between events. Sifting may still move one block as a whole past the
+    other, which `properties_on_top` undoes before BDDs are traversed.
+
+    With a portfolio, the order is searched for in parallel as soon as a
+    formula blows up (see `odf.checker.portfolio`).
+    """
+
+    def __init__(self,
+                 attack_tree: DisruptionTree,
+                 fault_tree: DisruptionTree,
+                 object_graph: ObjectGraph,
+                 ordering: str = DEFAULT_ORDERING,
+                 initial_order: Optional[list[str]] = None,
+                 portfolio: Optional["Portfolio"] = None):
+        self.attack_tree = attack_tree
+        self.fault_tree = fault_tree
+        self.object_graph = object_graph
+
+        self.ordering = ordering
+        self.object_properties, self.event_nodes = variable_order(
+            attack_tree, fault_tree, object_graph, ordering)
+        if initial_order is not None:
+            self.object_properties, self.event_nodes = adopt_order(
+                initial_order, (self.object_properties, self.event_nodes))
+
+        self.bdd = cudd.BDD()
+        self.bdd.declare(*self.object_properties, *self.event_nodes)
+        # CUDD rejects groups of a single variable, which need no group anyway
+        self.bdd.group({block[0]: len(block) for block in
+                        (self.object_properties, self.event_nodes)
+                        if len(block) > 1})
+        self.node_bdds: NodeBDDTables = {}
+        self.condition_bdds: ConditionTable = {}
+        self._add: Optional["cudd_add.ADD"] = None
+        self.portfolio = portfolio
+        self.order_searched = False
+
+    @property
+    def add(self) -> "cudd_add.ADD":
+        """The ADD manager for layer 3 risk MTBDDs, created on first use."""
+        if self._add is None:
+            # Imported here so that only files with layer 3 formulas load it
+            from dd import cudd_add
+            self._add = cudd_add.ADD()
+            self._add.declare(*self.object_properties)
+        return self._add
+
+    def current_order(self) -> list[str]:
+        """Return the object properties and the events in their current
+        order in the manager, with the properties on top."""
+        levels = self.bdd.var_levels
+        return [*sorted(self.object_properties, key=levels.__getitem__),
+                *sorted(self.event_nodes, key=levels.__getitem__)]
+
+    @contextmanager
+    def properties_on_top(self) -> Iterator[cudd.BDD]:
+        """Fix the variable order with all object properties above all events.
+
+        Layers 2 and 3 traverse BDDs assuming that no object property occurs
+        below an event variable. The BDDs can be built with reordering
+        enabled, as the variable groups keep both blocks intact, but the
+        order is restored first if sifting moved the event block above the
+        property block.
+        Dynamic reordering is disabled while the context manager is active,
+        so the order stays fixed during the traversal.
+        """
+        config = self.bdd.configure(reordering=False)
+        try:
+            self._restore_properties_on_top()
+            yield self.bdd
+        finally:
+            self.bdd.configure(reordering=config["reordering"])
+
+    def _restore_properties_on_top(self):
+        levels = self.bdd.var_levels
+        properties = self.object_graph.object_properties
+        lowest_property = max(
+            (levels[var] for var in properties), default=-1)
+        highest_event = min(
+            (level for var, level in levels.items() if var not in properties),
+            default=len(levels))
+        if lowest_property < highest_event:
+            return
+
+        # Keep the relative order within both blocks
+        order = sorted(levels, key=lambda var: (var not in properties,
+                                                levels[var]))
+        self.bdd.reorder({var: level for level, var in enumerate(order)})
@@ -104,3 +104,12 @@ class InvalidImpactError(ODFError):
         self.value = value
         super().__init__(
             f"Impact for node '{node_name}' must be non-negative (got {value:f})")
+
+
+class NodeBudgetExceededError(ODFError):
+    """Raised when building a BDD takes more nodes than allowed."""
+
+    def __init__(self, node_budget: int):
+        self.node_budget = node_budget
+        super().__init__(
+            f"Building the BDD took more than {node_budget} nodes")
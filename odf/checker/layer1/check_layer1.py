@@ -1,19 +1,33 @@
+import itertools
+from fractions import Fraction
+from typing import Iterable, Optional
+
 from lark import Tree
 
-from odf.checker.exceptions import MissingConfigurationError
+from odf.checker.context import ModelContext
+from odf.checker.exceptions import MissingConfigurationError, \
+    MissingNodeProbabilityError
 from odf.checker.layer1.layer1_bdd import Layer1BDDInterpreter
+from odf.checker.layer1.minsol import minimal_solutions
+from odf.checker.layer1.family import ScenarioFamily
+from odf.checker.layer1.scenarios import ScenarioOptions
 from odf.core.types import Configuration
 from odf.models.disruption_tree import DisruptionTree
 from odf.models.object_graph import ObjectGraph
 from odf.transformers.configuration import parse_configuration
-from odf.utils.formatting import format_boolean, format_set
+from odf.transformers.truncation import Truncation, parse_truncation
+from odf.utils.formatting import format_boolean, format_set, \
+    format_probability
 from odf.utils.logger import logger
 
 
 def check_layer1_query(formula: Tree,
                        attack_tree: DisruptionTree,
                        fault_tree: DisruptionTree,
-                       object_graph: ObjectGraph):
+                       object_graph: ObjectGraph,
+                       context: Optional[ModelContext] = None,
+                       scenarios: Optional[ScenarioOptions] = None,
+                       number: int = 1):
     assert formula.data == "layer1_query"
 
     configuration = parse_configuration(formula.children[0].children[0])
@@ -23,18 +37,21 @@ def check_layer1_query(formula: Tree,
         case "check":
             formula = formula.children[0].children[1]
             res = layer1_check(formula, configuration, attack_tree, fault_tree,
-                               object_graph)
+                               object_graph, context)
             print(f"  Result: {format_boolean(res)}")
         case "compute_all":
-            formula = formula.children[0].children[1]
-            res = layer1_compute_all(formula, configuration, attack_tree,
-                                     fault_tree, object_graph)
-            print("  Minimal Risk Scenarios:")
-            if not res:
-                print("    - None (Formula is unsatisfiable)")
-            else:
-                for config_set in sorted(list(res), key=len):
-                    print(f"    - {format_set(config_set)}")
+            options = scenarios or ScenarioOptions()
+            formula, *truncation_tree = formula.children[0].children[1:]
+            # The limits of the query take precedence over those of the
+            # options
+            truncation = options.truncation
+            if truncation_tree:
+                truncation = parse_truncation(truncation_tree[0]).over(
+                    truncation)
+            family = layer1_scenario_family(formula, configuration,
+                                            attack_tree, fault_tree,
+                                            object_graph, context, truncation)
+            print_scenarios(family, options, number, truncation)
         case _:
             # Should be unreachable
             raise ValueError(f"Unexpected query type: {query_type}")
@@ -44,8 +61,10 @@ def layer1_check(formula: Tree,
                  configuration: Configuration,
                  attack_tree: DisruptionTree,
                  fault_tree: DisruptionTree,
-                 object_graph: ObjectGraph) -> bool:
-    transformer = Layer1BDDInterpreter(attack_tree, fault_tree, object_graph)
+                 object_graph: ObjectGraph,
+                 context: Optional[ModelContext] = None) -> bool:
+    transformer = Layer1BDDInterpreter(attack_tree, fault_tree, object_graph,
+                                       context=context)
     bdd = transformer.interpret(formula)
 
     needed_vars = bdd.support
@@ -66,17 +85,113 @@ def layer1_check(formula: Tree,
     return res
 
 
+def print_scenarios(family: ScenarioFamily, options: ScenarioOptions,
+                    number: int, truncation: Truncation = Truncation()):
+    """Report the minimal risk scenarios of formula `number`, writing them
+    as soon as they are generated: the smallest first, or only the top-k most
+    likely ones, the most likely first."""
+    top = truncation.top
+    count = family.count() if top is None else min(top, family.count())
+    if options.count_only or options.format != "text":
+        print(f"  Number of Minimal Risk Scenarios: {count}")
+        if options.count_only:
+            return
+    else:
+        print("  Minimal Risk Scenarios:")
+        if not family and truncation == Truncation():
+            print("    - None (Formula is unsatisfiable)")
+            return
+        if not count:
+            print("    - None (within the truncation limits)")
+            return
+
+    written = 0
+    for scenario, probability in truncated_scenarios(family, top):
+        if written == options.limit:
+            if options.format == "text":
+                print(f"    ... and {count - written} more")
+            break
+        if options.format == "text":
+            line = f"    - {format_set(scenario)}"
+            if probability is not None:
+                line += f" (P = {format_probability(probability)})"
+            print(line)
+        else:
+            options.write(number, scenario, probability)
+        written += 1
+    if options.format != "text":
+        options.flush()
+
+
 def layer1_compute_all(formula: Tree,
                        configuration: Configuration,
                        attack_tree: DisruptionTree,
                        fault_tree: DisruptionTree,
-                       object_graph: ObjectGraph) -> set[frozenset[str]]:
-    if formula.data != "mrs":
-        formula = Tree("mrs", [formula])
-
-    transformer = Layer1BDDInterpreter(attack_tree, fault_tree, object_graph)
-    bdd = transformer.interpret(formula)
+                       object_graph: ObjectGraph,
+                       context: Optional[ModelContext] = None,
+                       truncation: Truncation = Truncation(),
+                       evidence: Optional[dict[str, bool]] = None
+                       ) -> set[frozenset[str]]:
+    family = layer1_scenario_family(formula, configuration, attack_tree,
+                                    fault_tree, object_graph, context,
+                                    truncation, evidence)
+    return {scenario for scenario, _ in
+            truncated_scenarios(family, truncation.top)}
+
+
+def truncated_scenarios(family: ScenarioFamily, top: Optional[int] = None
+                        ) -> Iterable[tuple[frozenset[str],
+                                            Optional[Fraction]]]:
+    """Generate the scenarios of a family with their probabilities (if the
+    family has them): the smallest first, or only the `top` most likely ones,
+    the most likely first."""
+    if top is not None:
+        return itertools.islice(family.by_probability(), top)
+    if family.probabilities is None:
+        return ((scenario, None) for scenario in family.by_size())
+    return ((scenario, family.probability(scenario))
+            for scenario in family.by_size())
+
+
+def layer1_scenario_family(formula: Tree,
+                           configuration: Configuration,
+                           attack_tree: DisruptionTree,
+                           fault_tree: DisruptionTree,
+                           object_graph: ObjectGraph,
+                           context: Optional[ModelContext] = None,
+                           truncation: Truncation = Truncation(),
+                           evidence: Optional[dict[str, bool]] = None
+                           ) -> ScenarioFamily:
+    """Return the family of minimal risk scenarios of a formula under a
+    configuration of its object properties and evidence on its nodes,
+    truncated to the scenarios with at most `truncation.order` events and a
+    probability of at least `truncation.probability`.
+
+    The family has the probabilities of its events if the truncation needs
+    them (the top-k limit is left to the caller).
+    """
+    # The minimal solutions of the formula are computed here rather than by
+    # the interpreter, so that the truncation prunes their computation
+    if formula.data == "mrs":
+        formula = formula.children[0]
+
+    transformer = Layer1BDDInterpreter(attack_tree, fault_tree, object_graph,
+                                       dict(evidence or {}), context=context)
+    solutions = transformer.interpret(formula)
     manager = transformer.bdd
+    # Nodes with evidence are plain variables of the BDD, but their values
+    # are fixed by the evidence, so they are no events of the scenarios
+    fixed = {node: value for node, value in
+             transformer.current_evidence.items()
+             if node in solutions.support}
+    if fixed:
+        solutions = manager.let(fixed, solutions)
+    events = solutions.support - transformer.object_properties
+    probabilities = None
+    if truncation.probabilistic:
+        probabilities = event_probabilities(attack_tree, fault_tree, events)
+    bdd = minimal_solutions(manager, solutions, events, truncation.order,
+                            truncation.probability, probabilities)
 
     needed_vars = transformer.object_properties.intersection(bdd.support)
     given_vars = set(configuration.keys())
@@ -93,10 +208,22 @@ def layer1_compute_all(formula: Tree,
         for var in non_existing_vars:
             del configuration[var]
 
-    bdd = manager.let(configuration, bdd)
-
-    res = set()
-    for assignment in manager._pick_iter(bdd):
-        res.add(
-            frozenset(var for var, val in assignment.items() if val == True))
-    return res
+    return ScenarioFamily.from_bdd(manager, manager.let(configuration, bdd),
+                                   probabilities)
+
+
+def event_probabilities(attack_tree: DisruptionTree,
+                        fault_tree: DisruptionTree,
+                        events: Iterable[str]) -> dict[str, Fraction]:
+    """Return the probabilities of basic events of the disruption trees."""
+    probabilities = {}
+    for event in sorted(events):
+        if event in attack_tree:
+            tree, tree_type = attack_tree, "attack tree"
+        else:
+            tree, tree_type = fault_tree, "fault tree"
+        probability = tree.compact().node(event).probability
+        if probability is None:
+            raise MissingNodeProbabilityError(event, tree_type)
+        probabilities[event] = probability
+    return probabilities
@@ -0,0 +1,254 @@
+"""Families of minimal risk scenarios, held as ZDDs.
+
+The BDD of the minimal solutions of a formula fixes every one of its
+variables on every path, most of them to false, so it has a node for every
+variable on every path. A ZDD leaves out the variables that are false, which
+makes it a compact representation of a family of (mostly small) sets. A
+`ScenarioFamily` converts the BDD into a ZDD in a manager of its own, which
+only has the events of the family as its variables, and answers queries on
+the family directly on the ZDD, so the family never has to be materialized
+as Python objects.
+
+The scenarios are the paths of the ZDD to its base node (`true_node`, the
+family that only holds the empty set): a path contains the events of the
+nodes where it takes the high branch.
+"""
+import heapq
+import itertools
+from fractions import Fraction
+from typing import Iterable, Iterator, Optional
+
+from dd import cudd, cudd_zdd
+
+from odf.checker.layer1.minsol import cofactors
+
+
+class ScenarioFamily:
+    """A family of minimal risk scenarios, each a set of events, with the
+    probabilities of the events if they are needed."""
+
+    def __init__(self, zdd: cudd_zdd.ZDD, function: cudd_zdd.Function,
+                 probabilities: Optional[dict[str, Fraction]] = None):
+        self.zdd = zdd
+        self.function = function
+        self.probabilities = probabilities
+
+    @classmethod
+    def from_bdd(cls, manager: cudd.BDD, bdd: cudd.Function,
+                 probabilities: Optional[dict[str, Fraction]] = None
+                 ) -> "ScenarioFamily":
+        """Convert a BDD of minimal solutions whose support consists of
+        events only (its object properties have been substituted) into a
+        family."""
+        zdd = cudd_zdd.ZDD()
+        # The events keep the order of the BDD, which the constraints of
+        # `by_size` rely on (and reordering a ZDD while its variables are
+        # created fails in CUDD)
+        zdd.configure(reordering=False)
+        zdd.declare(*sorted(bdd.support, key=manager.level_of_var))
+
+        # Bottom-up over the nodes of the BDD, without recursion, as the
+        # paths can be longer than the recursion limit
+        table = {manager.false: zdd.false, manager.true: zdd.true}
+        stack = [bdd]
+        while stack:
+            g = stack[-1]
+            if g in table:
+                stack.pop()
+                continue
+            g0, g1 = cofactors(g)
+            missing = [child for child in (g0, g1) if child not in table]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            table[g] = zdd.ite(zdd.var(g.var), table[g1], table[g0])
+        return cls(zdd, table[bdd], probabilities)
+
+    @property
+    def events(self) -> set[str]:
+        """The events that can occur in the scenarios of the family."""
+        return set(self.zdd.vars)
+
+    def count(self) -> int:
+        """Return the number of scenarios, without enumerating them."""
+        # The paths to the base node are counted bottom-up, which is exact
+        # for any number of scenarios
+        counts = {self.zdd.false: 0, self.zdd.true_node: 1}
+        stack = [self.function]
+        while stack:
+            u = stack[-1]
+            if u in counts:
+                stack.pop()
+                continue
+            missing = [child for child in (u.low, u.high)
+                       if child not in counts]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            counts[u] = counts[u.low] + counts[u.high]
+        return counts[self.function]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __bool__(self) -> bool:
+        return self.function != self.zdd.false
+
+    def __iter__(self) -> Iterator[frozenset[str]]:
+        """Generate the scenarios lazily, in the order of the paths of the
+        ZDD."""
+        stack = [(self.function, ())]
+        while stack:
+            u, path = stack.pop()
+            if u == self.zdd.false:
+                continue
+            if u == self.zdd.true_node:
+                yield frozenset(path)
+                continue
+            stack.append((u.high, (*path, u.var)))
+            stack.append((u.low, path))
+
+    def by_size(self) -> Iterator[frozenset[str]]:
+        """Generate the scenarios lazily, the smallest first.
+
+        The scenarios of each size are those of the family restricted by the
+        constraint that exactly that many events occur. The sizes that have
+        been generated are removed from the family, which stops the
+        generation once nothing is left.
+        """
+        rest = self.function
+        for exactly in self._size_constraints():
+            if rest == self.zdd.false:
+                break
+            layer = rest & exactly
+            yield from self._derived(layer)
+            rest &= ~layer
+
+    def __contains__(self, scenario: Iterable[str]) -> bool:
+        scenario = set(scenario)
+        if not scenario <= self.events:
+            return False
+        values = {var: var in scenario for var in self.zdd.vars}
+        return self.zdd.let(values, self.function) == self.zdd.true
+
+    def with_size(self, min_size: int = 0,
+                  max_size: Optional[int] = None) -> "ScenarioFamily":
+        """Return the scenarios with at least `min_size` and at most
+        `max_size` events."""
+        sizes = self.zdd.false
+        for size, exactly in enumerate(self._size_constraints()):
+            if max_size is not None and size > max_size:
+                break
+            if size >= min_size:
+                sizes |= exactly
+        return self._derived(self.function & sizes)
+
+    def supersets_of(self, events: Iterable[str]) -> "ScenarioFamily":
+        """Return the scenarios that contain all of the given events."""
+        events = set(events)
+        if not events <= self.events:
+            return self._derived(self.zdd.false)
+        return self._derived(self.function & self.zdd.cube(
+            {var: True for var in events}))
+
+    def subsets_of(self, events: Iterable[str]) -> "ScenarioFamily":
+        """Return the scenarios that contain no events other than the given
+        ones."""
+        others = self.events - set(events)
+        return self._derived(self.function & self.zdd.cube(
+            {var: False for var in others}))
+
+    def probability(self, scenario: Iterable[str]) -> Fraction:
+        """Return the probability of a scenario: the product of the
+        probabilities of its events."""
+        probability = Fraction(1)
+        for event in scenario:
+            probability *= self.probabilities[event]
+        return probability
+
+    def by_probability(self) -> Iterator[tuple[frozenset[str], Fraction]]:
+        """Generate the scenarios lazily with their probabilities, the most
+        likely first.
+
+        This is a best-first search over the paths of the ZDD, in which a
+        partial path is ranked by its probability times the highest
+        probability of a path from its last node to the base node. As this
+        bound is exact, the first `k` scenarios are found after expanding
+        about `k` paths, without visiting the rest of the family.
+        """
+        best = self._best_probabilities()
+        if self.function not in best:
+            return
+        order = itertools.count()
+        queue = [(-best[self.function], next(order), self.function, (),
+                  Fraction(1))]
+        while queue:
+            _, _, u, path, probability = heapq.heappop(queue)
+            if u == self.zdd.true_node:
+                yield frozenset(path), probability
+                continue
+            for child, events, child_probability in [
+                    (u.low, path, probability),
+                    (u.high, (*path, u.var),
+                     probability * self.probabilities[u.var])]:
+                if child in best:
+                    heapq.heappush(queue, (-child_probability * best[child],
+                                           next(order), child, events,
+                                           child_probability))
+
+    def _best_probabilities(self) -> dict[cudd_zdd.Function, Fraction]:
+        """Return the highest probability of a path to the base node from
+        every node of the family that has one, computed bottom-up."""
+        best = {self.zdd.true_node: Fraction(1)}
+        visited = {self.zdd.false, self.zdd.true_node}
+        stack = [self.function]
+        while stack:
+            u = stack[-1]
+            if u in visited:
+                stack.pop()
+                continue
+            missing = [child for child in (u.low, u.high)
+                       if child not in visited]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            visited.add(u)
+            paths = []
+            if u.low in best:
+                paths.append(best[u.low])
+            if u.high in best:
+                paths.append(self.probabilities[u.var] * best[u.high])
+            if paths:
+                best[u] = max(paths)
+        return best
+
+    def _derived(self, function: cudd_zdd.Function) -> "ScenarioFamily":
+        """Return the family of a function of the same manager."""
+        return ScenarioFamily(self.zdd, function, self.probabilities)
+
+    def _size_constraints(self) -> Iterator[cudd_zdd.Function]:
+        """Generate the constraints that exactly 0, 1, ... events occur.
+
+        Each constraint is built from the previous one in one pass over the
+        events, from the bottom level up.
+        """
+        events = sorted(self.zdd.vars, key=self.zdd.level_of_var)
+        # exactly[i] holds the constraint for the current size over the
+        # events from position i on, starting with size 0
+        exactly = [self.zdd.true]
+        for var in reversed(events):
+            exactly.append(~self.zdd.var(var) & exactly[-1])
+        exactly.reverse()
+        yield exactly[0]
+
+        for _ in events:
+            following = [self.zdd.false]
+            for i in range(len(events) - 1, -1, -1):
+                following.append(self.zdd.ite(self.zdd.var(events[i]),
+                                              exactly[i + 1], following[-1]))
+            following.reverse()
+            exactly = following
+            yield exactly[0]
@@ -1,13 +1,19 @@
+from collections import OrderedDict
 from typing import Optional
 
 from dd import cudd
 from lark import Transformer, Tree
 from lark.visitors import _Leaf_T, visit_children_decor, Interpreter
 
+from odf.checker.context import (ModelContext, NodeBDDTables, NodeTable,
+                                 ConditionTable, MAX_OVERLAY_TABLES)
 from odf.checker.exceptions import (UnknownNodeError, NonModuleNodeError,
                                     NodeAncestorEvidenceError,
                                     EvidenceAncestorEvidenceError,
-                                    InvalidNodeEvidenceError)
+                                    InvalidNodeEvidenceError,
+                                    NodeBudgetExceededError)
+from odf.checker.layer1.minsol import minimal_solutions
+from odf.checker.ordering import variable_order
 from odf.models.disruption_tree import DisruptionTree, DTNode
 from odf.models.object_graph import ObjectGraph
 from odf.transformers.mixins.boolean_formula import BooleanFormulaMixin
@@ -41,10 +47,10 @@ class Layer1FormulaInterpreter(Interpreter):
                 collection.update(
                     disruption_tree.get_basic_descendants(node_name))
 
+                compact = disruption_tree.compact()
                 for descendant in disruption_tree.get_descendants(node_name):
                     self.object_properties.update(
-                        disruption_tree.nodes[descendant][
-                            "data"].object_properties)
+                        compact.node(descendant).object_properties)
                 return
 
         if self.object_graph.has_object_property(node_name):
@@ -67,8 +73,8 @@ class Layer1FormulaInterpreter(Interpreter):
                 if self.attack_tree.has_intermediate_node(node_name):
                     if not self.attack_tree.is_module(node_name):
                         raise NonModuleNodeError(node_name, "attack tree")
-                    local_blacklist[node_name] = set(
-                        self.attack_tree.get_strict_descendants(node_name))
+                    local_blacklist[node_name] = \
+                        self.attack_tree.get_strict_descendants(node_name)
 
             elif self.fault_tree.has_node(node_name):
                 self.fault_nodes.add(node_name)
@@ -76,8 +82,8 @@ class Layer1FormulaInterpreter(Interpreter):
                 if self.fault_tree.has_intermediate_node(node_name):
                     if not self.fault_tree.is_module(node_name):
                         raise NonModuleNodeError(node_name, "fault tree")
-                    local_blacklist[node_name] = set(
-                        self.fault_tree.get_strict_descendants(node_name))
+                    local_blacklist[node_name] = \
+                        self.fault_tree.get_strict_descendants(node_name)
 
             elif self.object_graph.has_object_property(node_name):
                 self.object_properties.add(node_name)
@@ -120,17 +126,34 @@ class Layer1BDDInterpreter(Interpreter, BooleanMappingMixin,
                  fault_tree: DisruptionTree,
                  object_graph: ObjectGraph,
                  evidence: Optional[dict[str, bool]] = None,
-                 reordering=None):
+                 reordering=None,
+                 context: Optional[ModelContext] = None,
+                 node_budget: Optional[int] = None):
         super().__init__()
         self.attack_tree = attack_tree
         self.fault_tree = fault_tree
         self.object_graph = object_graph
+        self.context = context
         self.bdd_vars: list[str] = []
-        self.bdd = cudd.BDD()
+        # Share the manager and node and condition tables of the model context
+        # so that BDDs built for earlier formulas are reused
+        if context is not None:
+            self.bdd = context.bdd
+            self.node_bdds = context.node_bdds
+            self.condition_bdds = context.condition_bdds
+        else:
+            self.bdd = cudd.BDD()
+            self.node_bdds: NodeBDDTables = {}
+            self.condition_bdds: ConditionTable = {}
         if reordering is not None:
             self.bdd.configure(reordering=reordering)
-        self.prime_count = 0
         self.current_evidence = evidence if evidence is not None else {}
+        # The maximum number of nodes of the BDDs of a formula, checked after
+        # every step of building them
+        self.node_budget = node_budget
+        # The number of live nodes in the manager when the current formula
+        # was started
+        self.start_nodes = 0
 
     def interpret(self, tree: Tree[_Leaf_T]) -> cudd.Function:
         visitor = Layer1FormulaInterpreter(self.attack_tree, self.fault_tree,
@@ -141,11 +164,59 @@ class Layer1BDDInterpreter(Interpreter, BooleanMappingMixin,
         self.fault_nodes = visitor.fault_nodes
         self.object_properties = visitor.object_properties
 
-        self.bdd_vars = [*visitor.object_properties, *visitor.fault_nodes,
-                         *visitor.attack_nodes]
-        self.bdd.declare(*self.bdd_vars)
+        if self.context is None:
+            # Declare the variables of the formula in the default static
+            # order (a context has declared all variables already)
+            used = (visitor.object_properties | visitor.fault_nodes |
+                    visitor.attack_nodes | set(self.current_evidence))
+            properties, events = variable_order(
+                self.attack_tree, self.fault_tree, self.object_graph)
+            self.bdd_vars = [var for var in (*properties, *events)
+                             if var in used]
+            self.bdd.declare(*self.bdd_vars)
+
+        self.start_nodes = len(self.bdd)
+        portfolio = self.context and self.context.portfolio
+        if portfolio is None or self.context.order_searched or \
+                self.node_budget is not None:
+            return self.visit(tree)
+
+        # Search for a better order only if the formula blows up in the
+        # current one
+        evidence = self.current_evidence.copy()
+        self.node_budget = portfolio.node_budget
+        try:
+            return self.visit(tree)
+        except NodeBudgetExceededError:
+            self.current_evidence = evidence
+        finally:
+            self.node_budget = None
+        portfolio.race(self.context, evidence, tree)
         return self.visit(tree)
 
+    def _visit_tree(self, tree: Tree[_Leaf_T]):
+        # Lark visits the root and all subtrees through this method
+        result = super()._visit_tree(tree)
+        if isinstance(result, cudd.Function):
+            self.check_budget(result)
+        return result
+
+    def check_budget(self, result: cudd.Function):
+        """Raise a NodeBudgetExceededError if an intermediate BDD of the
+        current formula takes more nodes than the budget.
+
+        The nodes of the BDD itself are counted, not those of the whole
+        manager, which also holds the node tables and the BDDs of earlier
+        formulas. As counting them takes time linear in the size of the BDD,
+        they are only counted once the manager has grown by more than the
+        budget since the formula was started.
+        """
+        if self.node_budget is None or \
+                len(self.bdd) - self.start_nodes <= self.node_budget:
+            return
+        if result.dag_size > self.node_budget:
+            raise NodeBudgetExceededError(self.node_budget)
+
     def with_boolean_evidence(self, tree):
         old_evidence = self.current_evidence.copy()
 
@@ -165,41 +236,10 @@ class Layer1BDDInterpreter(Interpreter, BooleanMappingMixin,
 
     @visit_children_decor
     def mrs(self, items):
-        self.prime_count += 1
-
-        def p(var):
-            return f"{var}'{self.prime_count}"
-
         formula = items[0]
-        vars_ = formula.support - self.object_properties
-        primed_vars = [p(var) for var in vars_]
-        self.bdd.declare(*primed_vars)
-
-        primed_formula = self.bdd.let({var: p(var) for var in vars_},
-                                      formula)
-
-        # Construct the primes_subset formula:
-        # 1. First part: conjunction of implications (p'i => xi)
-        implications = self.bdd.true
-        for var in vars_:
-            prime_var = self.bdd.var(p(var))
-            orig_var = self.bdd.var(var)
-            implication = prime_var.implies(orig_var)
-            implications = implications & implication
-
-        # 2. Second part: disjunction of XORs ((p'i ^ xi) | (p'j ^ xj) | ...)
-        xor_terms = self.bdd.false
-        for var in vars_:
-            prime_var = self.bdd.var(p(var))
-            orig_var = self.bdd.var(var)
-            xor_term = self.bdd.apply('xor', prime_var, orig_var)
-            xor_terms = xor_terms | xor_term
-
-        # Combine both parts
-        primes_subset = implications & xor_terms
-
-        return formula & ~self.bdd.exist(primed_vars,
-                                         primes_subset & primed_formula)
+        # Object properties are parameters of the minimal solutions
+        return minimal_solutions(self.bdd, formula,
+                                 formula.support - self.object_properties)
 
     @visit_children_decor
     def node_atom(self, items):
@@ -208,21 +248,11 @@ class Layer1BDDInterpreter(Interpreter, BooleanMappingMixin,
         if node_name in self.current_evidence:
             return self.node_from_evidence(node_name)
 
-        if node_name in self.bdd.vars:
-            if node_name in self.object_properties:
-                return self.bdd.var(node_name)
-
-            if node_name in self.attack_nodes:
-                node = self.attack_tree.nodes[node_name]["data"]
-                return self.basic_node_to_bdd(node)
-            if node_name in self.fault_nodes:
-                node = self.fault_tree.nodes[node_name]["data"]
-                return self.basic_node_to_bdd(node)
-
-            raise UnknownNodeError(node_name)  # Should be unreachable
+        if node_name in self.object_properties:
+            return self.bdd.var(node_name)
 
         for disruption_tree in [self.attack_tree, self.fault_tree]:
-            if disruption_tree.has_intermediate_node(node_name):
+            if disruption_tree.has_node(node_name):
                 return self.intermediate_node_to_bdd(disruption_tree,
                                                      node_name)
 
@@ -235,38 +265,116 @@ class Layer1BDDInterpreter(Interpreter, BooleanMappingMixin,
         if node.condition_tree is None:
             return self.bdd.var(node.name)
 
-        condition_bdd = ConditionTransformer(self.bdd).transform(
+        return self.bdd.var(node.name) & self.condition_to_bdd(
             node.condition_tree)
-        return self.bdd.var(node.name) & condition_bdd
-
-    def intermediate_node_to_bdd(self, disruption_tree: DisruptionTree,
-                                 node_name: str) -> cudd.Function:
-        node = disruption_tree.nodes[node_name]["data"]
-
-        if node.name in self.current_evidence:
-            return self.node_from_evidence(node.name)
-
-        if disruption_tree.out_degree(node_name) == 0:
-            return self.basic_node_to_bdd(node)
 
-        children = list(disruption_tree.successors(node_name))
+    def gate_to_bdd(self, node: DTNode,
+                    children: list[cudd.Function]) -> cudd.Function:
         assert len(children) > 0
 
         assert node.gate_type is not None
         apply = node.gate_type
 
-        result = self.intermediate_node_to_bdd(disruption_tree, children[0])
+        result = children[0]
         for child in children[1:]:
-            result = self.bdd.apply(
-                apply, result,
-                self.intermediate_node_to_bdd(disruption_tree, child))
+            result = self.bdd.apply(apply, result, child)
+            self.check_budget(result)
 
         if node.condition_tree is None:
             return result
 
-        condition_bdd = ConditionTransformer(self.bdd).transform(
-            node.condition_tree)
-        return result & condition_bdd
+        return result & self.condition_to_bdd(node.condition_tree)
+
+    def condition_to_bdd(self, condition_tree: Tree) -> cudd.Function:
+        """Translate a node condition into a BDD, compiling each distinct
+        condition only once per manager."""
+        condition_bdd = self.condition_bdds.get(condition_tree)
+        if condition_bdd is None:
+            condition_bdd = ConditionTransformer(self.bdd).transform(
+                condition_tree)
+            self.condition_bdds[condition_tree] = condition_bdd
+        return condition_bdd
+
+    def node_tables(self, disruption_tree: DisruptionTree
+                    ) -> tuple[NodeTable, frozenset[str], NodeTable]:
+        """Return the node BDD tables of a tree for the current evidence.
+
+        Returns a tuple (base, affected, overlay). The base table holds the
+        BDDs of nodes as if no evidence were set and is shared by all
+        formulas. Evidence on a node replaces it by a plain variable, which
+        invalidates the base entries of the node and all its ancestors (the
+        affected nodes). Their BDDs are kept in an overlay table per set of
+        evidence nodes instead, of which only the `MAX_OVERLAY_TABLES` most
+        recently used ones are kept.
+        """
+        tables = self.node_bdds.setdefault(disruption_tree, OrderedDict())
+        if not tables:
+            tables[frozenset()] = (frozenset(), {})
+        base = tables[frozenset()][1]
+
+        evidence_nodes = frozenset(node_name for node_name in
+                                   self.current_evidence
+                                   if disruption_tree.has_node(node_name))
+        if evidence_nodes not in tables:
+            affected = frozenset().union(
+                *(disruption_tree.get_ancestors(node_name)
+                  for node_name in evidence_nodes))
+            tables[evidence_nodes] = (affected, {})
+            if len(tables) > MAX_OVERLAY_TABLES + 1:
+                # The base table stays first, as it is never moved to the end
+                least_recent = next(key for key in tables if key)
+                del tables[least_recent]
+        elif evidence_nodes:
+            tables.move_to_end(evidence_nodes)
+        affected, overlay = tables[evidence_nodes]
+
+        return base, affected, overlay
+
+    def intermediate_node_to_bdd(self, disruption_tree: DisruptionTree,
+                                 node_name: str) -> cudd.Function:
+        """Translate a node of a disruption tree into a BDD.
+
+        Nodes are translated bottom-up in topological order and memoized, so
+        a subtree that is shared by several parents is only translated once.
+        """
+        base, affected, overlay = self.node_tables(disruption_tree)
+        compact = disruption_tree.compact()
+        names = compact.names
+
+        def table_of(name: str) -> NodeTable:
+            return overlay if name in affected else base
+
+        stack = [compact.index[node_name]]
+        while stack:
+            i = stack[-1]
+            name = names[i]
+            table = table_of(name)
+            if name in table:
+                stack.pop()
+                continue
+
+            if name in self.current_evidence:
+                table[name] = self.node_from_evidence(name)
+                stack.pop()
+                continue
+
+            children = compact.children_of(i)
+            missing = [child for child in children
+                       if names[child] not in table_of(names[child])]
+            if missing:
+                stack.extend(missing)
+                continue
+
+            stack.pop()
+            if not children:
+                table[name] = self.basic_node_to_bdd(compact.data[i])
+            else:
+                table[name] = self.gate_to_bdd(
+                    compact.data[i],
+                    [table_of(names[child])[names[child]]
+                     for child in children])
+
+        return table_of(node_name)[node_name]
 
     def node_from_evidence(self, node_name):
         return self.bdd.var(node_name)
@@ -0,0 +1,300 @@
+"""Minimal solutions of BDDs (Rauzy's `minsol` operator).
+
+A solution of a formula is minimal if no solution with a proper subset of its
+true variables exists, where only the minimized variables are compared and
+all other variables (the object properties) act as parameters. This is the
+semantics of the MRS operator.
+
+The operator is computed directly on the BDD, in one pass over its nodes with
+a computed table per node:
+
+    minsol(ite(v, f1, f0)) = ite(v, minsol(f1) & ~up(f0), minsol(f0))
+
+where `up(f)` is the upward closure of `f` (all supersets of its solutions).
+A solution with `v` true is minimal only if no subset of it with `v` false is
+a solution, while subsets of a solution with `v` false also have `v` false.
+For parameters, the operator simply distributes over both branches. A
+minimized variable that a path skips is forced to false, as its value
+does not matter on that path.
+
+The minimal solutions can be truncated to those with at most a given number
+of true variables (their order), or with a probability (the product of the
+probabilities of their true variables) of at least a given cutoff. The order
+truncation prunes the pass itself: the high branch of a minimized variable
+spends one of the remaining order, and a branch without any order left is not
+visited. The computed table is keyed by the node and the remaining order, of
+which there are few distinct values, so the nodes stay shared.
+
+Keying it by the remaining probability cutoff as well would share almost
+nothing, as nearly every path reaches a node with a cutoff of its own.
+Instead, the probability cutoff prunes the pass with a bound that does not
+depend on the path: the high branch of a node is not visited if even the most
+likely path to the node, times the probability of its variable and the most
+likely path from its high child, falls below the cutoff. The (much smaller)
+result is then cut exactly, in a pass that only visits nodes from which a
+solution above the cutoff is left, so it takes time proportional to the
+number of these solutions times their length.
+
+As `up` is computed on the whole formula, the truncated solutions are still
+minimal with respect to all solutions.
+
+The pass relies on the levels of the variables, so dynamic reordering is
+disabled while it runs.
+"""
+from fractions import Fraction
+from typing import Callable, Optional
+
+from dd import cudd
+
+
+def cofactors(f: cudd.Function) -> tuple[cudd.Function, cudd.Function]:
+    """Return the low and high cofactors of a non-constant BDD with respect to
+    its top variable."""
+    if f.negated:
+        return ~f.low, ~f.high
+    return f.low, f.high
+
+
+def minimal_solutions(bdd: cudd.BDD, f: cudd.Function,
+                      minimized: set[str],
+                      max_order: Optional[int] = None,
+                      min_probability: Optional[Fraction] = None,
+                      probabilities: Optional[dict[str, Fraction]] = None
+                      ) -> cudd.Function:
+    """Return the minimal solutions of `f` with respect to the given
+    variables, which must include all variables of its support that are not
+    parameters.
+
+    With `max_order` or `min_probability`, only the minimal solutions with at
+    most that many true variables, or with at least that probability, are
+    returned. The latter needs the probabilities of the minimized variables.
+    """
+    config = bdd.configure(reordering=False)
+    try:
+        levels = {bdd.level_of_var(var): var for var in minimized}
+        if not min_probability:
+            return _minimal_solutions(bdd, f, levels, max_order)
+        weights = {level: probabilities[var] for level, var in levels.items()}
+        solutions = _minimal_solutions(
+            bdd, f, levels, max_order,
+            _probability_bound(bdd, f, weights, min_probability))
+        return _cut(bdd, solutions, weights, min_probability)
+    finally:
+        bdd.configure(reordering=config["reordering"])
+
+
+def _nodes(bdd: cudd.BDD, f: cudd.Function) -> list[cudd.Function]:
+    """Return the (possibly complemented) non-constant nodes of `f`, children
+    before their parents."""
+    order = []
+    visited = set()
+    stack = [(f, False)]
+    while stack:
+        g, expanded = stack.pop()
+        if expanded:
+            order.append(g)
+            continue
+        if g in visited or g in (bdd.false, bdd.true):
+            continue
+        visited.add(g)
+        stack.append((g, True))
+        stack.extend((child, False) for child in cofactors(g))
+    return order
+
+
+def _best_probabilities(bdd: cudd.BDD, f: cudd.Function,
+                        weights: dict[int, Fraction]
+                        ) -> dict[cudd.Function, Fraction]:
+    """Return the highest probability of a path to `true` from every node of
+    `f`, where a path takes the probability of every minimized variable
+    (given by `weights` per level) on which it takes the high branch."""
+    best = {bdd.false: Fraction(0), bdd.true: Fraction(1)}
+    for g in _nodes(bdd, f):
+        g0, g1 = cofactors(g)
+        best[g] = max(best[g0], weights.get(g.level, 1) * best[g1])
+    return best
+
+
+def _probability_bound(bdd: cudd.BDD, f: cudd.Function,
+                       weights: dict[int, Fraction], cutoff: Fraction
+                       ) -> Callable[[cudd.Function], bool]:
+    """Return a predicate that tells if the high branch of a node of `f` may
+    lead to a solution with a probability of at least `cutoff`, on any
+    path."""
+    best = _best_probabilities(bdd, f, weights)
+    # The highest probability of a path from `f` to every node, top-down
+    reach = {f: Fraction(1)}
+    for g in reversed(_nodes(bdd, f)):
+        g0, g1 = cofactors(g)
+        reach[g0] = max(reach.get(g0, 0), reach[g])
+        reach[g1] = max(reach.get(g1, 0),
+                        reach[g] * weights.get(g.level, 1))
+
+    def high_bound(g: cudd.Function) -> bool:
+        _, g1 = cofactors(g)
+        return reach[g] * weights.get(g.level, 1) * best[g1] >= cutoff
+
+    return high_bound
+
+
+def _up_closures(bdd: cudd.BDD, f: cudd.Function,
+                 levels: dict[int, str]) -> dict[cudd.Function, cudd.Function]:
+    """Return the upward closures of the minimized variables of all nodes of
+    `f`, computed bottom-up."""
+    false, true = bdd.false, bdd.true
+    up = {false: false, true: true}
+    stack = [f]
+    while stack:
+        g = stack[-1]
+        if g in up:
+            stack.pop()
+            continue
+        g0, g1 = cofactors(g)
+        missing = [child for child in (g0, g1) if child not in up]
+        if missing:
+            stack.extend(missing)
+            continue
+        stack.pop()
+        var = bdd.var(g.var)
+        if g.level in levels:
+            up[g] = bdd.ite(var, up[g1] | up[g0], up[g0])
+        else:
+            up[g] = bdd.ite(var, up[g1], up[g0])
+    return up
+
+
+def _minimal_solutions(bdd: cudd.BDD, f: cudd.Function,
+                       levels: dict[int, str], max_order: Optional[int],
+                       high_bound: Optional[Callable[[cudd.Function], bool]]
+                       = None) -> cudd.Function:
+    last_level = len(bdd.vars)
+    false, true = bdd.false, bdd.true
+
+    def level(g: cudd.Function) -> int:
+        return last_level if g in (false, true) else g.level
+
+    # Maps (start, end) to the cube that forces the minimized variables at
+    # levels start..end-1 to false
+    skipped_cubes: dict[tuple[int, int], cudd.Function] = {}
+
+    def skipped(start: int, end: int) -> cudd.Function:
+        # Cubes of ranges with the same end share their lower part, so they
+        # are built bottom-up from the longest range that is already known
+        i = start
+        while i < end and (i, end) not in skipped_cubes:
+            i += 1
+        cube = skipped_cubes.get((i, end), true)
+        for j in range(i - 1, start - 1, -1):
+            if j in levels:
+                cube = ~bdd.var(levels[j]) & cube
+            skipped_cubes[(j, end)] = cube
+        return cube
+
+    def skipping(state: Optional[tuple[cudd.Function, Optional[int]]],
+                 start: int) -> cudd.Function:
+        """Return `minsol` of a state for a path that enters its node at
+        level `start`, forcing the minimized variables that it skips to
+        false."""
+        if state is None:
+            return false
+        g, _ = state
+        return skipped(start, level(g)) & minsol[state]
+
+    def children(state: tuple[cudd.Function, Optional[int]]):
+        """Return the states of the low and high branch of a state, where
+        the high branch is None if it is truncated."""
+        g, order = state
+        g0, g1 = cofactors(g)
+        if g.level not in levels:
+            return (g0, order), (g1, order)
+        if order == 0 or (high_bound is not None and not high_bound(g)):
+            return (g0, order), None
+        return (g0, order), (g1, None if order is None else order - 1)
+
+    up = _up_closures(bdd, f, levels)
+    # The computed table, keyed by the (possibly complemented) nodes and the
+    # remaining order with which they are reached
+    minsol: dict[tuple[cudd.Function, Optional[int]], cudd.Function] = {}
+    root = (f, max_order)
+    stack = [root]
+    while stack:
+        state = stack[-1]
+        g, _ = state
+        if state in minsol:
+            stack.pop()
+            continue
+        if g in (false, true):
+            minsol[state] = g
+            stack.pop()
+            continue
+        low, high = children(state)
+        missing = [child for child in (low, high)
+                   if child is not None and child not in minsol]
+        if missing:
+            stack.extend(missing)
+            continue
+        stack.pop()
+
+        var = bdd.var(g.var)
+        start = g.level + 1
+        if g.level in levels:
+            g0, _ = low
+            minsol[state] = bdd.ite(var, skipping(high, start) & ~up[g0],
+                                    skipping(low, start))
+        else:
+            minsol[state] = bdd.ite(var, skipping(high, start),
+                                    skipping(low, start))
+    return skipping(root, 0)
+
+
+def _cut(bdd: cudd.BDD, f: cudd.Function, weights: dict[int, Fraction],
+         cutoff: Fraction) -> cudd.Function:
+    """Return the solutions of `f` with a probability of at least `cutoff`,
+    where the minimized variables that a path skips are false in its
+    solutions (as in the result of `minsol`).
+
+    The computed table is keyed by the nodes and the part of the cutoff that
+    is left, but a node is only visited if a path from it reaches the
+    cutoff, so every entry belongs to a solution of the result.
+    """
+    best = _best_probabilities(bdd, f, weights)
+    false, true = bdd.false, bdd.true
+    cut: dict[tuple[cudd.Function, Fraction], cudd.Function] = {}
+
+    def state(g: cudd.Function, remaining: Fraction
+              ) -> Optional[tuple[cudd.Function, Fraction]]:
+        return (g, remaining) if best[g] >= remaining else None
+
+    def children(g: cudd.Function, remaining: Fraction):
+        g0, g1 = cofactors(g)
+        weight = weights.get(g.level)
+        if weight is None:
+            return state(g0, remaining), state(g1, remaining)
+        if weight == 0:
+            return state(g0, remaining), None
+        return state(g0, remaining), state(g1, remaining / weight)
+
+    root = state(f, cutoff)
+    if root is None:
+        return false
+    stack = [root]
+    while stack:
+        g, remaining = stack[-1]
+        if (g, remaining) in cut:
+            stack.pop()
+            continue
+        if g == true:
+            cut[(g, remaining)] = true
+            stack.pop()
+            continue
+        low, high = children(g, remaining)
+        missing = [child for child in (low, high)
+                   if child is not None and child not in cut]
+        if missing:
+            stack.extend(missing)
+            continue
+        stack.pop()
+        cut[(g, remaining)] = bdd.ite(bdd.var(g.var),
+                                      false if high is None else cut[high],
+                                      false if low is None else cut[low])
+    return cut[root]
@@ -0,0 +1,61 @@
+"""Options for reporting the minimal risk scenarios of layer 1 queries, and
+their NDJSON and CSV records."""
+import csv
+import json
+import sys
+from fractions import Fraction
+from typing import Optional, TextIO
+
+from odf.transformers.truncation import Truncation
+
+SCENARIO_FORMATS = ("text", "ndjson", "csv")
+
+
+class ScenarioOptions:
+    """How the minimal risk scenarios of `[[...]]` queries are reported.
+
+    With `count_only`, only the number of scenarios is computed, without
+    enumerating them. Otherwise, at most `limit` scenarios are reported, the
+    smallest first. In the `ndjson` and `csv` formats, every scenario is
+    written as a record to `stream` (by default standard output) as soon as
+    it is generated. The scenarios of queries are truncated by the limits of
+    `truncation` that the queries do not set themselves.
+    """
+
+    def __init__(self, limit: Optional[int] = None, count_only: bool = False,
+                 format: str = "text", stream: Optional[TextIO] = None,
+                 truncation: Truncation = Truncation()):
+        if format not in SCENARIO_FORMATS:
+            raise ValueError(f"Unknown scenario format {format!r}, expected"
+                             f" one of {', '.join(SCENARIO_FORMATS)}")
+        self.limit = limit
+        self.count_only = count_only
+        self.format = format
+        self.stream = stream
+        self.truncation = truncation
+        self._csv_header_written = False
+
+    def write(self, number: int, scenario: frozenset[str],
+              probability: Optional[Fraction] = None):
+        """Write a scenario of formula `number` as an NDJSON or CSV record,
+        with its probability if it is known."""
+        stream = self.stream or sys.stdout
+        events = sorted(scenario)
+        value = None if probability is None else float(probability)
+        if self.format == "ndjson":
+            record = {"formula": number, "size": len(events),
+                      "scenario": events}
+            if value is not None:
+                record["probability"] = value
+            stream.write(json.dumps(record) + "\n")
+            return
+        writer = csv.writer(stream, lineterminator="\n")
+        if not self._csv_header_written:
+            writer.writerow(["formula", "size", "scenario", "probability"])
+            self._csv_header_written = True
+        writer.writerow([number, len(events), " ".join(events),
+                         "" if value is None else value])
+
+    def flush(self):
+        (self.stream or sys.stdout).flush()
+
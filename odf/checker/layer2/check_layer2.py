@@ -1,10 +1,12 @@
 from fractions import Fraction
+from typing import Optional
 
 from dd import cudd
 from dd.cudd import Function
 from lark import Tree
 from lark.visitors import Interpreter, visit_children_decor
 
+from odf.checker.context import ModelContext
 from odf.checker.exceptions import MissingNodeProbabilityError, \
     MissingConfigurationError
 from odf.checker.layer1.layer1_bdd import Layer1BDDInterpreter
@@ -63,7 +65,7 @@ def calc_node_prob(attack_tree: DisruptionTree,
             if node.var in prob_evidence:
                 node_prob = prob_evidence[node.var]
             else:
-                node_prob = fault_tree.nodes[node.var]["data"].probability
+                node_prob = fault_tree.compact().node(node.var).probability
                 if node_prob is None:
                     raise MissingNodeProbabilityError(node.var, "fault tree")
             p_low = probs[to_key(node.low, complemented)] * (
@@ -74,7 +76,7 @@ def calc_node_prob(attack_tree: DisruptionTree,
             if node.var in prob_evidence:
                 node_prob = prob_evidence[node.var]
             else:
-                node_prob = attack_tree.nodes[node.var]["data"].probability
+                node_prob = attack_tree.compact().node(node.var).probability
                 if node_prob is None:
                     raise MissingNodeProbabilityError(node.var, "attack tree")
             p_low = probs[to_key(node.low, complemented)]
@@ -87,19 +89,25 @@ def calc_node_prob(attack_tree: DisruptionTree,
 
 
 def calc_prob(configuration, evidence, formula_tree, attack_tree, fault_tree,
-              object_graph) -> tuple[set[str], Fraction]:
+              object_graph, context: Optional[ModelContext] = None
+              ) -> tuple[set[str], Fraction]:
+    if context is None:
+        context = ModelContext(attack_tree, fault_tree, object_graph)
     l1_transformer = Layer1BDDInterpreter(
-        attack_tree, fault_tree, object_graph,
-        reordering=False)
+        attack_tree, fault_tree, object_graph, context=context)
+    # The BDD is built with dynamic reordering enabled, and only traversed
+    # with the object properties fixed on top
     bdd = l1_transformer.interpret(formula_tree)
-    needed_vars = l1_transformer.object_properties.intersection(bdd.support)
+    needed_vars = l1_transformer.object_properties.intersection(
+        bdd.support)
     given_vars = set(configuration.keys())
     missing_vars = needed_vars - given_vars
     if len(missing_vars) > 0:
         raise MissingConfigurationError(missing_vars,
                                         type_name="object properties")
-    prob = l2_prob(attack_tree, fault_tree, bdd,
-                   configuration, evidence)
+    with context.properties_on_top():
+        prob = l2_prob(attack_tree, fault_tree, bdd,
+                       configuration, evidence)
     return needed_vars, prob
 
 
@@ -110,7 +118,8 @@ class Layer2Interpreter(Interpreter):
                  attack_tree: DisruptionTree,
                  fault_tree: DisruptionTree,
                  object_graph: ObjectGraph,
-                 prob_evidence: dict[int, dict[str, Fraction]]):
+                 prob_evidence: dict[int, dict[str, Fraction]],
+                 context: Optional[ModelContext] = None):
         super().__init__()
         self.configuration = configuration
         self.attack_tree = attack_tree
@@ -119,6 +128,7 @@ class Layer2Interpreter(Interpreter):
         self.used_object_properties = set()
         # Map formula node IDs to their evidence
         self.prob_evidence_per_formula = prob_evidence
+        self.context = context
 
     def layer2_formula(self, tree):
         self.visit_children(tree)
@@ -139,7 +149,7 @@ class Layer2Interpreter(Interpreter):
 
         needed_vars, prob = calc_prob(
             self.configuration, evidence, formula_tree, self.attack_tree,
-            self.fault_tree, self.object_graph)
+            self.fault_tree, self.object_graph, self.context)
         self.used_object_properties.update(needed_vars)
 
         if evidence:
@@ -192,13 +202,14 @@ class Layer2Interpreter(Interpreter):
 def check_layer2_query(formula: Tree,
                        attack_tree: DisruptionTree,
                        fault_tree: DisruptionTree,
-                       object_graph: ObjectGraph):
+                       object_graph: ObjectGraph,
+                       context: Optional[ModelContext] = None):
     assert formula.data == "layer2_query"
     assert formula.children[0].data == "configuration"
 
     configuration = parse_configuration(formula.children[0])
-    non_object_properties = set(configuration.keys()) - set(
-        object_graph.object_properties)
+    non_object_properties = (configuration.keys() -
+                             object_graph.object_properties)
     if len(non_object_properties) > 0:
         logger.warning(
             f"Configuration variables {non_object_properties} are not object properties and will be ignored.")
@@ -209,10 +220,14 @@ def check_layer2_query(formula: Tree,
     evidence_interpreter = PrePassEvidenceInterpreter()
     evidence_interpreter.visit(formula.children[1])
 
+    if context is None:
+        context = ModelContext(attack_tree, fault_tree, object_graph)
+
     # Create the transformer and pass the collected evidence
     transformer = Layer2Interpreter(configuration, attack_tree, fault_tree,
                                     object_graph,
-                                    evidence_interpreter.evidence_per_formula)
+                                    evidence_interpreter.evidence_per_formula,
+                                    context)
 
     res = transformer.visit(formula.children[1])
 
@@ -1,11 +1,12 @@
 from collections import deque
 from fractions import Fraction
-from typing import Literal, Optional, Callable, Iterable
+from typing import Literal, Optional, Callable, Iterable, AbstractSet
 
 from dd import cudd, cudd_add
 from lark import Tree, Token
 from lark.visitors import Interpreter
 
+from odf.checker.context import ModelContext
 from odf.checker.exceptions import MissingNodeImpactError
 from odf.checker.layer1.layer1_bdd import Layer1BDDInterpreter
 from odf.checker.layer2.check_layer2 import calc_node_prob
@@ -50,7 +51,8 @@ def most_risky(object_name: str,
                evidence: dict[str, bool],
                attack_tree: DisruptionTree,
                fault_tree: DisruptionTree,
-               object_graph: ObjectGraph):
+               object_graph: ObjectGraph,
+               context: Optional[ModelContext] = None):
     the_tree = attack_tree if tree_type == "attack" else fault_tree
 
     participant_nodes = the_tree.participant_nodes(object_name)
@@ -59,7 +61,11 @@ def most_risky(object_name: str,
             f"There are no nodes in the {tree_type} tree that participate in the {object_name} object.")
         return None
 
-    object_properties = set(object_graph.object_properties)
+    if context is None:
+        context = ModelContext(attack_tree, fault_tree, object_graph)
+    manager = context.bdd
+
+    object_properties = object_graph.object_properties
     used_evidence = set()
     max_risk = -1
     max_element = None
@@ -68,8 +74,7 @@ def most_risky(object_name: str,
             raise MissingNodeImpactError(participant_node.name, tree_type)
 
         interpreter = Layer1BDDInterpreter(attack_tree, fault_tree,
-                                           object_graph, reordering=False)
-        manager = interpreter.bdd
+                                           object_graph, context=context)
 
         formula_tree = Tree("node_atom",
                             [Token("NODE_NAME", participant_node.name)])
@@ -92,11 +97,9 @@ def most_risky(object_name: str,
                 f"Evidence {needed_evidence} made node '{participant_node.name}' unsatisfiable.")
             continue
 
-        risk = -1
-        for cr_node, is_compl in find_config_reflection_nodes(bdd,
-                                                              lambda node: node.var in object_properties):
-            p = calc_node_prob(attack_tree, fault_tree, cr_node, is_compl, {})
-            risk = max(risk, p * participant_node.impact)
+        with context.properties_on_top():
+            risk = max_config_risk(attack_tree, fault_tree, object_properties,
+                                   bdd, participant_node.impact)
         logger.info(
             f"Risk for node {participant_node.name}: {risk} (~{format_risk(float(risk))}{COLOR_GRAY})")
 
@@ -111,10 +114,28 @@ def most_risky(object_name: str,
     return max_element
 
 
+def max_config_risk(attack_tree: DisruptionTree,
+                    fault_tree: DisruptionTree,
+                    object_properties: AbstractSet[str],
+                    bdd: cudd.Function,
+                    impact: Fraction) -> Fraction:
+    """Return the highest risk of the BDD over all configurations, or -1 if
+    it has no configuration reflection nodes.
+
+    Expects the object properties to be ordered above the events.
+    """
+    risk = -1
+    for cr_node, is_compl in find_config_reflection_nodes(bdd,
+                                                          lambda node: node.var in object_properties):
+        p = calc_node_prob(attack_tree, fault_tree, cr_node, is_compl, {})
+        risk = max(risk, p * impact)
+    return risk
+
+
 def create_mtbdd(mtbdd_manager: cudd_add.ADD,
                  attack_tree: DisruptionTree,
                  fault_tree: DisruptionTree,
-                 object_properties: set[str],
+                 object_properties: AbstractSet[str],
                  bdd: cudd.Function,
                  impact: Fraction) -> cudd_add.Function:
     """
@@ -230,11 +251,9 @@ def configs_to_risk_mtbdd(
         evidence: dict[str, bool],
         attack_tree: DisruptionTree,
         fault_tree: DisruptionTree,
-        object_graph: ObjectGraph
+        object_graph: ObjectGraph,
+        context: Optional[ModelContext] = None
 ) -> Optional[cudd_add.Function]:
-    mtbdd_manager = cudd_add.ADD()
-    mt_sum = mtbdd_manager.zero
-
     participant_nodes = attack_tree.participant_nodes(object_name).union(
         fault_tree.participant_nodes(object_name))
 
@@ -243,9 +262,14 @@ def configs_to_risk_mtbdd(
             f"There are no nodes in the attack or fault tree that participate in the {object_name} object.")
         return None
 
-    object_properties = set(object_graph.object_properties)
+    if context is None:
+        context = ModelContext(attack_tree, fault_tree, object_graph)
+    manager = context.bdd
+    mtbdd_manager = context.add
+    mt_sum = mtbdd_manager.zero
+
+    object_properties = object_graph.object_properties
     used_evidence = set()
-    mtbdd_manager.declare(*object_properties)
 
     for participant_node in participant_nodes:
         if participant_node.impact is None:
@@ -253,8 +277,7 @@ def configs_to_risk_mtbdd(
                                          "attack or fault")
 
         interpreter = Layer1BDDInterpreter(attack_tree, fault_tree,
-                                           object_graph, reordering=False)
-        manager = interpreter.bdd
+                                           object_graph, context=context)
 
         formula_tree = Tree("node_atom",
                             [Token("NODE_NAME", participant_node.name)])
@@ -277,12 +300,13 @@ def configs_to_risk_mtbdd(
                 f"Evidence {needed_evidence} made node '{participant_node.name}' unsatisfiable.")
             continue
 
-        mtbdd = create_mtbdd(mtbdd_manager,
-                             attack_tree,
-                             fault_tree,
-                             object_properties,
-                             bdd,
-                             participant_node.impact)
+        with context.properties_on_top():
+            mtbdd = create_mtbdd(mtbdd_manager,
+                                 attack_tree,
+                                 fault_tree,
+                                 object_properties,
+                                 bdd,
+                                 participant_node.impact)
         mt_sum = mtbdd_manager.apply('+', mt_sum, mtbdd)
 
     unused_evidence = set(evidence.keys()) - used_evidence
@@ -298,9 +322,10 @@ def total_risk(object_name: str,
                evidence: dict[str, bool],
                attack_tree: DisruptionTree,
                fault_tree: DisruptionTree,
-               object_graph: ObjectGraph) -> Optional[float]:
+               object_graph: ObjectGraph,
+               context: Optional[ModelContext] = None) -> Optional[float]:
     mt_sum = configs_to_risk_mtbdd(object_name, evidence, attack_tree,
-                                   fault_tree, object_graph)
+                                   fault_tree, object_graph, context)
     if mt_sum is None:
         return None
 
@@ -311,9 +336,10 @@ def optimal_conf(object_name: str,
                  evidence: dict[str, bool],
                  attack_tree: DisruptionTree,
                  fault_tree: DisruptionTree,
-                 object_graph: ObjectGraph) -> Optional[tuple[list[dict[str, bool]], float]]:
+                 object_graph: ObjectGraph,
+                 context: Optional[ModelContext] = None) -> Optional[tuple[list[dict[str, bool]], float]]:
     mt_sum = configs_to_risk_mtbdd(object_name, evidence, attack_tree,
-                                   fault_tree, object_graph)
+                                   fault_tree, object_graph, context)
     if mt_sum is None:
         return None
 
@@ -336,12 +362,12 @@ def optimal_conf(object_name: str,
 def check_layer3_query(formula: Tree,
                        attack_tree: DisruptionTree,
                        fault_tree: DisruptionTree,
-                       object_graph: ObjectGraph):
+                       object_graph: ObjectGraph,
+                       context: Optional[ModelContext] = None):
     assert formula.data == "layer3_query"
     evidence_interpreter = CollectEvidenceInterpreter()
     evidence, formula_type, object_name = evidence_interpreter.visit(formula)
-    non_object_properties = set(evidence.keys()) - set(
-        object_graph.object_properties)
+    non_object_properties = evidence.keys() - object_graph.object_properties
     if len(non_object_properties) > 0:
         logger.warning(
             f"Evidence variables {non_object_properties} are not object properties and will be ignored.")
@@ -352,23 +378,23 @@ def check_layer3_query(formula: Tree,
     match formula_type:
         case "most_risky_a":
             result = most_risky(object_name, "attack", evidence, attack_tree,
-                                fault_tree, object_graph)
+                                fault_tree, object_graph, context)
             print(f"  Most Risky Attack Node: {format_node_name(result.name)}")
         case "most_risky_f":
             result = most_risky(object_name, "fault", evidence, attack_tree,
-                                fault_tree, object_graph)
+                                fault_tree, object_graph, context)
             print(f"  Most Risky Fault Node: {format_node_name(result.name)}")
         case "max_total_risk":
             result = total_risk(object_name, max, evidence, attack_tree,
-                                fault_tree, object_graph)
+                                fault_tree, object_graph, context)
             print(f"  Maximum Total Risk: {format_risk(result)}")
         case "min_total_risk":
             result = total_risk(object_name, min, evidence, attack_tree,
-                                fault_tree, object_graph)
+                                fault_tree, object_graph, context)
             print(f"  Minimum Total Risk: {format_risk(result)}")
         case "optimal_conf":
             result = optimal_conf(object_name, evidence, attack_tree,
-                                  fault_tree, object_graph)[0]
+                                  fault_tree, object_graph, context)[0]
             print("  Optimal Configurations:")
             for config in result:
                 print(f"    - {format_config(config)}")
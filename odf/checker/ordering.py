@@ -0,0 +1,153 @@
+"""Static variable orders for the BDDs of a model.
+
+The size of a BDD depends heavily on the order of its variables, and a good
+static order keeps dynamic reordering from having to do all the work. Every
+heuristic here returns the object properties and the attack and fault tree
+nodes as two separate blocks: layers 2 and 3 require all object properties to
+be above all events, so only the order within each block is chosen.
+
+The heuristics are deterministic: they only depend on the order in which the
+nodes, edges and properties of the models are defined.
+
+* `declaration`: properties and nodes in order of definition.
+* `dfs`: nodes in depth-first order from the top of each tree, so that the
+  leaves of every subtree are next to each other.
+* `fanin`: the weighted fan-in heuristic. Every gate divides its weight
+  evenly among its children (the top node has weight 1, and shared nodes add
+  up the weights of all their parents) and the depth-first traversal visits
+  the heaviest children first.
+* `interleave`: nodes as in `dfs`, with the properties in the order in which
+  the conditions of these nodes first use them, so that the properties that
+  guard an event are as close to it as the property block allows.
+"""
+from typing import Callable, Optional
+
+from odf.models.disruption_tree import DisruptionTree
+from odf.models.object_graph import ObjectGraph
+
+# The object properties and the events, both from top to bottom
+VariableOrder = tuple[list[str], list[str]]
+
+DEFAULT_ORDERING = "dfs"
+
+
+def _depth_first(tree: DisruptionTree,
+                 weights: Optional[list[float]] = None) -> list[str]:
+    """Return the nodes of a tree in depth-first preorder from its top node,
+    visiting the children of a gate in order of definition or, if weights
+    are given, in order of decreasing weight."""
+    compact = tree.compact()
+    roots = [i for i in range(len(compact)) if not compact.parents_of(i)]
+    seen = set()
+    order = []
+    stack = roots[::-1]
+    while stack:
+        i = stack.pop()
+        if i in seen:
+            continue
+        seen.add(i)
+        order.append(compact.names[i])
+        children = [child for child in compact.children_of(i)
+                    if child not in seen]
+        if weights is not None:
+            # Stable, so equally heavy children keep their definition order
+            children.sort(key=lambda child: -weights[child])
+        stack.extend(reversed(children))
+    return order
+
+
+def _fan_in_weights(tree: DisruptionTree) -> list[float]:
+    """Return the weight of every node of a tree, by compact id."""
+    compact = tree.compact()
+    weights = [0.0] * len(compact)
+    # Compact ids are topologically ordered, so every node has received the
+    # weights of all its parents before it divides its own
+    for i in range(len(compact)):
+        if not compact.parents_of(i):
+            weights[i] = 1.0
+        children = compact.children_of(i)
+        for child in children:
+            weights[child] += weights[i] / len(children)
+    return weights
+
+
+def _events(attack_tree: DisruptionTree, fault_tree: DisruptionTree,
+            order_tree: Callable[[DisruptionTree], list[str]]) -> list[str]:
+    return [*order_tree(fault_tree), *order_tree(attack_tree)]
+
+
+def declaration_order(attack_tree: DisruptionTree,
+                      fault_tree: DisruptionTree,
+                      object_graph: ObjectGraph) -> VariableOrder:
+    return (list(object_graph.object_properties),
+            [*fault_tree.nodes, *attack_tree.nodes])
+
+
+def dfs_order(attack_tree: DisruptionTree, fault_tree: DisruptionTree,
+              object_graph: ObjectGraph) -> VariableOrder:
+    return (list(object_graph.object_properties),
+            _events(attack_tree, fault_tree, _depth_first))
+
+
+def fan_in_order(attack_tree: DisruptionTree, fault_tree: DisruptionTree,
+                 object_graph: ObjectGraph) -> VariableOrder:
+    return (list(object_graph.object_properties),
+            _events(attack_tree, fault_tree,
+                    lambda tree: _depth_first(tree, _fan_in_weights(tree))))
+
+
+def interleave_order(attack_tree: DisruptionTree,
+                     fault_tree: DisruptionTree,
+                     object_graph: ObjectGraph) -> VariableOrder:
+    events = _events(attack_tree, fault_tree, _depth_first)
+    definition = {prop: i for i, prop in
+                  enumerate(object_graph.object_properties)}
+    # Dicts keep their insertion order, which is the order of first use
+    properties = {}
+    for name in events:
+        tree = fault_tree if name in fault_tree else attack_tree
+        used = tree.nodes[name]["data"].object_properties
+        for prop in sorted(used & definition.keys(),
+                           key=definition.__getitem__):
+            properties.setdefault(prop, None)
+    # Properties that no condition uses keep their order of definition below
+    for prop in definition:
+        properties.setdefault(prop, None)
+    return list(properties), events
+
+
+ORDERINGS: dict[str, Callable[[DisruptionTree, DisruptionTree, ObjectGraph],
+                              VariableOrder]] = {
+    "declaration": declaration_order,
+    "dfs": dfs_order,
+    "fanin": fan_in_order,
+    "interleave": interleave_order,
+}
+
+
+def variable_order(attack_tree: DisruptionTree, fault_tree: DisruptionTree,
+                   object_graph: ObjectGraph,
+                   ordering: str = DEFAULT_ORDERING) -> VariableOrder:
+    """Return the object properties and the events of the models in the
+    order of the given heuristic (one of `ORDERINGS`)."""
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Unknown variable ordering {ordering!r}, expected"
+                         f" one of {', '.join(ORDERINGS)}")
+    return ORDERINGS[ordering](attack_tree, fault_tree, object_graph)
+
+
+def adopt_order(order: list[str], heuristic: VariableOrder) -> VariableOrder:
+    """Split a saved order of the variables into the property and the event
+    block, keeping the relative order within each block.
+
+    If the saved order does not consist of exactly the variables of the
+    heuristic order (e.g. because it was saved for other models), the
+    heuristic order is returned instead.
+    """
+    properties, events = heuristic
+    if len(order) != len(properties) + len(events) or \
+            set(order) != {*properties, *events}:
+        return heuristic
+    property_set = set(properties)
+    return ([var for var in order if var in property_set],
+            [var for var in order if var not in property_set])
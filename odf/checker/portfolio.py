@@ -0,0 +1,134 @@
+"""Search for a good variable order by racing candidate orders.
+
+Which static order keeps the BDD of a formula small is hard to predict. When
+a formula does not fit in the node budget of a portfolio, the formula is
+built under every candidate order (the current order of the manager and the
+orders of all heuristics of `odf.checker.ordering`) in parallel worker
+processes, each with its own CUDD manager, dynamic reordering disabled and
+the same node budget. The winning order is adopted by the shared manager for
+the rest of the run.
+"""
+import multiprocessing
+import queue
+from typing import Optional, TYPE_CHECKING
+
+from lark import Tree
+
+from odf.checker.exceptions import NodeBudgetExceededError
+from odf.checker.ordering import ORDERINGS
+from odf.loaders.model_cache import Models
+from odf.utils.logger import logger
+
+if TYPE_CHECKING:
+    from odf.checker.context import ModelContext
+
+DEFAULT_NODE_BUDGET = 1_000_000
+
+# How the winner of a race is chosen: the first candidate that finishes
+# within the budget, or the candidate with the smallest BDD
+PICKS = ("first", "smallest")
+
+
+def build_size(models: Models, evidence: dict[str, bool], formula: Tree,
+               order: list[str], node_budget: int) -> Optional[int]:
+    """Build the BDD of a layer 1 formula in a new manager with a fixed
+    variable order, and return its size, or None if it takes more nodes than
+    the budget allows. Runs in the worker processes."""
+    # Imported here, so that portfolios can be set up without loading CUDD
+    from odf.checker.context import ModelContext
+    from odf.checker.layer1.layer1_bdd import Layer1BDDInterpreter
+
+    context = ModelContext(*models, initial_order=order)
+    interpreter = Layer1BDDInterpreter(*models, dict(evidence),
+                                       reordering=False, context=context,
+                                       node_budget=node_budget)
+    try:
+        return len(interpreter.interpret(formula))
+    except NodeBudgetExceededError:
+        return None
+
+
+class Portfolio:
+    """Settings of the order search, which runs at most once per model
+    context: for the first formula with an intermediate BDD of more than
+    `node_budget` nodes in the shared manager."""
+
+    def __init__(self, workers: int, node_budget: int = DEFAULT_NODE_BUDGET,
+                 pick: str = "first"):
+        if pick not in PICKS:
+            raise ValueError(f"Unknown pick {pick!r}, expected one of"
+                             f" {', '.join(PICKS)}")
+        self.workers = workers
+        self.node_budget = node_budget
+        self.pick = pick
+
+    def candidates(self, context: "ModelContext") -> dict[str, list[str]]:
+        """Return the candidate orders by name, starting with the current
+        order of the manager."""
+        candidates = {"current": context.current_order()}
+        for name, heuristic in ORDERINGS.items():
+            properties, events = heuristic(context.attack_tree,
+                                           context.fault_tree,
+                                           context.object_graph)
+            order = [*properties, *events]
+            if order not in candidates.values():
+                candidates[name] = order
+        return candidates
+
+    def race(self, context: "ModelContext", evidence: dict[str, bool],
+             formula: Tree) -> Optional[str]:
+        """Build the formula under all candidate orders in parallel and adopt
+        the winning order in the manager of the context.
+
+        Returns the name of the winning candidate, or None if no candidate
+        fits in the budget (the order is then left unchanged).
+        """
+        context.order_searched = True
+        candidates = self.candidates(context)
+        models = (context.attack_tree, context.fault_tree,
+                  context.object_graph)
+        # The callbacks run in a thread of the pool, which reports the results
+        # of the workers as they finish
+        results: queue.SimpleQueue = queue.SimpleQueue()
+
+        def report(name: str):
+            return lambda size: results.put((name, size))
+
+        def fail(name: str):
+            return lambda error: results.put((name, None))
+
+        sizes: dict[str, int] = {}
+        with multiprocessing.Pool(min(self.workers, len(candidates))) as pool:
+            for name, order in candidates.items():
+                pool.apply_async(build_size, (models, evidence, formula,
+                                              order, self.node_budget),
+                                 callback=report(name),
+                                 error_callback=fail(name))
+            for _ in candidates:
+                name, size = results.get()
+                if size is None:
+                    continue
+                sizes[name] = size
+                if self.pick == "first":
+                    break
+            # Leaving the block terminates the workers that are still busy
+
+        if not sizes:
+            logger.info("No variable order fits in the node budget of"
+                        f" {self.node_budget}")
+            return None
+        winner = min(sizes, key=sizes.__getitem__)
+        logger.info(f"Adopting the {winner} variable order (BDD of"
+                    f" {sizes[winner]} nodes)")
+        apply_order(context, candidates[winner])
+        return winner
+
+
+def apply_order(context: "ModelContext", order: list[str]):
+    """Reorder the manager of a context to the given order of its object
+    properties and events, keeping any other variables that were declared in
+    the manager below them in their current order."""
+    levels = context.bdd.var_levels
+    rest = sorted(levels.keys() - set(order), key=levels.__getitem__)
+    context.bdd.reorder({var: level for level, var in
+                         enumerate([*order, *rest])})
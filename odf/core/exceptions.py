@@ -1,3 +1,25 @@
+from typing import Callable, Sequence
+
+
 class ODFError(Exception):
     """Base class for all exceptions in this project."""
     pass
+
+
+class ODFErrorGroup(ODFError):
+    """Base class for errors that report several problems at once."""
+
+    def __init__(self, errors: Sequence[ODFError]):
+        self.errors = list(errors)
+        super().__init__(f"Found {len(self.errors)} problems:\n" + "\n".join(
+            f"  - {error}" for error in self.errors))
+
+
+def raise_collected(errors: Sequence[ODFError],
+                    group: Callable[[Sequence[ODFError]], ODFError]):
+    """Raise the collected errors, if any: a single error as it is, and
+    several errors together as the given group."""
+    if len(errors) == 1:
+        raise errors[0]
+    if errors:
+        raise group(errors)
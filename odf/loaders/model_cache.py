@@ -0,0 +1,123 @@
+import hashlib
+import os
+import pickle
+from functools import cache
+from pathlib import Path
+from typing import Optional
+
+import lark
+import networkx
+
+from odf.models import disruption_tree, object_graph, tree_graph
+from odf.models.disruption_tree import DisruptionTree
+from odf.models.object_graph import ObjectGraph
+from odf.parser.parser import grammar_digest, user_cache_dir
+from odf.parser.sections import split_sections, is_blank
+from odf.utils.logger import logger
+
+# Bump when the pickled model classes change in an incompatible way
+CACHE_VERSION = 3
+
+# The modules that define the pickled model classes
+MODEL_MODULES = [disruption_tree, object_graph, tree_graph]
+
+MODEL_SECTIONS = ["attack_tree", "fault_tree", "object_graph"]
+
+Models = tuple[DisruptionTree, DisruptionTree, ObjectGraph]
+
+
+def cache_file_for(source: Path) -> Optional[Path]:
+    """Return the file in which the models of an ODF file are cached.
+
+    The file lives in the user's cache directory and is named after the hash of
+    the resolved path of the ODF file, so a cache file placed next to an ODF
+    file by someone else is never unpickled. Returns None if the cache
+    directory cannot be created.
+    """
+    cache_dir = user_cache_dir()
+    if cache_dir is None:
+        return None
+    try:
+        cache_dir = cache_dir / "models"
+        cache_dir.mkdir(mode=0o700, exist_ok=True)
+        digest = hashlib.sha256(str(source.resolve()).encode()).hexdigest()
+    except (OSError, RuntimeError):
+        return None
+    return cache_dir / f"{digest[:32]}.odfc"
+
+
+@cache
+def layout_digest() -> str:
+    """Return the sha256 hex digest of the sources of the model classes and
+    the versions of the libraries whose objects are pickled with them.
+
+    Any change to the model classes changes the cache key, so a cache file
+    whose layout no longer matches the classes is never loaded, even if
+    `CACHE_VERSION` is not bumped.
+    """
+    digest = hashlib.sha256(f"{lark.__version__}\n{networkx.__version__}\n"
+                            .encode())
+    for module in MODEL_MODULES:
+        digest.update(b"\0" + Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def model_key(text: str) -> Optional[str]:
+    """Return the cache key of the models defined in the text of an ODF file.
+
+    The key is a hash of the three model sections (in canonical order), the
+    grammar, the model classes and the cache version, so editing the formulas
+    does not change it. Returns None if the models cannot be cached, i.e. if
+    there is anything but comments before the first section or a model
+    section is missing or duplicated. Parsing the full file reports those errors.
+    """
+    preamble, sections = split_sections(text)
+    if not is_blank(preamble):
+        return None
+
+    digest = hashlib.sha256(f"{CACHE_VERSION}\n{grammar_digest()}\n"
+                            f"{layout_digest()}\n".encode())
+    for name in MODEL_SECTIONS:
+        matches = [section for section in sections if section.name == name]
+        if len(matches) != 1:
+            return None
+        digest.update(b"\0" + text[matches[0].start:matches[0].end].encode())
+    return digest.hexdigest()
+
+
+def load_models(cache_file: Path, key: str) -> Optional[Models]:
+    """Load the cached models, or return None if the cache file does not
+    exist, is unreadable or belongs to other models.
+
+    The cache file is a pickle and must only be loaded from trusted locations,
+    like the user's cache directory (see `cache_file_for`).
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, models = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            ImportError, ValueError, TypeError) as e:
+        logger.debug(f"Not using model cache {cache_file}: {e}")
+        return None
+    if cached_key != key:
+        logger.debug(f"Not using model cache {cache_file}: stale")
+        return None
+    return models
+
+
+def save_models(cache_file: Path, key: str, models: Models):
+    """Cache validated models together with their indexes.
+
+    The file is replaced atomically. Failing to write it is not an error, the
+    models are then simply parsed again next time.
+    """
+    for model in models:
+        model.build_indexes()
+
+    tmp_file = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump((key, models), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except (OSError, pickle.PicklingError, RecursionError):
+        tmp_file.unlink(missing_ok=True)
@@ -0,0 +1,253 @@
+"""A fast loader for the model sections of an ODF file.
+
+The attack tree, fault tree and object graph sections consist of simple
+statements, which are scanned here with regular expressions and fed straight
+into the model builders, without building a parse tree first. Lark is only
+used for the conditions of nodes and for the formulas section.
+
+The scanner only accepts a subset of the syntax that the grammar accepts (for
+example, it requires whitespace between a node name and its gate). Whenever
+it does not accept a section, `load_models_fast` returns None and the caller
+falls back to the full Lark parser, which then also reports any syntax errors.
+"""
+import re
+from fractions import Fraction
+from typing import Optional, Union, Any
+
+from lark import Tree
+from lark.exceptions import LarkError, VisitError
+
+from odf.core.exceptions import ODFError
+from odf.loaders.model_cache import Models
+from odf.models.builders import DisruptionTreeBuilder, ObjectGraphBuilder
+from odf.parser.parser import parse
+from odf.parser.sections import SECTIONS, Section
+from odf.transformers.exceptions import MyVisitError
+
+# Whitespace as ignored by the grammar (common.WS)
+_WS = r"[ \t\f\r\n]"
+_NAME = r"[a-zA-Z_][a-zA-Z0-9_]*"
+_NAME_LIST = rf"{_NAME}(?:{_WS}*,{_WS}*{_NAME})*"
+
+_COMMENT = re.compile(r"//[^\n]*")
+_BLANK = re.compile(rf"{_WS}*\Z")
+_TOPLEVEL = re.compile(rf"{_WS}*(?i:toplevel){_WS}+({_NAME}){_WS}*\Z")
+_NAME_START = re.compile(rf"{_WS}*({_NAME})")
+_GATE = re.compile(
+    rf"{_WS}+(?i:(and|or)){_WS}+({_NAME}(?:{_WS}+{_NAME})*){_WS}*\Z")
+_HAS = re.compile(rf"{_WS}+(?i:has){_WS}+({_NAME}(?:{_WS}+{_NAME})*){_WS}*\Z")
+_PROPERTIES = re.compile(
+    rf"{_WS}*(?i:properties){_WS}*={_WS}*\[{_WS}*({_NAME_LIST})?{_WS}*]"
+    rf"{_WS}*\Z")
+_ATTRIBUTE = re.compile(
+    rf"{_WS}*(?:"
+    rf"(?i:(prob|impact)){_WS}*={_WS}*([0-9]+\.[0-9]*|\.[0-9]+|[0-9]+)|"
+    rf"(?i:objects){_WS}*={_WS}*\[{_WS}*({_NAME_LIST})?{_WS}*]|"
+    rf"(?i:cond){_WS}*={_WS}*(\())")
+_PARENS = re.compile(r"[()]")
+_SEPARATORS = re.compile(rf"{_WS}*,{_WS}*|{_WS}+")
+
+_ATTRIBUTE_KEYS = {"prob": "probability", "impact": "impact"}
+
+# A statement of a disruption tree: the name of a node with either its gate
+# and children, or its attributes as (key, value) pairs in order of occurrence
+DTStatement = tuple[str, Union[tuple[str, list[str]], list[tuple[str, Any]]]]
+# A statement of an object graph: the name of an object with either its
+# children, or its properties (None if they are omitted)
+OGStatement = tuple[str, Union[list[str], tuple[list[str]], None]]
+
+
+class _Unsupported(Exception):
+    """Raised when a section contains syntax that is not accepted by the
+    scanner."""
+
+
+def _statements(text: str) -> list[str]:
+    """Split the body of a section into its statements.
+
+    Comments cannot contain anything but whitespace in front of them in a
+    valid statement, so they are simply removed first.
+    """
+    *statements, rest = _COMMENT.sub("", text).split(";")
+    if not _BLANK.match(rest):
+        raise _Unsupported
+    return statements
+
+
+def _names(text: Optional[str]) -> list[str]:
+    return _SEPARATORS.split(text) if text else []
+
+
+def _scan_condition(statement: str, pos: int) -> tuple[str, int]:
+    """Return the text of the condition starting at `pos` (just after its
+    opening parenthesis) and the position after its closing parenthesis."""
+    depth = 1
+    for match in _PARENS.finditer(statement, pos):
+        depth += 1 if match.group() == "(" else -1
+        if depth == 0:
+            return statement[pos:match.start()], match.end()
+    raise _Unsupported
+
+
+def _scan_attributes(statement: str, pos: int) -> list[tuple[str, Any]]:
+    attributes = []
+    while not _BLANK.match(statement, pos):
+        match = _ATTRIBUTE.match(statement, pos)
+        if match is None:
+            raise _Unsupported
+        key, value, objects, condition = match.groups()
+        if key is not None:
+            attributes.append((_ATTRIBUTE_KEYS[key.lower()], value))
+            pos = match.end()
+        elif condition is None:
+            attributes.append(("objects", _names(objects)))
+            pos = match.end()
+        else:
+            # Conditions may be nested arbitrarily deep, so they are scanned
+            # separately from their opening parenthesis onwards
+            text, pos = _scan_condition(statement, match.end())
+            attributes.append(("condition_tree", text))
+    return attributes
+
+
+def scan_disruption_tree(text: str) -> tuple[str, list[DTStatement]]:
+    """Scan the body of an attack tree or fault tree section, returning the
+    name of the top-level node and the other statements."""
+    toplevel, *statements = _statements(text) or [""]
+    match = _TOPLEVEL.match(toplevel)
+    if match is None:
+        raise _Unsupported
+    scanned = []
+    for statement in statements:
+        start = _NAME_START.match(statement)
+        if start is None:
+            raise _Unsupported
+        gate = _GATE.match(statement, start.end())
+        if gate is not None:
+            scanned.append((start.group(1), (gate.group(1).lower(),
+                                             _names(gate.group(2)))))
+        else:
+            scanned.append((start.group(1),
+                            _scan_attributes(statement, start.end())))
+    return match.group(1), scanned
+
+
+def scan_object_graph(text: str) -> list[OGStatement]:
+    """Scan the body of an object graph section."""
+    scanned = []
+    for statement in _statements(text):
+        start = _NAME_START.match(statement)
+        if start is None:
+            raise _Unsupported
+        if _BLANK.match(statement, start.end()):
+            scanned.append((start.group(1), None))
+        elif match := _HAS.match(statement, start.end()):
+            scanned.append((start.group(1), _names(match.group(1))))
+        elif match := _PROPERTIES.match(statement, start.end()):
+            scanned.append((start.group(1), (_names(match.group(1)),)))
+        else:
+            raise _Unsupported
+    return scanned
+
+
+def _body(text: str, section: Section) -> str:
+    return text[section.start + len(SECTIONS[section.name]):section.end]
+
+
+def _parse_conditions(scanned: list[tuple[str, list[DTStatement]]]) -> \
+        dict[str, Tree]:
+    """Parse all distinct conditions of the scanned disruption trees."""
+    conditions = {}
+    for _, statements in scanned:
+        for _, body in statements:
+            if isinstance(body, tuple):
+                continue
+            for key, value in body:
+                if key == "condition_tree" and value not in conditions:
+                    try:
+                        conditions[value] = parse(value, "boolean_formula")
+                    except LarkError:
+                        raise _Unsupported
+    return conditions
+
+
+def _build(rule: str, method, *args):
+    """Call a method of a model builder, wrapping errors like the transformers
+    would for the given rule."""
+    try:
+        return method(*args)
+    except Exception as e:
+        raise VisitError(rule, None, e)
+
+
+def build_object_graph(statements: list[OGStatement]):
+    builder = ObjectGraphBuilder()
+    for name, body in statements:
+        if isinstance(body, list):
+            _build("intermediate_object", builder.intermediate_object,
+                   name, body)
+        else:
+            attrs = {"properties": body[0]} if body is not None else {}
+            _build("basic_object", builder.basic_object, name, attrs)
+    return _build("object_graph_tree", builder.build)
+
+
+def build_disruption_tree(toplevel: str, statements: list[DTStatement],
+                          conditions: dict[str, Tree], object_graph):
+    builder = DisruptionTreeBuilder(object_graph)
+    builder.toplevel(toplevel)
+    for name, body in statements:
+        if isinstance(body, tuple):
+            gate_type, children = body
+            _build("intermediate_node", builder.intermediate_node,
+                   name, gate_type, children)
+            continue
+        attributes = []
+        for key, value in body:
+            if key == "objects":
+                value = _build("objects", builder.participants,
+                               value)
+            elif key == "condition_tree":
+                value = conditions[value]
+            else:
+                value = Fraction(value)
+            attributes.append((key, value))
+        attrs = _build("attribute_list", builder.attributes,
+                       attributes) if attributes else {}
+        _build("basic_node", builder.basic_node, name, attrs)
+    return _build("disruption_tree", builder.build, False)
+
+
+def load_models_fast(text: str, attack_section: Section,
+                     fault_section: Section,
+                     object_section: Section) -> Optional[Models]:
+    """Build the models defined in the given sections of an ODF file, without
+    validating the structure of the trees and the references between them.
+
+    Returns None if any of the sections is not accepted by the scanner.
+    Errors in the models are raised as `MyVisitError`, exactly like
+    `odf.loaders.odf_file.transform_models` raises them.
+    """
+    try:
+        object_statements = scan_object_graph(_body(text, object_section))
+        trees = [scan_disruption_tree(_body(text, section))
+                 for section in (attack_section, fault_section)]
+        conditions = _parse_conditions(trees)
+    except _Unsupported:
+        return None
+
+    try:
+        object_graph = build_object_graph(object_statements)
+    except VisitError as e:
+        if not isinstance(e.orig_exc, ODFError): raise
+        raise MyVisitError(e, "object graph")
+    models = []
+    for part, (toplevel, statements) in zip(("attack tree", "fault tree"),
+                                            trees):
+        try:
+            models.append(build_disruption_tree(toplevel, statements,
+                                                conditions, object_graph))
+        except VisitError as e:
+            if not isinstance(e.orig_exc, ODFError): raise
+            raise MyVisitError(e, part)
+    return models[0], models[1], object_graph
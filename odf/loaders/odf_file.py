@@ -0,0 +1,140 @@
+from pathlib import Path
+from typing import Optional
+
+from lark import Tree
+from lark.exceptions import VisitError, LarkError
+
+from odf.core.exceptions import ODFError
+from odf.loaders.model_cache import Models, model_key, load_models, \
+    save_models
+from odf.loaders.model_sections import load_models_fast
+from odf.models.validation import validate_models
+from odf.parser.parser import parse
+from odf.parser.sections import SECTIONS, split_sections, parse_section, \
+    find_section, is_blank
+from odf.transformers.disruption_tree import DisruptionTreeTransformer
+from odf.transformers.exceptions import MyVisitError, MissingSectionError, \
+    DuplicateSectionError
+from odf.transformers.object_graph import ObjectGraphTransformer
+
+
+def extract_parse_trees(parse_tree: Tree, with_formulas=True):
+    """Return the parse trees of the attack tree, fault tree, object graph and
+    formulas sections, in that order.
+
+    The grammar accepts the sections in any order and number, every section
+    must occur exactly once. If `with_formulas` is false, the formulas section
+    may be omitted, and None is returned in its place.
+    """
+    assert parse_tree.data == "start"
+
+    sections: dict[str, Tree] = {}
+    for child in parse_tree.children:
+        if child.data in sections:
+            raise DuplicateSectionError(SECTIONS[child.data])
+        sections[child.data] = child
+
+    for section, header in SECTIONS.items():
+        if section not in sections and (with_formulas or section != "doglog"):
+            raise MissingSectionError(header)
+
+    return [sections.get(section) for section in SECTIONS]
+
+
+def load_str(odl_text, cache_file: Optional[Path] = None,
+             with_formulas=True) -> tuple[Models, Optional[Tree]]:
+    """Build and validate the models defined in the text of an ODF file.
+
+    Returns the models and the parse tree of the formulas section (None if
+    `with_formulas` is false). If a cache file is given, the validated models
+    are loaded from it when the model sections of the text are unchanged, and
+    only the formulas section is parsed. Otherwise the models are built and
+    written to it.
+    """
+    key = model_key(odl_text) if cache_file is not None else None
+    models = load_models(cache_file, key) if key is not None else None
+    if models is not None:
+        formulas_parse_tree = None
+        if with_formulas:
+            _, sections = split_sections(odl_text)
+            formulas_parse_tree = parse_section(
+                odl_text, find_section(sections, "doglog"))
+        return models, formulas_parse_tree
+
+    loaded = load_sections(odl_text, with_formulas)
+    if loaded is not None:
+        models, formulas_parse_tree = loaded
+    else:
+        parse_tree = parse(odl_text)
+        [attack_parse_tree, fault_parse_tree,
+         object_parse_tree, formulas_parse_tree] = extract_parse_trees(
+            parse_tree, with_formulas)
+        models = transform_models(attack_parse_tree, fault_parse_tree,
+                                  object_parse_tree)
+    validate_models(*models, structure=True)
+    if key is not None:
+        save_models(cache_file, key, models)
+    return models, formulas_parse_tree if with_formulas else None
+
+
+def load_sections(odl_text, with_formulas=True) -> \
+        Optional[tuple[Models, Optional[Tree]]]:
+    """Build the models with the fast loader of `odf.loaders.model_sections`,
+    and parse the formulas section (if there is one) with Lark.
+
+    Returns None if the text should be loaded by parsing it as a whole
+    instead, which is the case whenever it contains anything that the fast
+    loader does not accept, including syntax errors. The models are not
+    validated yet.
+    """
+    preamble, sections = split_sections(odl_text)
+    if not is_blank(preamble):
+        return None
+    try:
+        attack_section, fault_section, object_section = (
+            find_section(sections, name)
+            for name in ("attack_tree", "fault_tree", "object_graph"))
+        formulas_section = find_section(sections, "doglog") if (
+                with_formulas or any(section.name == "doglog"
+                                     for section in sections)) else None
+    except (MissingSectionError, DuplicateSectionError):
+        return None
+
+    # Syntax errors are reported before any errors in the models
+    formulas_parse_tree = None
+    if formulas_section is not None:
+        try:
+            formulas_parse_tree = parse_section(odl_text, formulas_section)
+        except LarkError:
+            return None
+
+    models = load_models_fast(odl_text, attack_section, fault_section,
+                              object_section)
+    if models is None:
+        return None
+    return models, formulas_parse_tree
+
+
+def transform_models(attack_parse_tree: Tree, fault_parse_tree: Tree,
+                     object_parse_tree: Tree) -> Models:
+    """Build the models from their parse trees. The structure of the trees
+    and the references between the models are validated afterwards by
+    `validate_models`, which reports their problems together."""
+    try:
+        object_graph = ObjectGraphTransformer().transform(object_parse_tree)
+    except VisitError as e:
+        if not isinstance(e.orig_exc, ODFError): raise
+        raise MyVisitError(e, "object graph")
+    try:
+        attack_tree = DisruptionTreeTransformer(
+            object_graph, validate=False).transform(attack_parse_tree)
+    except VisitError as e:
+        if not isinstance(e.orig_exc, ODFError): raise
+        raise MyVisitError(e, "attack tree")
+    try:
+        fault_tree = DisruptionTreeTransformer(
+            object_graph, validate=False).transform(fault_parse_tree)
+    except VisitError as e:
+        if not isinstance(e.orig_exc, ODFError): raise
+        raise MyVisitError(e, "fault tree")
+    return attack_tree, fault_tree, object_graph
@@ -0,0 +1,87 @@
+"""Variable orders of models, saved so that later runs can start from them.
+
+Dynamic reordering spends most of its time on the first formulas of a run,
+moving variables away from the initial static order. The order that it ends
+with is saved in a JSON file that maps the key of the models to their
+variables from top to bottom, and is used as the initial order the next time
+the same models are checked. One file can hold the orders of many models.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, NamedTuple
+
+from odf.loaders.model_cache import Models
+
+# Bump when the meaning of saved orders changes
+ORDER_VERSION = 1
+
+
+def order_file_for(source: Path) -> Path:
+    """Return the file next to a model file in which its variable order is
+    saved."""
+    return source.with_suffix(".odfo")
+
+
+def models_key(models: Models) -> str:
+    """Return the key of the models under which their order is saved.
+
+    The key is a hash of the nodes and edges of the trees and the object
+    graph, and of the object properties, in order of definition, so it does
+    not depend on the format the models were loaded from.
+    """
+    digest = hashlib.sha256(f"{ORDER_VERSION}\n".encode())
+    for graph in models:
+        digest.update(b"\0" + "\n".join(graph.nodes).encode())
+        digest.update(b"\0" + "\n".join(
+            f"{parent} {child}" for parent, child in graph.edges).encode())
+    digest.update(b"\0" + "\n".join(models[2].object_properties).encode())
+    return digest.hexdigest()
+
+
+def _read_orders(order_file: Path) -> dict[str, list[str]]:
+    try:
+        with open(order_file) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != ORDER_VERSION:
+        return {}
+    orders = data.get("orders")
+    return orders if isinstance(orders, dict) else {}
+
+
+def load_order(order_file: Path, key: str) -> Optional[list[str]]:
+    """Load the saved order of the models with the given key, or return None
+    if the file does not exist, is invalid or has no order for them."""
+    order = _read_orders(order_file).get(key)
+    if not isinstance(order, list) or not all(
+            isinstance(var, str) for var in order):
+        return None
+    return order
+
+
+def save_order(order_file: Path, key: str, order: list[str]):
+    """Save the order of the models with the given key, keeping the orders of
+    other models in the file.
+
+    The file is replaced atomically. Raises OSError if it cannot be written.
+    """
+    orders = _read_orders(order_file)
+    orders[key] = order
+    tmp_file = order_file.with_name(f".{order_file.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, "w") as f:
+            json.dump({"version": ORDER_VERSION, "orders": orders}, f)
+        os.replace(tmp_file, order_file)
+    except OSError:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+
+class OrderFiles(NamedTuple):
+    """The files from which the order of the models is loaded and to which
+    it is saved after checking their formulas (None for neither)."""
+    load_from: Optional[Path] = None
+    save_to: Optional[Path] = None
@@ -0,0 +1,224 @@
+"""Import models from structured data instead of the text of an ODF file.
+
+The models are described by records, one per node, with the following keys
+(all but `name` are optional):
+
+* `name`: the name of the node or object.
+* `gate`: `and` or `or`, for intermediate nodes of disruption trees.
+* `children`: the children of an intermediate node, or the parts of an
+  intermediate object.
+* `prob`, `impact`, `objects` and `cond`: the attributes of a basic node,
+  where `cond` is a boolean formula over object properties, e.g. `p && !q`.
+* `properties`: the properties of a basic object.
+
+A record corresponds to the statements of the ODF language that define the
+same node, and the first record of each disruption tree is its top-level node.
+
+In JSON, the records are grouped into a list per model::
+
+    {"attack_tree": [{"name": "A", "gate": "or", "children": ["A1", "A2"]},
+                     {"name": "A1", "prob": 0.5, "objects": ["C"]}, ...],
+     "fault_tree": [...],
+     "object_graph": [{"name": "C", "properties": ["p"]}, ...]}
+
+In CSV, every row is a record with an additional `model` column that names
+its model, lists are separated by whitespace and empty cells are omitted.
+"""
+import csv
+import json
+from fractions import Fraction
+from typing import Any, Iterable, Mapping, TextIO, Union
+
+from lark import Tree
+from lark.exceptions import UnexpectedInput
+
+from odf.core.exceptions import ODFError
+from odf.loaders.model_cache import Models
+from odf.models.validation import validate_models
+from odf.models.builders import DisruptionTreeBuilder, ObjectGraphBuilder
+from odf.models.disruption_tree import DisruptionTree
+from odf.models.exceptions import ModelDataError
+from odf.models.object_graph import ObjectGraph
+from odf.parser.parser import parse
+
+# Maps the models to their names in error messages
+MODELS = {"attack_tree": "attack tree", "fault_tree": "fault tree",
+          "object_graph": "object graph"}
+# Maps the attribute keys of records to the keys of node attributes
+NODE_ATTRIBUTES = {"prob": "probability", "impact": "impact",
+                   "objects": "objects", "cond": "condition_tree"}
+NODE_KEYS = {"name", "gate", "children", *NODE_ATTRIBUTES}
+OBJECT_KEYS = {"name", "children", "properties"}
+
+Record = Mapping[str, Any]
+
+
+def _names(record: Record, key: str) -> list[str]:
+    value = record.get(key, [])
+    if isinstance(value, str):
+        return value.split()
+    if not isinstance(value, list) or not all(
+            isinstance(name, str) for name in value):
+        raise ModelDataError(f"The {key} of '{record['name']}' must be a list"
+                             f" of names")
+    return value
+
+
+def _number(record: Record, key: str) -> Fraction:
+    value = record[key]
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        # Floats are converted through their shortest representation, so that
+        # 0.1 becomes 1/10 like it does in the ODF language
+        return Fraction(str(value))
+    except ValueError:
+        raise ModelDataError(f"The {key} of '{record['name']}' must be a"
+                             f" number, not {value!r}")
+
+
+def _check_keys(record: Record, keys: set[str]):
+    if not isinstance(record, Mapping):
+        raise ModelDataError(f"Expected a record, not {record!r}")
+    if not isinstance(record.get("name"), str) or not record["name"]:
+        raise ModelDataError(f"Record without a name: {dict(record)}")
+    unknown = record.keys() - keys
+    if unknown:
+        raise ModelDataError(f"Unknown key(s) {', '.join(sorted(unknown))} in"
+                             f" the record of '{record['name']}'")
+
+
+class _ConditionParser:
+    """Parses the conditions of nodes, once per distinct formula."""
+
+    def __init__(self):
+        self.conditions: dict[str, Tree] = {}
+
+    def __call__(self, record: Record) -> Tree:
+        text = record["cond"]
+        if not isinstance(text, str):
+            raise ModelDataError(f"The cond of '{record['name']}' must be a"
+                                 f" formula, not {text!r}")
+        if text not in self.conditions:
+            try:
+                self.conditions[text] = parse(text, "boolean_formula")
+            except UnexpectedInput as e:
+                raise ModelDataError(f"Invalid condition of '{record['name']}'"
+                                     f":\n{e}")
+        return self.conditions[text]
+
+
+def build_object_graph(records: Iterable[Record]) -> ObjectGraph:
+    builder = ObjectGraphBuilder()
+    for record in records:
+        _check_keys(record, OBJECT_KEYS)
+        name = record["name"]
+        if "children" in record:
+            builder.intermediate_object(name, _names(record, "children"))
+        if "properties" in record or "children" not in record:
+            attrs = {"properties": _names(record, "properties")} \
+                if "properties" in record else {}
+            builder.basic_object(name, attrs)
+    return builder.build()
+
+
+def build_disruption_tree(records: Iterable[Record],
+                          object_graph: ObjectGraph,
+                          parse_condition: _ConditionParser) -> \
+        DisruptionTree:
+    builder = DisruptionTreeBuilder(object_graph)
+    for i, record in enumerate(records):
+        _check_keys(record, NODE_KEYS)
+        name = record["name"]
+        if i == 0:
+            builder.toplevel(name)
+        if "gate" in record:
+            gate_type = str(record["gate"]).lower()
+            if gate_type not in ("and", "or"):
+                raise ModelDataError(f"The gate of '{name}' must be 'and' or"
+                                     f" 'or', not {record['gate']!r}")
+            builder.intermediate_node(name, gate_type,
+                                      _names(record, "children"))
+        elif "children" in record:
+            raise ModelDataError(f"Node '{name}' has children but no gate")
+
+        attributes = []
+        for key in (key for key in record if key in NODE_ATTRIBUTES):
+            if key == "objects":
+                value = builder.participants(_names(record, key))
+            elif key == "cond":
+                value = parse_condition(record)
+            else:
+                value = _number(record, key)
+            attributes.append((NODE_ATTRIBUTES[key], value))
+        if attributes or "gate" not in record:
+            builder.basic_node(name, builder.attributes(attributes))
+    if builder.tree.number_of_nodes() == 0:
+        raise ModelDataError("The tree has no nodes")
+    # The structure is validated together with the references
+    return builder.build(validate=False)
+
+
+def load_records(models: Mapping[str, Iterable[Record]]) -> Models:
+    """Build and validate the models from the records of each model, keyed
+    by `attack_tree`, `fault_tree` and `object_graph`."""
+    for model in MODELS:
+        if model not in models:
+            raise ModelDataError(f"Model '{model}' is missing")
+        if isinstance(models[model], (str, Mapping)) or not isinstance(
+                models[model], Iterable):
+            raise ModelDataError(f"Model '{model}' must be a list of records")
+    unknown = models.keys() - MODELS.keys()
+    if unknown:
+        raise ModelDataError(f"Unknown model(s): {', '.join(sorted(unknown))}")
+
+    part = "object_graph"
+    try:
+        object_graph = build_object_graph(models["object_graph"])
+        parse_condition = _ConditionParser()
+        part = "attack_tree"
+        attack_tree = build_disruption_tree(models["attack_tree"],
+                                            object_graph, parse_condition)
+        part = "fault_tree"
+        fault_tree = build_disruption_tree(models["fault_tree"],
+                                           object_graph, parse_condition)
+    except ODFError as e:
+        if isinstance(e, ModelDataError) and e.part is not None: raise
+        raise ModelDataError(str(e), MODELS[part]) from e
+    validate_models(attack_tree, fault_tree, object_graph, structure=True)
+    return attack_tree, fault_tree, object_graph
+
+
+def load_json(data: Union[str, TextIO, Mapping]) -> Models:
+    """Build and validate the models from JSON text, a JSON file or data that
+    was already decoded from JSON."""
+    try:
+        if isinstance(data, str):
+            data = json.loads(data)
+        elif not isinstance(data, Mapping):
+            data = json.load(data)
+    except json.JSONDecodeError as e:
+        raise ModelDataError(f"Invalid JSON: {e}") from e
+    if not isinstance(data, Mapping):
+        raise ModelDataError("Expected a JSON object with a list of records"
+                             " per model")
+    return load_records(data)
+
+
+def load_csv(file: Union[TextIO, Iterable[str]]) -> Models:
+    """Build and validate the models from a CSV file with a header row."""
+    models: dict[str, list[dict[str, Any]]] = {model: [] for model in MODELS}
+    reader = csv.DictReader(file)
+    try:
+        for row in reader:
+            model = row.pop("model", None)
+            if model not in MODELS:
+                raise ModelDataError(f"Unknown model {model!r} on line"
+                                     f" {reader.line_num}")
+            models[model].append({key: value for key, value in row.items()
+                                  if key is not None and value not in
+                                  ("", None)})
+    except csv.Error as e:
+        raise ModelDataError(f"Invalid CSV on line {reader.line_num}: {e}") \
+            from e
+    return load_records(models)
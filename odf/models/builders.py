@@ -0,0 +1,164 @@
+import sys
+from collections import defaultdict
+from typing import Iterable, Any
+
+from odf.models.disruption_tree import DisruptionTree, DTNode, GateType
+from odf.models.exceptions import CrossReferenceError
+from odf.models.object_graph import ObjectGraph, ObjectNode
+from odf.transformers.exceptions import DuplicateNodeDefinitionError, \
+    DuplicateAttributeError, DuplicateObjectDefinitionError, \
+    DuplicateObjectPropertyError
+
+# Maps the keys of node attributes to their names in the ODF language
+ATTRIBUTE_NAMES = {"probability": "prob", "impact": "impact",
+                   "objects": "objects", "condition_tree": "cond"}
+
+
+class DisruptionTreeBuilder:
+    """Builds a disruption tree one statement at a time, enforcing the rules of
+    the `[dog.attack_tree]` and `[dog.fault_tree]` sections.
+
+    Used by the Lark transformer as well as by the other model loaders, so
+    all of them report the same errors. Node names are interned, so that all
+    references to a node share a single string.
+    """
+
+    def __init__(self, object_graph: ObjectGraph):
+        self.object_graph = object_graph
+        self.tree = DisruptionTree()
+        # Track which nodes have been defined as basic nodes
+        self.basic_nodes = set()
+        # Track which nodes have been defined as intermediate nodes
+        self.intermediate_nodes = set()
+
+    def participants(self, objects: Iterable[str]) -> set[str]:
+        """Return the given objects together with all their (transitive)
+        parts, which participate in a node as well."""
+        objects = set(objects)
+        for obj in objects:
+            if not self.object_graph.has_node(obj):
+                raise CrossReferenceError(f"A non-existing object '{obj}' was"
+                                          f" referenced in the disruption tree")
+        return set().union(*map(self.object_graph.get_parts, objects))
+
+    def attributes(self, items: Iterable[tuple[str, Any]]) -> dict[str, Any]:
+        """Convert (key, value) pairs into a dict, allowing every attribute at
+        most once."""
+        attrs = {}
+        for key, value in items:
+            if key in attrs:
+                raise DuplicateAttributeError(ATTRIBUTE_NAMES[key])
+            attrs[key] = value
+        return attrs
+
+    def toplevel(self, name: str):
+        name = sys.intern(name)
+        if not self.tree.has_node(name):
+            self.tree.add_node(name, data=DTNode(name))
+
+    def basic_node(self, name: str, attrs: dict[str, Any]):
+        name = sys.intern(name)
+        if name in self.basic_nodes:
+            raise DuplicateNodeDefinitionError(name, "basic")
+
+        # Create node if it doesn't exist
+        if not self.tree.has_node(name):
+            node = DTNode(name, **attrs)
+            self.tree.add_node(name, data=node)
+        else:
+            # Update existing node with attributes
+            node = self.tree.nodes[name]["data"]
+            node.update_from_attrs(attrs)
+
+        self.basic_nodes.add(name)
+
+    def intermediate_node(self, parent: str, gate_type: GateType,
+                          children: Iterable[str]):
+        parent = sys.intern(parent)
+        if parent in self.intermediate_nodes:
+            raise DuplicateNodeDefinitionError(parent, "intermediate")
+
+        # Create parent node if it doesn't exist
+        if not self.tree.has_node(parent):
+            self.tree.add_node(parent, data=DTNode(parent, gate_type=gate_type))
+        else:
+            # Update existing node with gate type
+            node = self.tree.nodes[parent]["data"]
+            node.gate_type = gate_type
+
+        # Create child nodes and edges
+        for child in map(sys.intern, children):
+            # Create child node if it doesn't exist
+            if not self.tree.has_node(child):
+                self.tree.add_node(child, data=DTNode(child))
+            self.tree.add_edge(parent, child)
+
+        self.intermediate_nodes.add(parent)
+
+    def build(self, validate: bool = True) -> DisruptionTree:
+        """Return the tree, validating its structure unless the caller does
+        so itself (see `odf.models.validation.validate_models`)."""
+        if validate:
+            self.tree.validate_tree()
+        return self.tree
+
+
+class ObjectGraphBuilder:
+    """Builds an object graph one statement at a time, enforcing the rules of
+    the `[dog.object_graph]` section."""
+
+    def __init__(self):
+        self.graph = ObjectGraph()
+        # Track which nodes have been defined as basic objects
+        self.basic_objects = set()
+        # Track which nodes have been defined as intermediate objects
+        self.intermediate_objects = set()
+        # Track which objects use each property
+        self.property_objects: dict[str, set[str]] = defaultdict(set)
+
+    def basic_object(self, name: str, attrs: dict[str, Any]):
+        name = sys.intern(name)
+        if name in self.basic_objects:
+            raise DuplicateObjectDefinitionError(name, "basic")
+
+        # Track which properties are used by this object
+        for prop in attrs.get("properties", []):
+            # Check if property is already used by another object
+            if self.property_objects[prop] and name not in \
+                    self.property_objects[prop]:
+                raise DuplicateObjectPropertyError(prop, (
+                        self.property_objects[prop] | {name}))
+            self.property_objects[prop].add(name)
+
+        # Create node if it doesn't exist (might exist from intermediate object)
+        if not self.graph.has_node(name):
+            node = ObjectNode(name, **attrs)
+            self.graph.add_node(name, data=node)
+        else:
+            # Update existing node with properties
+            node = self.graph.nodes[name]["data"]
+            node.update_from_attrs(attrs)
+
+        self.basic_objects.add(name)
+
+    def intermediate_object(self, parent: str, children: Iterable[str]):
+        parent = sys.intern(parent)
+        if parent in self.intermediate_objects:
+            raise DuplicateObjectDefinitionError(parent, "intermediate")
+
+        # Create parent node if it doesn't exist
+        if not self.graph.has_node(parent):
+            self.graph.add_node(parent, data=ObjectNode(parent))
+
+        # Create child nodes and edges ("has" relationships)
+        for child in map(sys.intern, children):
+            # Create child node if it doesn't exist
+            if not self.graph.has_node(child):
+                self.graph.add_node(child, data=ObjectNode(child))
+            self.graph.add_edge(parent, child)
+
+        self.intermediate_objects.add(parent)
+
+    def build(self) -> ObjectGraph:
+        self.graph.validate_tree()
+        return self.graph
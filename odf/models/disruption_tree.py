@@ -3,13 +3,11 @@ from fractions import Fraction
 from typing import Optional, Literal
 
 from lark import Tree, Visitor
-from networkx.algorithms.components import is_weakly_connected
-from networkx.algorithms.dag import descendants
 
 from odf.checker.exceptions import InvalidProbabilityError, InvalidImpactError
 from odf.models.tree_graph import TreeGraph
 from odf.transformers.exceptions import NotConnectedError, \
-    NotExactlyOneRootError
+    NotExactlyOneRootError, MalformedTreeError
 
 GateType = Literal["and", "or"]
 
@@ -27,6 +25,9 @@ class ConditionVariablesVisitor(Visitor):
 
 
 class DTNode:
+    __slots__ = ("name", "probability", "impact", "objects", "condition_tree",
+                 "object_properties", "gate_type")
+
     def __init__(self, name: str,
                  probability: Optional[Fraction] = None,
                  impact: Optional[Fraction] = None,
@@ -85,36 +86,59 @@ class DisruptionTree(TreeGraph[DTNode]):
     def has_intermediate_node(self, node_name: str) -> bool:
         return node_name in self.nodes and self.out_degree(node_name) > 0
 
-    def validate_tree(self):
-        """Validate the tree structure.
-
-        Ensures the graph is:
+    def structure_errors(self, roots: list[str],
+                         order: Optional[list[str]]) -> \
+            list[MalformedTreeError]:
+        """Besides being acyclic, ensures the graph is:
         1. Weakly connected (all nodes are connected when edges are treated as undirected)
         2. Has exactly one root node (node with no incoming edges)
         """
-        super().validate_tree()
-        if not is_weakly_connected(self):
-            raise NotConnectedError()
-        if sum(1 for (node, in_deg) in self.in_degree if in_deg == 0) != 1:
-            raise NotExactlyOneRootError()
-
-    def get_basic_descendants(self, node_name: str) -> set[str]:
+        errors = super().structure_errors(roots, order)
+        if not self.is_weakly_connected():
+            errors.append(NotConnectedError())
+        # A cycle through the top of the tree leaves no root at all, which is
+        # already reported as the cycle
+        if len(roots) > 1 or (not roots and order is not None):
+            errors.append(NotExactlyOneRootError())
+        return errors
+
+    def get_basic_descendants(self, node_name: str) -> frozenset[str]:
         """Get all descendants of the given node (including itself) that are basic nodes (leaf nodes). """
-        return {node for node in (descendants(self, node_name) | {node_name})
-                if self.out_degree(node) == 0}
+        index = self.reachability()
+        return index.descendant_set(index.index[node_name], leaves_only=True)
 
-    def get_descendants(self, node_name: str) -> set[str]:
+    def get_descendants(self, node_name: str) -> frozenset[str]:
         """Get all descendants of the given node (including itself). """
-        return {node for node in (descendants(self, node_name) | {node_name})}
+        index = self.reachability()
+        return index.descendant_set(index.index[node_name])
 
-    def get_strict_descendants(self, node_name: str) -> set[str]:
+    def get_strict_descendants(self, node_name: str) -> frozenset[str]:
         """Get all descendants of the given node (excluding itself). """
-        return {node for node in descendants(self, node_name)}
+        index = self.reachability()
+        return index.descendant_set(index.index[node_name], strict=True)
+
+    def get_ancestors(self, node_name: str) -> frozenset[str]:
+        """Get all ancestors of the given node (including itself). """
+        index = self.reachability()
+        return index.ancestor_set(index.index[node_name])
+
+    def build_indexes(self):
+        super().build_indexes()
+        self.modules()
+        self.cached("participants", self._index_participants)
 
-    def participant_nodes(self, object_name: str) -> set[DTNode]:
+    def participant_nodes(self, object_name: str) -> frozenset[DTNode]:
         """Get all nodes in which the object participates."""
-        return {node for node in self.nodes_obj() if
-                object_name in (node.objects or set())}
+        return self.cached("participants", self._index_participants).get(
+            object_name, frozenset())
+
+    def _index_participants(self) -> dict[str, frozenset[DTNode]]:
+        participants: dict[str, set[DTNode]] = {}
+        for node in self.compact().data:
+            for object_name in node.objects or set():
+                participants.setdefault(object_name, set()).add(node)
+        return {object_name: frozenset(nodes)
+                for object_name, nodes in participants.items()}
 
     def is_module(self, node_name: str) -> bool:
         r"""Check if a node is a module.
@@ -140,9 +164,59 @@ class DisruptionTree(TreeGraph[DTNode]):
         Returns:
             True if the node is a module, False otherwise.
         """
-        descendants_ = self.get_strict_descendants(node_name)
-        for descendant in descendants_:
-            for predecessor in self.predecessors(descendant):
-                if predecessor != node_name and predecessor not in descendants_:
-                    return False
-        return True
+        return node_name in self.modules()
+
+    def modules(self) -> frozenset[str]:
+        """Get all nodes of the tree that are modules, see `is_module`."""
+        return self.cached("modules", self._find_modules)
+
+    def _find_modules(self) -> frozenset[str]:
+        """Find all modules with the linear-time algorithm of Dutuit and Rauzy.
+
+        A depth-first traversal from the roots dates the first visit of each
+        node, the second visit (after all its children were traversed) and the
+        last visit (through any parent). A node is a module iff all visits of
+        its strict descendants lie between its own first and second visit.
+        """
+        compact = self.compact()
+        n = len(compact)
+        # Dates start at 1, so a first date of 0 means not visited yet
+        first, second, last = [0] * n, [0] * n, [0] * n
+        post_order = []
+        date = 0
+
+        for root in range(n):
+            if compact.parents_of(root):
+                continue
+            date += 1
+            first[root] = last[root] = date
+            stack = [(root, iter(compact.children_of(root)))]
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    date += 1
+                    second[node] = date
+                    post_order.append(node)
+                    continue
+
+                date += 1
+                last[child] = date
+                if not first[child]:
+                    first[child] = date
+                    stack.append((child, iter(compact.children_of(child))))
+
+        # Earliest first visit and latest last visit over strict descendants
+        min_first, max_last = [0] * n, [0] * n
+        for node in post_order:
+            children = compact.children_of(node)
+            min_first[node] = min(
+                (min(first[c], min_first[c]) for c in children),
+                default=second[node])
+            max_last[node] = max(
+                (max(last[c], max_last[c]) for c in children), default=0)
+
+        return frozenset(compact.names[node] for node in post_order
+                         if min_first[node] > first[node] and
+                         max_last[node] < second[node])
@@ -1,6 +1,25 @@
-from odf.core.exceptions import ODFError
+from typing import Optional
+
+from odf.core.exceptions import ODFError, ODFErrorGroup
 
 
 class CrossReferenceError(ODFError):
     """Raised when cross-reference validation between different trees fails."""
     pass
+
+
+class CrossReferenceErrors(ODFErrorGroup, CrossReferenceError):
+    """Raised when cross-reference validation finds several problems."""
+
+
+class ModelErrors(ODFErrorGroup):
+    """Raised when validating the models finds several problems, of which
+    some are in the structure of the disruption trees."""
+
+
+class ModelDataError(ODFError):
+    """Raised when structured (JSON or CSV) model data is invalid."""
+
+    def __init__(self, message: str, part: Optional[str] = None):
+        self.part = part
+        super().__init__(f"Error in {part}: {message}" if part else message)
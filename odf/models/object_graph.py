@@ -1,9 +1,11 @@
-from typing import Optional, Iterator
+from typing import Optional, KeysView
 
 from odf.models.tree_graph import TreeGraph
 
 
 class ObjectNode:
+    __slots__ = ("name", "properties")
+
     def __init__(self, name: str, properties: Optional[list[str]] = None):
         self.name = name
         self.properties = properties
@@ -15,9 +17,31 @@ class ObjectNode:
 
 class ObjectGraph(TreeGraph[ObjectNode]):
     def has_object_property(self, object_property: str) -> bool:
-        return any(object_property == prop for prop in self.object_properties)
+        return object_property in self.property_owners()
 
     @property
-    def object_properties(self) -> Iterator[str]:
-        return (prop for node in self.nodes_obj() for prop in
-                (node.properties or []))
+    def object_properties(self) -> KeysView[str]:
+        """The properties of all objects, in order of definition."""
+        return self.property_owners().keys()
+
+    def get_parts(self, object_name: str) -> frozenset[str]:
+        """Get the object and all its (transitive) parts.
+
+        The parts are looked up in the reachability index of the graph, so
+        the closure of each object is only computed once.
+        """
+        index = self.reachability()
+        return index.descendant_set(index.index[object_name])
+
+    def build_indexes(self):
+        super().build_indexes()
+        self.property_owners()
+
+    def property_owners(self) -> dict[str, str]:
+        """Map every object property to the name of the object that owns it.
+
+        The index is built on first use once the graph is complete.
+        """
+        return self.cached("property_owners", lambda: {
+            prop: node.name for node in self.nodes_obj() for prop in
+            (node.properties or [])})
@@ -1,23 +1,302 @@
-from typing import TypeVar, Iterator, Generic
+import sys
+from array import array
+from collections import OrderedDict
+from functools import wraps
+from itertools import accumulate
+from typing import TypeVar, Iterator, Generic, Optional, Hashable, \
+    Callable, Iterable
 
 from networkx import DiGraph
-from networkx.algorithms.dag import is_directed_acyclic_graph
 
-from odf.transformers.exceptions import NotAcyclicError
+from odf.core.exceptions import raise_collected
+from odf.transformers.exceptions import NotAcyclicError, \
+    MalformedTreeError, MalformedTreeErrors
 
 NodeT = TypeVar('NodeT')
+T = TypeVar('T')
+
+# The number of decoded descendant sets that a reachability index keeps. The
+# least recently used sets are dropped, so that querying many distinct
+# bitsets does not grow the index without bound.
+MAX_DECODED_SETS = 1024
+
+
+class CompactGraph(Generic[NodeT]):
+    """Frozen, array-backed copy of a directed acyclic graph.
+
+    Nodes are numbered densely in the topological order of
+    `depth_first_order` (parents before their children). Their names
+    (interned) and node objects are stored in tuples indexed by these
+    numbers, and the children and parents of all nodes in compressed sparse
+    row form: the children of node `i` are
+    `children[child_start[i]:child_start[i + 1]]`, in the order in which the
+    edges were added, and likewise for the parents.
+    """
+
+    def __init__(self, graph: DiGraph,
+                 order: Optional[Iterable[Hashable]] = None):
+        """Build the compact graph, numbering the nodes in the given
+        topological order (computed if it is not given)."""
+        if order is None:
+            order = depth_first_order(graph, [
+                node for node, in_deg in graph.in_degree if in_deg == 0])
+            if order is None:
+                raise NotAcyclicError()
+        self.names: tuple[str, ...] = tuple(
+            sys.intern(node) if type(node) is str else node for node in order)
+        self.index: dict[Hashable, int] = {name: i for i, name in
+                                           enumerate(self.names)}
+        # The adjacency dicts of networkx are read directly, as going through
+        # its views costs more than the rest of the conversion
+        self.data: tuple[NodeT, ...] = tuple(
+            graph._node[name].get("data") for name in self.names)
+
+        self.child_start, self.children = self._csr(graph._succ)
+        self.parent_start, self.parents = self._csr(graph._pred)
+
+    def _csr(self, adjacency: dict[Hashable, dict]) -> tuple[array, array]:
+        index = self.index
+        start = array("l", [0])
+        start.extend(accumulate(len(adjacency[name]) for name in self.names))
+        return start, array("l", [index[neighbour] for name in self.names
+                                  for neighbour in adjacency[name]])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def node(self, name: Hashable) -> NodeT:
+        """Return the object stored in the node with the given name."""
+        return self.data[self.index[name]]
+
+    def children_of(self, i: int) -> array:
+        return self.children[self.child_start[i]:self.child_start[i + 1]]
+
+    def parents_of(self, i: int) -> array:
+        return self.parents[self.parent_start[i]:self.parent_start[i + 1]]
+
+    def is_leaf(self, i: int) -> bool:
+        return self.child_start[i] == self.child_start[i + 1]
+
+
+class ReachabilityIndex:
+    """Frozen reachability index of a directed acyclic graph.
+
+    Nodes are numbered like in the compact graph that the index is built
+    from. The descendants of every node (including the node itself) are
+    stored as an integer bitset relative to the node's own number: bit `k`
+    of `descendants[i]` stands for node `i + k`. As every subtree of a tree
+    is numbered contiguously, the bitsets of a tree take n * depth bits in
+    total. Ancestors are collected on demand.
+
+    The `MAX_DECODED_SETS` most recently decoded sets are cached, which holds
+    at most `MAX_DECODED_SETS * n` node references for n nodes. The ancestor
+    sets are cached per node and take at most n * n references in total for a
+    DAG (n * depth for a tree).
+    """
+
+    def __init__(self, compact: CompactGraph):
+        self.compact = compact
+        self.nodes: tuple[Hashable, ...] = compact.names
+        self.index: dict[Hashable, int] = compact.index
+
+        self.descendants: list[int] = [0] * len(self.nodes)
+        for i in reversed(range(len(self.nodes))):
+            mask = 1
+            for child in compact.children_of(i):
+                mask |= self.descendants[child] << (child - i)
+            self.descendants[i] = mask
+
+        self.leaves = 0
+        for i in range(len(self.nodes)):
+            if compact.is_leaf(i):
+                self.leaves |= 1 << i
+
+        self._sets: OrderedDict[tuple[int, int], frozenset] = OrderedDict()
+        self._ancestors: dict[int, frozenset] = {}
+
+    def descendant_set(self, i: int, strict=False,
+                       leaves_only=False) -> frozenset:
+        """Return the descendants of node `i`, excluding the node itself if
+        `strict`, and only the leaves if `leaves_only`."""
+        mask = self.descendants[i]
+        if strict:
+            mask &= ~1
+        if leaves_only:
+            mask &= self.leaves >> i
+        return self.to_set(mask, i)
+
+    def ancestor_set(self, i: int) -> frozenset:
+        """Return the ancestors of node `i`, including the node itself."""
+        ancestors = self._ancestors.get(i)
+        if ancestors is None:
+            seen = {i}
+            stack = [i]
+            while stack:
+                for parent in self.compact.parents_of(stack.pop()):
+                    if parent not in seen:
+                        seen.add(parent)
+                        stack.append(parent)
+            ancestors = frozenset(self.nodes[j] for j in seen)
+            self._ancestors[i] = ancestors
+        return ancestors
+
+    def to_set(self, mask: int, offset: int = 0) -> frozenset:
+        """Decode a bitset, relative to the node numbered `offset`, into the
+        frozen set of the nodes it contains."""
+        nodes = self._sets.get((offset, mask))
+        if nodes is not None:
+            self._sets.move_to_end((offset, mask))
+        else:
+            # Scanning the binary representation is linear in its length,
+            # unlike repeatedly clearing the lowest bit of a big integer
+            bits = bin(mask)[:1:-1]
+            members = []
+            k = bits.find("1")
+            while k != -1:
+                members.append(self.nodes[offset + k])
+                k = bits.find("1", k + 1)
+            nodes = frozenset(members)
+            self._sets[(offset, mask)] = nodes
+            if len(self._sets) > MAX_DECODED_SETS:
+                self._sets.popitem(last=False)
+        return nodes
+
+
+def depth_first_order(graph: DiGraph, roots: Iterable[Hashable]) -> \
+        Optional[list[Hashable]]:
+    """Return the nodes of a graph in reverse postorder of a depth-first
+    traversal from the given roots.
+
+    This is a topological order in which every subtree of a tree is numbered
+    contiguously. Returns None if the graph has a cycle (including nodes that
+    cannot be reached from the roots, which lie on or below a cycle).
+    """
+    successors = graph._succ
+    on_stack, done = set(), set()
+    postorder = []
+    for root in roots:
+        on_stack.add(root)
+        stack = [(root, iter(successors[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if child in on_stack:
+                    return None
+                if child not in done:
+                    on_stack.add(child)
+                    stack.append((child, iter(successors[child])))
+                    break
+            else:
+                stack.pop()
+                on_stack.remove(node)
+                done.add(node)
+                postorder.append(node)
+    if len(postorder) != len(graph):
+        return None
+    postorder.reverse()
+    return postorder
+
+
+def _dropping_cache(method: Callable) -> Callable:
+    """Wrap a method that modifies a graph, so that it drops the values
+    cached for the graph."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._cache = None
+        return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class TreeGraph(DiGraph, Generic[NodeT]):
     """Base class for tree graph structures in the application."""
 
+    _cache: Optional[dict[str, object]] = None
+
+    add_node = _dropping_cache(DiGraph.add_node)
+    add_nodes_from = _dropping_cache(DiGraph.add_nodes_from)
+    remove_node = _dropping_cache(DiGraph.remove_node)
+    remove_nodes_from = _dropping_cache(DiGraph.remove_nodes_from)
+    add_edge = _dropping_cache(DiGraph.add_edge)
+    add_edges_from = _dropping_cache(DiGraph.add_edges_from)
+    remove_edge = _dropping_cache(DiGraph.remove_edge)
+    remove_edges_from = _dropping_cache(DiGraph.remove_edges_from)
+    clear = _dropping_cache(DiGraph.clear)
+    clear_edges = _dropping_cache(DiGraph.clear_edges)
+
     def validate_tree(self):
         """Validate the tree structure.
         
-        Ensures the graph is directed and acyclic
+        Ensures the graph is directed and acyclic, plus the checks that
+        subclasses add in `structure_errors`. All problems are reported
+        together.
+        """
+        raise_collected(self.find_structure_errors(), MalformedTreeErrors)
+
+    def find_structure_errors(self) -> list[MalformedTreeError]:
+        """Return all problems with the tree structure, found in a single
+        linear pass. If there are none, the topological order found along
+        the way is reused for the compact graph."""
+        self._cache = None
+        roots = [node for node, in_deg in self.in_degree if in_deg == 0]
+        order = depth_first_order(self, roots)
+        errors = self.structure_errors(roots, order)
+        if not errors:
+            self._cache = {"compact": CompactGraph(self, order)}
+        return errors
+
+    def structure_errors(self, roots: list[Hashable],
+                         order: Optional[list[Hashable]]) -> \
+            list[MalformedTreeError]:
+        """Return all problems with the structure of the graph, given its
+        roots and its `depth_first_order` (None if it has a cycle)."""
+        return [] if order is not None else [NotAcyclicError()]
+
+    def is_weakly_connected(self) -> bool:
+        """Check whether all nodes are connected when edges are treated as
+        undirected (vacuously true for an empty graph)."""
+        if not self._node:
+            return True
+        start = next(iter(self._node))
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for neighbours in (self._succ[node], self._pred[node]):
+                for neighbour in neighbours:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        stack.append(neighbour)
+        return len(seen) == len(self._node)
+
+    def cached(self, key: str, build: Callable[[], T]) -> T:
+        """Return a value derived from the graph, computed on first use.
+
+        Cached values are dropped when the graph is validated again or when
+        nodes or edges are added or removed.
         """
-        if not is_directed_acyclic_graph(self):
-            raise NotAcyclicError()
+        if self._cache is None:
+            self._cache = {}
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def compact(self) -> CompactGraph[NodeT]:
+        """Return the compact representation of the graph, which is used for
+        traversals."""
+        return self.cached("compact", lambda: CompactGraph(self))
+
+    def reachability(self) -> ReachabilityIndex:
+        """Return the reachability index of the graph."""
+        return self.cached("reachability",
+                           lambda: ReachabilityIndex(self.compact()))
+
+    def build_indexes(self):
+        """Build all cached indexes of the graph up front, e.g. before it is
+        serialized."""
+        self.compact()
+        self.reachability()
 
     def nodes_obj(self) -> Iterator[NodeT]:
         """Returns an iterator over the node objects in the graph.
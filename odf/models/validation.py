@@ -1,6 +1,51 @@
+from typing import Optional
+
+from odf.core.exceptions import raise_collected
 from odf.models.disruption_tree import DisruptionTree
-from odf.models.exceptions import CrossReferenceError
+from odf.models.exceptions import CrossReferenceError, \
+    CrossReferenceErrors, ModelErrors
 from odf.models.object_graph import ObjectGraph
+from odf.transformers.exceptions import TreeStructureError
+
+
+def validate_models(attack_tree: DisruptionTree, fault_tree: DisruptionTree,
+                    object_graph: ObjectGraph, structure: bool = False
+                    ) -> None:
+    """Validate the cross-references between the models in a single pass.
+
+    Runs the checks of `validate_unique_node_names` and of
+    `validate_disruption_tree_references` for both trees, and reports all
+    problems together. With `structure`, the structure of both trees is
+    validated as well (for trees that were built without validating it), and
+    its problems are reported together with those of the cross-references.
+    The object graph must have been validated already, as building the trees
+    relies on its structure.
+
+    Raises:
+        TreeStructureError: If there is exactly one problem, in the
+            structure of a tree
+        CrossReferenceError: If there is exactly one problem, in the
+            cross-references
+        ModelErrors: If there are several problems, of which some are in the
+            structure of the trees
+        CrossReferenceErrors: If there are several problems, all in the
+            cross-references
+    """
+    structure_errors = []
+    if structure:
+        for part, tree in (("attack tree", attack_tree),
+                           ("fault tree", fault_tree)):
+            structure_errors += [TreeStructureError(error, part)
+                                 for error in tree.find_structure_errors()]
+
+    object_properties = _object_properties(object_graph)
+    errors = (
+        unique_node_name_errors(attack_tree, fault_tree, object_graph) +
+        reference_errors(attack_tree, object_graph, object_properties) +
+        reference_errors(fault_tree, object_graph, object_properties))
+    if structure_errors:
+        raise_collected(structure_errors + errors, ModelErrors)
+    raise_collected(errors, CrossReferenceErrors)
 
 
 def validate_unique_node_names(attack_tree: DisruptionTree,
@@ -20,20 +65,32 @@ def validate_unique_node_names(attack_tree: DisruptionTree,
     Raises:
         CrossReferenceError: If any node names are duplicated
     """
+    raise_collected(
+        unique_node_name_errors(attack_tree, fault_tree, object_graph),
+        CrossReferenceErrors)
+
+
+def unique_node_name_errors(attack_tree: DisruptionTree,
+                            fault_tree: DisruptionTree,
+                            object_graph: ObjectGraph) -> \
+        list[CrossReferenceError]:
+    """Return all problems found by `validate_unique_node_names`."""
+    errors = []
     node_names = set()
 
     for tree in [attack_tree, fault_tree, object_graph]:
         for node_name in tree.nodes:
             if node_name in node_names:
-                raise CrossReferenceError(f"Node name '{node_name}' is used in"
-                                          f" multiple trees")
+                errors.append(CrossReferenceError(
+                    f"Node name '{node_name}' is used in multiple trees"))
             node_names.add(node_name)
 
     # Check for conflicts between node names and property names
     for prop in object_graph.object_properties:
         if prop in node_names:
-            raise CrossReferenceError(
-                f"Property name '{prop}' conflicts with existing node name")
+            errors.append(CrossReferenceError(
+                f"Property name '{prop}' conflicts with existing node name"))
+    return errors
 
 
 def validate_disruption_tree_references(dt: DisruptionTree,
@@ -48,41 +105,52 @@ def validate_disruption_tree_references(dt: DisruptionTree,
     Raises:
         ValidationError: If any reference is invalid
     """
-    # Build a map of object names to their properties
-    object_properties: dict[str, set[str]] = {}
-    for node in og.nodes_obj():
-        if node.properties is not None:
-            object_properties[node.name] = set(node.properties)
-        else:
-            object_properties[node.name] = set()
-
-    # Validate each node in the disruption tree
+    raise_collected(reference_errors(dt, og), CrossReferenceErrors)
+
+
+def _object_properties(og: ObjectGraph) -> dict[str, set[str]]:
+    """Map the names of all objects to their properties."""
+    return {node.name: set(node.properties or ()) for node in og.nodes_obj()}
+
+
+def reference_errors(
+        dt: DisruptionTree, og: ObjectGraph,
+        object_properties: Optional[dict[str, set[str]]] = None) -> \
+        list[CrossReferenceError]:
+    """Return all problems found by `validate_disruption_tree_references`.
+
+    The properties of the objects can be passed in, so that they are only
+    collected once when several trees are validated.
+    """
+    if object_properties is None:
+        object_properties = _object_properties(og)
+    errors = []
+
     for node in dt.nodes_obj():
         # Validate object references
         if node.objects is not None:
             for obj_name in node.objects:
                 if obj_name not in og:
-                    raise CrossReferenceError(
+                    errors.append(CrossReferenceError(
                         f"Node '{node.name}' references non-existent object"
-                        f" '{obj_name}'")
+                        f" '{obj_name}'"))
 
         # Validate object property references in conditions
         properties = node.object_properties
 
         # If node has no objects, it can't reference properties
-        if node.objects is None and len(properties) > 0:
-            raise CrossReferenceError(
-                f"Node '{node.name}' has properties in its condition but no"
-                f" associated objects")
+        if node.objects is None:
+            if len(properties) > 0:
+                errors.append(CrossReferenceError(
+                    f"Node '{node.name}' has properties in its condition but"
+                    f" no associated objects"))
+            continue
 
         # Check each property exists in at least one of the node's objects
         for prop in properties:
-            valid_property = False
-            for obj_name in node.objects:
-                if prop in object_properties[obj_name]:
-                    valid_property = True
-                    break
-            if not valid_property:
-                raise CrossReferenceError(
+            if not any(prop in object_properties.get(obj_name, ())
+                       for obj_name in node.objects):
+                errors.append(CrossReferenceError(
                     f"Node '{node.name}' references property '{prop}' which"
-                    f" doesn't exist in any of its objects {node.objects}")
+                    f" doesn't exist in any of its objects {node.objects}"))
+    return errors
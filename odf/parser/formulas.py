@@ -0,0 +1,46 @@
+from typing import Iterable, Iterator, NamedTuple
+
+from lark import Token, Tree
+
+from odf.parser.parser import parse
+
+
+class FormulaText(NamedTuple):
+    """The text of a single formula and the line of the input it starts on."""
+    text: str
+    line: int
+
+
+def split_formulas(lines: Iterable[str]) -> Iterator[FormulaText]:
+    """Split a stream of `;`-terminated formulas into the texts of the
+    individual formulas.
+
+    The input is consumed line by line, so formulas can be read lazily from a
+    large file or from stdin. Comments are removed, and a last formula
+    without a terminating `;` is also returned.
+    """
+    chunk: list[str] = []
+    start_line = 0
+    for line_number, line in enumerate(lines, 1):
+        code, comment, _ = line.partition("//")
+        if comment:
+            code += "\n"
+        *formulas, rest = code.split(";")
+        for formula in formulas:
+            chunk.append(formula)
+            if start_line == 0 and formula.strip():
+                start_line = line_number
+            if start_line != 0:
+                yield FormulaText("".join(chunk), start_line)
+            chunk, start_line = [], 0
+        chunk.append(rest)
+        if start_line == 0 and rest.strip():
+            start_line = line_number
+
+    if start_line != 0:
+        yield FormulaText("".join(chunk), start_line)
+
+
+def parse_formula(text: str) -> Tree[Token]:
+    """Parse the text of a single formula (without the terminating `;`)."""
+    return parse(text, "doglog_formula")
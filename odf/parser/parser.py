@@ -1,14 +1,62 @@
+import hashlib
+import os
 from functools import cache
 from pathlib import Path
+from typing import Optional
 
 from lark import Token, Tree, Lark
 
+GRAMMAR_PATH = Path(__file__).parent / "grammar.lark"
+
+
+@cache
+def grammar_digest() -> str:
+    """Return the sha256 hex digest of the grammar."""
+    return hashlib.sha256(GRAMMAR_PATH.read_bytes()).hexdigest()
+
+
+def user_cache_dir() -> Optional[Path]:
+    """Return the user's ODF cache directory, `$XDG_CACHE_HOME/odf` or
+    `~/.cache/odf`, creating it if needed. Returns None if it cannot be
+    created.
+    """
+    try:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        cache_dir = Path(cache_home) / "odf"
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    except (OSError, RuntimeError):
+        return None
+    return cache_dir
+
+
+def cache_path(grammar: str) -> Optional[str]:
+    """Return the file in which the compiled parser for the grammar is cached.
+
+    The file lives in the user's cache directory and is named after the hash of
+    the grammar. Lark additionally verifies a hash of the grammar, its options
+    and the Lark version stored in the file, and rebuilds (and rewrites) the
+    cache when it is stale or unreadable. Returns None if the cache directory
+    cannot be created.
+    """
+    cache_dir = user_cache_dir()
+    if cache_dir is None:
+        return None
+    digest = hashlib.sha256(grammar.encode()).hexdigest()
+    return str(cache_dir / f"parser-{digest[:16]}.lark")
+
 
 @cache
 def parser():
-    with open(Path(__file__).parent / "grammar.lark") as grammar:
-        return Lark(grammar, maybe_placeholders=False, strict=True)
+    grammar = GRAMMAR_PATH.read_text()
+    # Every section can also be parsed on its own (see `odf.parser.sections`),
+    # and so can single formulas (see `odf.parser.formulas`) and conditions
+    # (see `odf.loaders.model_sections`)
+    return Lark(grammar, parser="lalr", lexer="contextual",
+                start=["start", "attack_tree", "fault_tree", "object_graph",
+                       "doglog", "doglog_formula", "boolean_formula"],
+                maybe_placeholders=False,
+                cache=cache_path(grammar) or False)
 
 
-def parse(text: str) -> Tree[Token]:
-    return parser().parse(text, 'start')
+def parse(text: str, start: str = 'start') -> Tree[Token]:
+    return parser().parse(text, start)
@@ -0,0 +1,69 @@
+import re
+from typing import NamedTuple
+
+from lark import Token, Tree
+
+from odf.parser.parser import parse
+from odf.transformers.exceptions import MissingSectionError, \
+    DuplicateSectionError
+
+# Maps the sections of an ODF file to their headers
+SECTIONS = {"attack_tree": "[dog.attack_tree]",
+            "fault_tree": "[dog.fault_tree]",
+            "object_graph": "[dog.object_graph]",
+            "doglog": "[formulas]"}
+
+# Matches comments as well, so that headers inside comments can be skipped
+_HEADER_PATTERN = re.compile(
+    "//[^\n]*|" + "|".join(re.escape(header) for header in SECTIONS.values()),
+    re.IGNORECASE)
+_SECTION_OF_HEADER = {header: section for section, header in SECTIONS.items()}
+_COMMENT_PATTERN = re.compile("//[^\n]*")
+
+
+class Section(NamedTuple):
+    """A section of an ODF file, from the start of its header up to the start
+    of the next header (or the end of the file)."""
+    name: str
+    start: int
+    end: int
+
+
+def split_sections(text: str) -> tuple[str, list[Section]]:
+    """Split the text of an ODF file into its sections without parsing it.
+
+    Returns the text before the first header and the sections in the order
+    in which they occur.
+    """
+    headers = [(match.start(), _SECTION_OF_HEADER[match.group().lower()])
+               for match in _HEADER_PATTERN.finditer(text)
+               if not match.group().startswith("//")]
+    sections = [Section(name, start, end) for (start, name), (end, _) in
+                zip(headers, headers[1:] + [(len(text), None)])]
+    preamble = text[:headers[0][0]] if headers else text
+    return preamble, sections
+
+
+def is_blank(text: str) -> bool:
+    """Check whether the text contains nothing but whitespace and comments."""
+    return not _COMMENT_PATTERN.sub("", text).strip()
+
+
+def find_section(sections: list[Section], name: str) -> Section:
+    """Return the only section with the given name."""
+    matches = [section for section in sections if section.name == name]
+    if not matches:
+        raise MissingSectionError(SECTIONS[name])
+    if len(matches) > 1:
+        raise DuplicateSectionError(SECTIONS[name])
+    return matches[0]
+
+
+def parse_section(text: str, section: Section) -> Tree[Token]:
+    """Parse a single section of an ODF file.
+
+    Everything before the section is replaced by whitespace, so that line and
+    column numbers in parse errors and in the parse tree match the full file.
+    """
+    padding = re.sub("[^\n]", " ", text[:section.start])
+    return parse(padding + text[section.start:section.end], section.name)
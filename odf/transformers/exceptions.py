@@ -2,7 +2,7 @@ from typing import Literal
 
 from lark.exceptions import VisitError
 
-from odf.core.exceptions import ODFError
+from odf.core.exceptions import ODFError, ODFErrorGroup
 
 
 class MyVisitError(ODFError):
@@ -19,6 +19,16 @@ class MalformedTreeError(ODFError):
     pass
 
 
+class TreeStructureError(MyVisitError):
+    """Raised when the structure of a disruption tree is malformed, in the
+    same way as the transformer of the tree would raise it."""
+
+    def __init__(self, error: MalformedTreeError, part: str):
+        self.visit_error = VisitError("disruption_tree", None, error)
+        self.part = part
+        ODFError.__init__(self, f"Error in {part}: {error}")
+
+
 class DuplicateObjectDefinitionError(MalformedTreeError):
     """Raised when an object is defined multiple times in the same context."""
 
@@ -60,6 +70,10 @@ class NotExactlyOneRootError(MalformedTreeError):
         super().__init__("Graph has more than one root")
 
 
+class MalformedTreeErrors(ODFErrorGroup, MalformedTreeError):
+    """Raised when the structure of a graph has several problems."""
+
+
 class DuplicateObjectPropertyError(MalformedTreeError):
     """Raised when the same property name is used on multiple objects."""
 
@@ -68,3 +82,37 @@ class DuplicateObjectPropertyError(MalformedTreeError):
         self.objects = objects
         super().__init__(
             f"Property '{property_name}' is used by multiple objects: {objects}")
+
+
+class MissingSectionError(MalformedTreeError):
+    """Raised when a required section is missing from an ODF file."""
+
+    def __init__(self, section: str):
+        self.section = section
+        super().__init__(f"Section '{section}' is missing")
+
+
+class DuplicateSectionError(MalformedTreeError):
+    """Raised when a section occurs more than once in an ODF file."""
+
+    def __init__(self, section: str):
+        self.section = section
+        super().__init__(f"Section '{section}' is defined more than once")
+
+
+class DuplicateAttributeError(MalformedTreeError):
+    """Raised when a node attribute is specified more than once."""
+
+    def __init__(self, attribute: str):
+        self.attribute = attribute
+        super().__init__(f"Attribute '{attribute}' is specified more than once")
+
+
+class DuplicateTruncationOptionError(ODFError):
+    """Raised when a truncation option of a query is specified more than
+    once."""
+
+    def __init__(self, option: str):
+        self.option = option
+        super().__init__(
+            f"Truncation option '{option}' is specified more than once")
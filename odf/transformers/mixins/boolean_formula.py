@@ -1,13 +1,16 @@
-from dd import cudd
+from typing import TYPE_CHECKING
 
 from odf.transformers.mixins.decorators import interpreter_or_transformer
 
+if TYPE_CHECKING:
+    from dd import cudd
+
 
 # noinspection PyMethodMayBeStatic
 class BooleanFormulaMixin:
     """Mixin for transforming boolean formulas into BDDs. Assumes that the class
     has a `bdd` attribute."""
-    bdd: cudd.BDD
+    bdd: "cudd.BDD"
 
     @interpreter_or_transformer
     def impl_formula(self, items):
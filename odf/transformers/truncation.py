@@ -0,0 +1,63 @@
+from fractions import Fraction
+from typing import NamedTuple, Optional
+
+from lark import Transformer, Tree
+from lark.exceptions import VisitError
+
+from odf.core.exceptions import ODFError
+from odf.transformers.exceptions import DuplicateTruncationOptionError
+
+# Maps the fields of a truncation to the names of its options in the ODF
+# language
+OPTION_NAMES = {"order": "order", "probability": "prob", "top": "top"}
+
+
+class Truncation(NamedTuple):
+    """Limits on the minimal risk scenarios of a compute all query: at most
+    `order` events, a probability of at least `probability`, and only the
+    `top` most likely scenarios."""
+    order: Optional[int] = None
+    probability: Optional[Fraction] = None
+    top: Optional[int] = None
+
+    @property
+    def probabilistic(self) -> bool:
+        """Whether the probabilities of the scenarios are needed."""
+        return self.probability is not None or self.top is not None
+
+    def over(self, defaults: "Truncation") -> "Truncation":
+        """Return this truncation, with the limits that it does not set taken
+        from `defaults`."""
+        return Truncation(*(default if value is None else value
+                            for value, default in zip(self, defaults)))
+
+
+# noinspection PyMethodMayBeStatic
+class TruncationTransformer(Transformer):
+    """Transforms a truncation parse tree into a `Truncation`."""
+
+    def truncation(self, items):
+        options = {}
+        for key, value in items:
+            if key in options:
+                raise DuplicateTruncationOptionError(OPTION_NAMES[key])
+            options[key] = value
+        return Truncation(**options)
+
+    def max_order(self, items):
+        return "order", int(items[0].value)
+
+    def min_probability(self, items):
+        return "probability", Fraction(items[0].value)
+
+    def top_k(self, items):
+        return "top", int(items[0].value)
+
+
+def parse_truncation(truncation_tree: Tree) -> Truncation:
+    assert truncation_tree.data == "truncation"
+    try:
+        return TruncationTransformer().transform(truncation_tree)
+    except VisitError as e:
+        if not isinstance(e.orig_exc, ODFError): raise
+        raise e.orig_exc
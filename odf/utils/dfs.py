@@ -1,8 +1,13 @@
+from __future__ import annotations
+
 from collections import deque
-from typing import Iterator, Callable, Set, Tuple
+from typing import Iterator, Callable, Set, Tuple, TYPE_CHECKING
 
-from dd import cudd, cudd_add
-from dd.cudd import Function
+if TYPE_CHECKING:
+    # Only needed for annotations, so that importing this module does not load
+    # CUDD
+    from dd import cudd, cudd_add
+    from dd.cudd import Function
 
 
 def dfs_nodes_with_complement(
@@ -83,7 +88,7 @@ def dfs_mtbdd_terminals(root: cudd_add.Function) -> Iterator[float]:
 
 
 # Define predicate type
-NodeTypePredicate = Callable[[Function], bool]
+NodeTypePredicate = Callable[["Function"], bool]
 
 
 def find_config_reflection_nodes(
@@ -1,6 +1,8 @@
 """
 Utility functions for formatting CLI output.
 """
+from fractions import Fraction
+
 from odf.core.constants import COLOR_GREEN, COLOR_RED, COLOR_MAGENTA, \
     COLOR_CYAN, COLOR_RESET
 
@@ -34,3 +36,8 @@ def format_node_name(name: str) -> str:
 def format_risk(risk: float) -> str:
     """Format a risk value with magenta color."""
     return f"{COLOR_MAGENTA}{risk}{COLOR_RESET}"
+
+
+def format_probability(probability: Fraction) -> str:
+    """Format a probability as a decimal number with magenta color."""
+    return f"{COLOR_MAGENTA}{float(probability):g}{COLOR_RESET}"
@@ -53,8 +53,25 @@ class FormulaReconstructor(Transformer):
 
     def compute_all(self, items: list[str]) -> str:
         """Reconstruct a compute all query."""
-        conf, formula = items
-        return f"{conf}\n  [[{formula}]]" if self.multiline else f"{conf} [[{formula}]]"
+        conf, formula, *truncation = items
+        query = f"[[{formula}]]" + "".join(f" {t}" for t in truncation)
+        return f"{conf}\n  {query}" if self.multiline else f"{conf} {query}"
+
+    def truncation(self, items: list[str]) -> str:
+        """Reconstruct the truncation of a compute all query."""
+        return " ".join(items)
+
+    def max_order(self, item: list[Token]) -> str:
+        """Reconstruct an order truncation."""
+        return f"order={item[0]}"
+
+    def min_probability(self, item: list[Token]) -> str:
+        """Reconstruct a probability truncation."""
+        return f"prob={item[0]}"
+
+    def top_k(self, item: list[Token]) -> str:
+        """Reconstruct a top-k truncation."""
+        return f"top={item[0]}"
 
     def check(self, items: list[str]) -> str:
         """Reconstruct a check query."""
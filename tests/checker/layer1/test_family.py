@@ -0,0 +1,81 @@
+from fractions import Fraction
+
+from dd import cudd
+
+from odf.checker.layer1.family import ScenarioFamily
+from odf.checker.layer1.minsol import minimal_solutions
+
+
+def family_of(expr: str, variables: str = "abcde") -> ScenarioFamily:
+    bdd = cudd.BDD()
+    bdd.declare(*variables)
+    f = bdd.add_expr(expr)
+    return ScenarioFamily.from_bdd(bdd,
+                                   minimal_solutions(bdd, f, f.support))
+
+
+def test_family_queries():
+    family = family_of("(a | b) & (c | (d & e))")
+    assert set(family) == {frozenset("ac"), frozenset("bc"),
+                           frozenset("ade"), frozenset("bde")}
+    assert len(family) == 4
+    assert family.events == set("abcde")
+
+    assert set(family.with_size(3)) == {frozenset("ade"), frozenset("bde")}
+    assert set(family.with_size(max_size=2)) == {frozenset("ac"),
+                                                 frozenset("bc")}
+    assert not family.with_size(4)
+    assert set(family.supersets_of("a")) == {frozenset("ac"),
+                                             frozenset("ade")}
+    assert set(family.supersets_of("ae")) == {frozenset("ade")}
+    assert not family.supersets_of("x")
+    assert set(family.subsets_of("bdex")) == {frozenset("bde")}
+
+    assert "ac" in family
+    assert "a" not in family
+    assert "acx" not in family
+
+
+def test_empty_families():
+    bdd = cudd.BDD()
+    unsatisfiable = ScenarioFamily.from_bdd(bdd, bdd.false)
+    assert not unsatisfiable
+    assert len(unsatisfiable) == 0
+    assert list(unsatisfiable.by_size()) == []
+
+    only_empty = family_of("~a")
+    assert only_empty
+    assert set(only_empty) == {frozenset()}
+    assert list(only_empty.by_size()) == [frozenset()]
+
+
+def test_zdd_is_smaller_than_bdd():
+    # One of 100 pairs of events: the BDD of the minimal solutions has nodes
+    # for the events that are false, the ZDD only for those that are true
+    variables = [f"x{i}" for i in range(200)]
+    bdd = cudd.BDD()
+    bdd.declare(*variables)
+    f = bdd.add_expr(" | ".join(f"({a} & {b})" for a, b in
+                                zip(variables[::2], variables[1::2])))
+    mrs = minimal_solutions(bdd, f, f.support)
+    family = ScenarioFamily.from_bdd(bdd, mrs)
+
+    assert len(family) == 100
+    assert family.function.dag_size < mrs.dag_size / 2
+    assert {len(scenario) for scenario in family} == {2}
+
+
+def test_scenarios_by_probability():
+    probabilities = {var: Fraction(i + 1, 10) for i, var in enumerate("abcde")}
+    bdd = cudd.BDD()
+    bdd.declare(*"abcde")
+    f = bdd.add_expr("(a | b) & (c | (d & e))")
+    family = ScenarioFamily.from_bdd(
+        bdd, minimal_solutions(bdd, f, f.support), probabilities)
+
+    ranked = list(family.by_probability())
+    assert [probability for _, probability in ranked] == sorted(
+        (family.probability(scenario) for scenario in family), reverse=True)
+    assert ranked[0] == (frozenset("bc"), Fraction(2 * 3, 100))
+    assert {scenario for scenario, _ in ranked} == set(family)
+    assert list(family.with_size(4).by_probability()) == []
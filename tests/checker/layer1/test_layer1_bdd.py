@@ -2,6 +2,7 @@ import pytest
 from dd import cudd
 from lark import Tree, Token
 
+from odf.checker.context import ModelContext, MAX_OVERLAY_TABLES
 from odf.checker.exceptions import (NodeAncestorEvidenceError,
                                     EvidenceAncestorEvidenceError,
                                     NonModuleNodeError,
@@ -537,6 +538,8 @@ def test_mrs_simple_formula(parse_and_get_bdd):
 
     var_name = 'BasicAttack'
     prime_var = f"{var_name}'1"
+    # The definition of MRS quantifies over primed copies of the variables
+    transformer.bdd.declare(prime_var)
 
     expected_formula = transformer.bdd.add_expr(
         f"{var_name} & ~(\\E {prime_var}: ({prime_var} => {var_name}) & ({prime_var} ^ {var_name}) & {prime_var})")
@@ -683,13 +686,15 @@ def test_mrs_complex_intermediate_node(complex_attack_tree, parse_and_get_bdd):
 
     assert bdd == expected
 
-    # Create the MRS formula directly as expressed in the implementation
+    # Create the MRS formula directly from its definition, which quantifies
+    # over primed copies of the variables
     # Define the original MixedGateNode formula
     mixed_gate_expr = "((BasicAttack1 & BasicAttack2) | (BasicAttack3 & (BasicAttack4 | BasicAttack5) & obj_prop2)) & obj_prop1"
 
-    # Define primed variables (using prime_count=1 as in the first call to mrs)
+    # Define primed variables
     primed_vars = ["BasicAttack1'1", "BasicAttack2'1", "BasicAttack3'1",
                    "BasicAttack4'1", "BasicAttack5'1"]
+    transformer.bdd.declare(*primed_vars)
 
     # Create implications part: (p'i => xi)
     implications = " & ".join([f"({pv} => {pv[:-2]})" for pv in primed_vars])
@@ -937,3 +942,114 @@ def test_single_child_intermediate_node(transform_disruption_tree_str,
                     transformer.bdd.var('obj_prop1') & \
                     ~transformer.bdd.var('obj_prop2')
     assert bdd == expected_root
+
+
+def test_shared_subtree_translated_once(transform_disruption_tree_str,
+                                        monkeypatch):
+    """Test that a subtree with several parents is only translated once."""
+    # Every level has two parents for the node below, giving 2^depth paths
+    depth = 20
+    lines = ["toplevel L0;"]
+    for i in range(depth):
+        lines.append(f"L{i} and A{i} B{i};")
+        lines.append(f"A{i} or L{i + 1} X{i};")
+        lines.append(f"B{i} or L{i + 1} Y{i};")
+    attack_tree = transform_disruption_tree_str("\n".join(lines))
+
+    transformer = Layer1BDDInterpreter(attack_tree, None, None)
+    transformer.bdd.declare(*attack_tree.nodes)
+
+    calls = []
+    original = Layer1BDDInterpreter.gate_to_bdd
+
+    def counting_gate_to_bdd(self, node, children):
+        calls.append(node.name)
+        return original(self, node, children)
+
+    monkeypatch.setattr(Layer1BDDInterpreter, "gate_to_bdd",
+                        counting_gate_to_bdd)
+
+    transformer.intermediate_node_to_bdd(attack_tree, "L0")
+    assert len(calls) == len(set(calls)) == 3 * depth
+
+
+def test_node_tables_invalidated_by_evidence(attack_tree_mixed_gates,
+                                             fault_tree1, object_graph1):
+    """Test that evidence only invalidates the memoized ancestors."""
+    context = ModelContext(attack_tree_mixed_gates, fault_tree1, object_graph1)
+    transformer = Layer1BDDInterpreter(attack_tree_mixed_gates, fault_tree1,
+                                       object_graph1, context=context)
+    transformer.object_properties = set(context.object_properties)
+    transformer.intermediate_node_to_bdd(attack_tree_mixed_gates, "RootA")
+    transformer.current_evidence = {"SubPathC1": True}
+    base, affected, overlay = transformer.node_tables(attack_tree_mixed_gates)
+    assert affected == {"SubPathC1", "PathC", "RootA"}
+
+    bdd = transformer.intermediate_node_to_bdd(attack_tree_mixed_gates,
+                                               "PathC")
+    manager = transformer.bdd
+    assert bdd == manager.var("SubPathC1") & manager.var("Attack9") & (
+            manager.var("Attack10") | manager.var("Attack11")) & \
+           manager.var("SubPathC3")
+    assert set(overlay) == {"SubPathC1", "PathC"}
+    # The base table still holds the BDD without evidence
+    assert base["PathC"] != bdd
+
+
+def test_overlay_tables_are_bounded(attack_tree_mixed_gates, fault_tree1,
+                                    object_graph1):
+    """Test that only the most recently used overlay tables are kept."""
+    context = ModelContext(attack_tree_mixed_gates, fault_tree1, object_graph1)
+    transformer = Layer1BDDInterpreter(attack_tree_mixed_gates, fault_tree1,
+                                       object_graph1, context=context)
+    transformer.object_properties = set(context.object_properties)
+    transformer.intermediate_node_to_bdd(attack_tree_mixed_gates, "RootA")
+
+    basic_nodes = sorted(attack_tree_mixed_gates.get_basic_descendants(
+        "RootA"))
+    evidence_sets = [{first: True, second: False}
+                     for first in basic_nodes for second in basic_nodes
+                     if first < second][:MAX_OVERLAY_TABLES + 2]
+    assert len(evidence_sets) == MAX_OVERLAY_TABLES + 2
+    for evidence in evidence_sets:
+        transformer.current_evidence = evidence
+        transformer.intermediate_node_to_bdd(attack_tree_mixed_gates, "RootA")
+        # Keep using the first set, so that it is not the least recent one
+        transformer.current_evidence = evidence_sets[0]
+        transformer.node_tables(attack_tree_mixed_gates)
+
+    tables = context.node_bdds[attack_tree_mixed_gates]
+    assert len(tables) == MAX_OVERLAY_TABLES + 1
+    assert "RootA" in tables[frozenset()][1]
+    assert frozenset(evidence_sets[0]) in tables
+    assert frozenset(evidence_sets[1]) not in tables
+    assert frozenset(evidence_sets[-1]) in tables
+
+
+def test_identical_conditions_compiled_once(transform_disruption_tree_str,
+                                            monkeypatch):
+    """Test that nodes with structurally equal conditions share one BDD."""
+    attack_tree = transform_disruption_tree_str("""
+    toplevel Root;
+    Root or A B C;
+    A cond = (p1 && !p2);
+    B cond = (p1 && !p2);
+    C cond = (p1 || p2);
+    """)
+
+    transformer = Layer1BDDInterpreter(attack_tree, None, None)
+    transformer.bdd.declare("p1", "p2", *attack_tree.nodes)
+
+    calls = []
+    original = ConditionTransformer.transform
+
+    def counting_transform(self, tree):
+        calls.append(tree)
+        return original(self, tree)
+
+    monkeypatch.setattr(ConditionTransformer, "transform", counting_transform)
+
+    bdd = transformer.intermediate_node_to_bdd(attack_tree, "Root")
+    assert len(calls) == 2
+    assert bdd == transformer.bdd.add_expr(
+        r"((A \/ B) /\ p1 /\ ~ p2) \/ (C /\ (p1 \/ p2))")
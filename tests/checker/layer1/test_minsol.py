@@ -0,0 +1,141 @@
+import random
+from fractions import Fraction
+from math import prod
+
+import pytest
+from dd import cudd
+
+from odf.checker.layer1.minsol import minimal_solutions
+
+
+def mrs_by_definition(manager, formula, minimized):
+    """MRS as the formula without any solution on a proper subset of the
+    minimized variables, quantifying over primed copies of them."""
+    primed = {var: f"{var}'" for var in minimized}
+    manager.declare(*primed.values())
+    subset = manager.true
+    proper = manager.false
+    for var, primed_var in primed.items():
+        subset &= manager.var(primed_var).implies(manager.var(var))
+        proper |= manager.apply("xor", manager.var(primed_var),
+                                manager.var(var))
+    primed_formula = manager.let(primed, formula) if primed else formula
+    return formula & ~manager.exist(list(primed.values()),
+                                    subset & proper & primed_formula)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_same_as_definition(seed):
+    rng = random.Random(seed)
+    manager = cudd.BDD()
+    # Two parameters, declared between the minimized variables
+    names = [f"x{i}" for i in range(6)] + ["p", "q"]
+    rng.shuffle(names)
+    manager.declare(*names)
+
+    def random_formula(depth):
+        if depth == 0 or rng.random() < 0.2:
+            var = manager.var(rng.choice(names))
+            return ~var if rng.random() < 0.3 else var
+        return manager.apply(rng.choice(["and", "or", "xor"]),
+                             random_formula(depth - 1),
+                             random_formula(depth - 1))
+
+    for _ in range(10):
+        formula = random_formula(4)
+        minimized = set(formula.support) - {"p", "q"}
+        assert minimal_solutions(manager, formula, minimized) == \
+               mrs_by_definition(manager, formula, sorted(minimized))
+
+
+def test_large_fault_tree():
+    manager = cudd.BDD()
+    names = [f"x{i}" for i in range(3000)]
+    manager.declare(*names)
+    formula = manager.false
+    for i in range(0, len(names), 3):
+        formula |= manager.var(names[i]) & (manager.var(names[i + 1]) |
+                                            manager.var(names[i + 2]))
+
+    result = minimal_solutions(manager, formula, set(names))
+    # One minimal solution per gate and choice of its second event, which
+    # share the chains of negated variables
+    assert len(result) < 10 * len(names)
+
+    def assignment(*true):
+        return {var: var in true for var in names}
+
+    assert manager.let(assignment("x3", "x5"), result) == manager.true
+    assert manager.let(assignment("x3", "x4", "x5"), result) == manager.false
+    assert manager.let(assignment("x3"), result) == manager.false
+    assert manager.configure()["reordering"]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_truncation_filters_solutions(seed):
+    rng = random.Random(seed)
+    manager = cudd.BDD()
+    names = [f"x{i}" for i in range(8)] + ["p"]
+    manager.declare(*names)
+    probabilities = {var: Fraction(rng.randint(1, 10), 10)
+                     for var in names[:-1]}
+    clauses = [" | ".join(rng.sample(names, rng.randint(1, 3)))
+               for _ in range(rng.randint(2, 5))]
+    formula = manager.add_expr(" & ".join(f"({c})" for c in clauses))
+    minimized = set(formula.support) - {"p"}
+    full = minimal_solutions(manager, formula, minimized)
+
+    def solutions(f):
+        return {frozenset(var for var, val in assignment.items() if val)
+                for assignment in manager.pick_iter(f, care_vars=minimized |
+                                                    {"p"})}
+
+    for max_order, min_probability in [(1, None), (2, None),
+                                       (None, Fraction(1, 10)),
+                                       (2, Fraction(1, 4))]:
+        truncated = minimal_solutions(manager, formula, minimized, max_order,
+                                      min_probability, probabilities)
+        expected = {
+            solution for solution in solutions(full)
+            if (max_order is None or len(solution - {"p"}) <= max_order)
+            and (min_probability is None or
+                 prod(probabilities[var] for var in solution - {"p"})
+                 >= min_probability)}
+        assert solutions(truncated) == expected
+
+
+def test_probability_truncation_shares_nodes():
+    # 2^60 minimal solutions, one event of every pair, whose probabilities
+    # are all distinct. Keying the computed table by the exact remaining
+    # probability would visit every one of them.
+    pairs = 60
+    manager = cudd.BDD()
+    names = [f"{event}{i}" for i in range(pairs) for event in "ab"]
+    manager.declare(*names)
+    probabilities = {}
+    ratios = [Fraction(1, 4) + Fraction(i + 1, 4 * (pairs + 1))
+              for i in range(pairs)]
+    for i, ratio in enumerate(ratios):
+        probabilities[f"a{i}"] = Fraction(1, 2)
+        probabilities[f"b{i}"] = Fraction(1, 2) * ratio
+    formula = manager.add_expr(" & ".join(f"(a{i} | b{i})"
+                                          for i in range(pairs)))
+    best = Fraction(1, 2) ** pairs
+
+    def assignment(*switched):
+        return {**{f"a{i}": i not in switched for i in range(pairs)},
+                **{f"b{i}": i in switched for i in range(pairs)}}
+
+    result = minimal_solutions(manager, formula, set(names), None, best,
+                               probabilities)
+    assert result == manager.cube(assignment())
+
+    # Switching one of the last three pairs to its b event keeps the
+    # probability above the cutoff, switching two of them does not
+    result = minimal_solutions(manager, formula, set(names), None,
+                               best * ratios[-3], probabilities)
+    assert result.count(2 * pairs) == 4
+    for switched in [(), (pairs - 1,), (pairs - 2,), (pairs - 3,)]:
+        assert manager.let(assignment(*switched), result) == manager.true
+    assert manager.let(assignment(pairs - 1, pairs - 2),
+                       result) == manager.false
@@ -0,0 +1,191 @@
+import io
+import itertools
+import json
+import random
+from fractions import Fraction
+
+import pytest
+from dd import cudd
+
+from odf.__main__ import execute_str
+from odf.checker.layer1.check_layer1 import layer1_compute_all, \
+    layer1_scenario_family, truncated_scenarios
+from odf.checker.layer1.minsol import minimal_solutions
+from odf.checker.layer1.family import ScenarioFamily
+from odf.checker.layer1.scenarios import ScenarioOptions
+from odf.models.object_graph import ObjectGraph
+from odf.transformers.truncation import Truncation
+
+MODELS = """
+[dog.attack_tree]
+toplevel A;
+A or A1 A2 A3;
+A1;
+A2 and A21 A22;
+A21;
+A22;
+A3 and A31 A32 A33;
+A31;
+A32;
+A33;
+
+[dog.fault_tree]
+toplevel B;
+B;
+
+[dog.object_graph]
+C;
+
+[formulas]
+{}[[A]];
+"""
+
+
+def test_scenarios_by_size_matches_all_minimal_solutions():
+    rng = random.Random(4)
+    bdd = cudd.BDD()
+    variables = [f"x{i}" for i in range(8)]
+    bdd.declare(*variables)
+    for _ in range(20):
+        clauses = [" | ".join(rng.sample(variables, rng.randint(1, 3)))
+                   for _ in range(rng.randint(1, 5))]
+        f = bdd.add_expr(" & ".join(f"({c})" for c in clauses))
+        mrs = minimal_solutions(bdd, f, f.support)
+
+        family = ScenarioFamily.from_bdd(bdd, mrs)
+        scenarios = list(family.by_size())
+        sizes = [len(scenario) for scenario in scenarios]
+        assert sizes == sorted(sizes)
+        assert len(set(scenarios)) == len(scenarios) == len(family)
+        assert set(scenarios) == set(family)
+        assert set(scenarios) == {
+            frozenset(var for var, val in assignment.items() if val)
+            for assignment in bdd.pick_iter(mrs)}
+
+
+def test_scenarios_are_generated_lazily():
+    bdd = cudd.BDD()
+    # Every scenario picks one of two events from each of 30 pairs, which
+    # gives 2^30 scenarios of the same size
+    pairs = [(f"a{i}", f"b{i}") for i in range(30)]
+    bdd.declare(*itertools.chain(*pairs))
+    f = bdd.add_expr(" & ".join(f"({a} | {b})" for a, b in pairs))
+    mrs = minimal_solutions(bdd, f, f.support)
+
+    family = ScenarioFamily.from_bdd(bdd, mrs)
+    assert family.count() == 2 ** 30
+    first = list(itertools.islice(family.by_size(), 5))
+    assert len(first) == 5
+    assert all(len(scenario) == 30 for scenario in first)
+
+
+def test_limit_and_count_only(capsys):
+    execute_str(MODELS, scenarios=ScenarioOptions(limit=2))
+    out = capsys.readouterr().out
+    assert "A1" in out and "A21" in out and "A31" not in out
+    assert out.count("    - ") == 2
+    assert "... and 1 more" in out
+
+    execute_str(MODELS, scenarios=ScenarioOptions(count_only=True))
+    out = capsys.readouterr().out
+    assert "Number of Minimal Risk Scenarios: 3" in out
+    assert "    - " not in out
+
+
+def test_ndjson_and_csv_records():
+    stream = io.StringIO()
+    execute_str(MODELS, scenarios=ScenarioOptions(format="ndjson",
+                                                  stream=stream))
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records == [
+        {"formula": 1, "size": 1, "scenario": ["A1"]},
+        {"formula": 1, "size": 2, "scenario": ["A21", "A22"]},
+        {"formula": 1, "size": 3, "scenario": ["A31", "A32", "A33"]},
+    ]
+
+    stream = io.StringIO()
+    execute_str(MODELS + "{}[[A2 || B]];",
+                scenarios=ScenarioOptions(limit=1, format="csv",
+                                          stream=stream))
+    assert stream.getvalue().splitlines() == [
+        "formula,size,scenario,probability",
+        "1,1,A1,",
+        "2,1,B,",
+    ]
+
+
+def with_probabilities(models, probabilities):
+    for node, probability in probabilities.items():
+        models = models.replace(f"\n{node};", f"\n{node} prob={probability};")
+    return models
+
+
+PROBABILITY_MODELS = with_probabilities(
+    MODELS.replace("{}[[A]];", ""),
+    {"A1": 0.01, "A21": 0.5, "A22": 0.5, "A31": 0.9, "A32": 0.9, "A33": 0.9})
+
+
+def records(formulas, **options):
+    stream = io.StringIO()
+    execute_str(PROBABILITY_MODELS + formulas,
+                scenarios=ScenarioOptions(format="ndjson", stream=stream,
+                                          **options))
+    return [(record["scenario"], record.get("probability"))
+            for record in map(json.loads, stream.getvalue().splitlines())]
+
+
+def test_truncated_queries():
+    assert records("{}[[A]] order=2;") == [(["A1"], None),
+                                           (["A21", "A22"], None)]
+    assert records("{}[[A]] prob=0.25;") == [(["A21", "A22"], 0.25),
+                                             (["A31", "A32", "A33"],
+                                              pytest.approx(0.729))]
+    assert records("{}[[A]] order=2 prob=0.2;") == [(["A21", "A22"], 0.25)]
+    # The most likely scenarios first
+    assert records("{}[[A]] top=2;") == [(["A31", "A32", "A33"],
+                                          pytest.approx(0.729)),
+                                         (["A21", "A22"], 0.25)]
+
+
+def test_truncation_defaults_from_options():
+    truncation = Truncation(order=1)
+    assert records("{}[[A]];", truncation=truncation) == [(["A1"], None)]
+    assert records("{}[[A]] order=3 top=1;", truncation=truncation) == [
+        (["A31", "A32", "A33"], pytest.approx(0.729))]
+
+
+def test_truncation_with_intermediate_evidence(transform_disruption_tree_str,
+                                               parse_rule):
+    attack_tree = transform_disruption_tree_str("""
+    toplevel A;
+    A or A1 A2 A3;
+    A1 prob=0.01;
+    A2 and A21 A22;
+    A21 prob=0.5;
+    A22 prob=0.5;
+    A3 and A31 A32;
+    A31 prob=0.9;
+    A32 prob=0.9;
+    """)
+    fault_tree = transform_disruption_tree_str("toplevel B; B;")
+    formula = parse_rule("A", "layer1_formula")
+
+    # The intermediate nodes A2 and A3 have no probability, but evidence
+    # fixes their values
+    family = layer1_scenario_family(formula, {}, attack_tree, fault_tree,
+                                    ObjectGraph(), evidence={"A3": False},
+                                    truncation=Truncation(top=2))
+    assert list(truncated_scenarios(family, top=2)) == [
+        (frozenset({"A21", "A22"}), Fraction(1, 4)),
+        (frozenset({"A1"}), Fraction(1, 100))]
+    assert layer1_compute_all(formula, {}, attack_tree, fault_tree,
+                              ObjectGraph(), evidence={"A2": True},
+                              truncation=Truncation(
+                                  probability=Fraction(1, 2))) == {
+        frozenset()}
+
+
+def test_truncation_needs_probabilities(capsys):
+    execute_str(MODELS.replace("{}[[A]]", "{}[[A]] prob=0.1"))
+    assert "Node 'A1' in the attack tree has no probability value" in \
+           capsys.readouterr().err
@@ -0,0 +1,66 @@
+from odf.checker.context import ModelContext
+from odf.checker.layer1.layer1_bdd import Layer1BDDInterpreter
+
+
+def test_context_declares_all_variables(paper_example_models):
+    attack_tree, fault_tree, object_graph = paper_example_models
+    context = ModelContext(attack_tree, fault_tree, object_graph)
+
+    assert set(context.bdd.vars) == (set(object_graph.object_properties) |
+                                     set(attack_tree.nodes) |
+                                     set(fault_tree.nodes))
+
+
+def test_context_manager_is_shared(paper_example_models, parse_rule):
+    attack_tree, fault_tree, object_graph = paper_example_models
+    context = ModelContext(attack_tree, fault_tree, object_graph)
+
+    first = Layer1BDDInterpreter(attack_tree, fault_tree, object_graph,
+                                 context=context)
+    second = Layer1BDDInterpreter(attack_tree, fault_tree, object_graph,
+                                  context=context)
+    assert first.bdd is second.bdd is context.bdd
+
+    formula = parse_rule("FD && DGB", "layer1_formula")
+    assert first.interpret(formula) == second.interpret(formula)
+
+
+def test_properties_on_top_restores_order(paper_example_models):
+    attack_tree, fault_tree, object_graph = paper_example_models
+    context = ModelContext(attack_tree, fault_tree, object_graph)
+    manager = context.bdd
+
+    # Move all events above the object properties
+    order = [*context.event_nodes, *context.object_properties]
+    manager.reorder({var: level for level, var in enumerate(order)})
+
+    with context.properties_on_top():
+        levels = manager.var_levels
+        assert (max(levels[prop] for prop in context.object_properties) <
+                min(levels[node] for node in context.event_nodes))
+        assert not manager.configure()["reordering"]
+
+    assert manager.configure()["reordering"]
+
+
+def test_reordering_keeps_blocks_together(paper_example_models, parse_rule):
+    attack_tree, fault_tree, object_graph = paper_example_models
+    context = ModelContext(attack_tree, fault_tree, object_graph)
+    manager = context.bdd
+
+    interpreter = Layer1BDDInterpreter(attack_tree, fault_tree, object_graph,
+                                       context=context)
+    interpreter.interpret(parse_rule("Attacker_breaks_in_house || FD",
+                                     "layer1_formula"))
+    manager.reorder()
+
+    levels = manager.var_levels
+    for block in (context.object_properties, context.event_nodes):
+        block_levels = sorted(levels[var] for var in block)
+        assert block_levels == list(range(block_levels[0],
+                                          block_levels[0] + len(block)))
+
+    with context.properties_on_top():
+        levels = manager.var_levels
+        assert (max(levels[prop] for prop in context.object_properties) <
+                min(levels[node] for node in context.event_nodes))
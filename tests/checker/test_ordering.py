@@ -0,0 +1,57 @@
+import pytest
+
+from odf.checker.context import ModelContext
+from odf.checker.ordering import ORDERINGS, variable_order
+
+
+@pytest.fixture
+def models(transform_disruption_tree_str, transform_object_graph_str):
+    object_graph = transform_object_graph_str("O properties=[p, q, r];")
+    attack_tree = transform_disruption_tree_str("""
+    toplevel A;
+    A or A2 A1;
+    A2 or A1 A3;
+    A1 objects=[O] cond=(r);
+    A3 objects=[O] cond=(q && p);
+    """, object_graph)
+    fault_tree = transform_disruption_tree_str("""
+    toplevel B;
+    B and B1 B2;
+    B1; B2;
+    """, object_graph)
+    return attack_tree, fault_tree, object_graph
+
+
+@pytest.mark.parametrize("ordering, expected", [
+    ("declaration", (["p", "q", "r"],
+                     ["B", "B1", "B2", "A", "A2", "A1", "A3"])),
+    ("dfs", (["p", "q", "r"], ["B", "B1", "B2", "A", "A2", "A1", "A3"])),
+    # A1 has weight 1/2 + 1/4 through both of its parents, A2 only 1/2
+    ("fanin", (["p", "q", "r"], ["B", "B1", "B2", "A", "A1", "A2", "A3"])),
+    ("interleave", (["r", "p", "q"],
+                    ["B", "B1", "B2", "A", "A2", "A1", "A3"])),
+])
+def test_variable_order(models, ordering, expected):
+    assert variable_order(*models, ordering) == expected
+
+
+def test_unknown_ordering(models):
+    with pytest.raises(ValueError, match="Unknown variable ordering"):
+        variable_order(*models, "random")
+
+
+@pytest.mark.parametrize("ordering", ORDERINGS)
+def test_context_declares_properties_on_top(paper_example_models, ordering):
+    context = ModelContext(*paper_example_models, ordering)
+    levels = context.bdd.var_levels
+
+    order = [*context.object_properties, *context.event_nodes]
+    assert sorted(levels, key=levels.__getitem__) == order
+    assert len(context.object_properties) == len(
+        paper_example_models[2].object_properties)
+
+
+def test_default_ordering_is_deterministic(paper_example_models):
+    first = ModelContext(*paper_example_models)
+    second = ModelContext(*paper_example_models)
+    assert first.bdd.var_levels == second.bdd.var_levels
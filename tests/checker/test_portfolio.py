@@ -0,0 +1,90 @@
+import pytest
+
+from odf.checker.context import ModelContext
+from odf.checker.exceptions import NodeBudgetExceededError
+from odf.checker.layer1.layer1_bdd import Layer1BDDInterpreter
+from odf.checker.portfolio import Portfolio, build_size
+
+FORMULA = "Attacker_breaks_in_house && (FD || DGB)"
+
+
+def test_build_size_within_budget(paper_example_models, parse_rule):
+    formula = parse_rule(FORMULA, "layer1_formula")
+    context = ModelContext(*paper_example_models)
+    order = context.current_order()
+
+    size = build_size(paper_example_models, {}, formula, order, 10_000)
+    interpreter = Layer1BDDInterpreter(*paper_example_models, context=context)
+    assert size == len(interpreter.interpret(formula))
+    assert build_size(paper_example_models, {}, formula, order, 1) is None
+
+
+def test_budget_exceeded(paper_example_models, parse_rule):
+    interpreter = Layer1BDDInterpreter(*paper_example_models, node_budget=1)
+    with pytest.raises(NodeBudgetExceededError):
+        interpreter.interpret(parse_rule(FORMULA, "layer1_formula"))
+
+
+def equivalences(context: ModelContext) -> str:
+    """Return a formula of equivalences between the first and the last basic
+    events, which blows up when the events are ordered like this."""
+    basic_events = [name for name in context.event_nodes
+                    if any(tree.has_node(name) and
+                           tree.nodes[name]["data"].gate_type is None
+                           for tree in (context.attack_tree,
+                                        context.fault_tree))]
+    return " && ".join(f"({a} == {b})" for a, b in
+                       zip(basic_events, reversed(basic_events))
+                       if a < b)
+
+
+@pytest.mark.parametrize("pick", ["first", "smallest"])
+def test_race_adopts_order(paper_example_models, parse_rule, pick):
+    declaration = ModelContext(*paper_example_models, "declaration")
+    formula = parse_rule(equivalences(declaration), "layer1_formula")
+    sizes = {name: build_size(paper_example_models, {}, formula, order,
+                              10_000)
+             for name, order in Portfolio(2).candidates(declaration).items()}
+    # Only the orders in which the formula is smaller than in the declaration
+    # order fit in the budget
+    budget = min(sizes.values())
+    assert budget < sizes["current"]
+
+    portfolio = Portfolio(2, budget, pick)
+    context = ModelContext(*paper_example_models, "declaration",
+                           portfolio=portfolio)
+    context.bdd.configure(reordering=False)
+    candidates = portfolio.candidates(context)
+    race = portfolio.race
+    winners = []
+    portfolio.race = lambda *args: winners.append(race(*args))
+    result = Layer1BDDInterpreter(*paper_example_models,
+                                  context=context).interpret(formula)
+    assert context.order_searched
+    assert sizes[winners[0]] == budget
+    assert context.current_order() == candidates[winners[0]]
+    assert len(result) == budget
+
+
+def test_earlier_formulas_do_not_count(paper_example_models, parse_rule):
+    formula = parse_rule(FORMULA, "layer1_formula")
+    fresh = ModelContext(*paper_example_models)
+    size = len(Layer1BDDInterpreter(*paper_example_models,
+                                    context=fresh).interpret(formula))
+
+    portfolio = Portfolio(2, size + 10)
+    context = ModelContext(*paper_example_models, "declaration",
+                           portfolio=portfolio)
+    context.bdd.configure(reordering=False)
+    manager = context.bdd
+    # Fill the shared manager with a BDD that does not fit in the budget
+    events = context.event_nodes
+    filler = manager.add_expr(" & ".join(
+        f"({a} <-> {b})" for a, b in zip(events, reversed(events))))
+    assert len(manager) > portfolio.node_budget
+
+    portfolio.race = lambda *args: pytest.fail("the order was searched")
+    Layer1BDDInterpreter(*paper_example_models,
+                         context=context).interpret(formula)
+    assert not context.order_searched
+    del filler
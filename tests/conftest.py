@@ -6,7 +6,7 @@ from pathlib import Path
 import pytest
 from lark import Lark
 
-from odf.__main__ import validate_models
+from odf.models.validation import validate_models
 from odf.checker.layer1.check_layer1 import layer1_check, \
     layer1_compute_all
 from odf.checker.layer1.layer1_bdd import Layer1BDDInterpreter
@@ -32,7 +32,8 @@ def grammar_text(grammar_path):
 @pytest.fixture(scope="session")
 def parser(grammar_text):
     """Lark parser instance."""
-    return Lark(grammar_text, maybe_placeholders=False, strict=True)
+    return Lark(grammar_text, parser="lalr", lexer="contextual",
+                maybe_placeholders=False)
 
 
 @pytest.fixture(scope="session")
@@ -40,8 +41,8 @@ def make_parser(grammar_text):
     """Create a parser with a specific start rule."""
 
     def _make_parser(start):
-        return Lark(grammar_text, start=start, maybe_placeholders=False,
-                    strict=True)
+        return Lark(grammar_text, start=start, parser="lalr",
+                    lexer="contextual", maybe_placeholders=False)
 
     return _make_parser
 
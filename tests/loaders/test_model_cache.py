@@ -0,0 +1,92 @@
+import logging
+
+from odf.__main__ import execute_str
+from odf.loaders import model_cache
+from odf.loaders.model_cache import model_key, load_models, cache_file_for
+from odf.transformers.object_graph import ObjectGraphTransformer
+
+MODELS = """
+[dog.attack_tree]
+toplevel A;
+A and A1 A2;
+A1 objects=[C] cond=(p);
+A2;
+
+[dog.fault_tree]
+toplevel B;
+B;
+
+[dog.object_graph]
+C properties=[p];
+"""
+
+
+def test_model_key_ignores_formulas():
+    key = model_key(MODELS + "[formulas] {p: 1} A;")
+    assert key == model_key(MODELS + "[formulas] {p: 0} A && B;")
+    assert key != model_key(MODELS.replace("A2;", "A2 prob=0.5;") +
+                            "[formulas] {p: 1} A;")
+    assert model_key("garbage" + MODELS + "[formulas] {p: 1} A;") is None
+
+
+def test_models_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    cache_file = cache_file_for(tmp_path / "model.odf")
+    assert cache_file.parent == tmp_path / "cache" / "odf" / "models"
+    assert cache_file != cache_file_for(tmp_path / "other" / "model.odf")
+    execute_str(MODELS + "[formulas] {p: 1} A;", check_syntax=True,
+                cache_file=cache_file)
+
+    attack_tree, fault_tree, object_graph = load_models(
+        cache_file, model_key(MODELS + "[formulas] {p: 1} A;"))
+    assert set(attack_tree.nodes) == {"A", "A1", "A2"}
+    assert attack_tree.get_basic_descendants("A") == {"A1", "A2"}
+    assert object_graph.has_object_property("p")
+    # Conditions keep referring to the cached object graph's properties
+    assert attack_tree.nodes["A1"]["data"].object_properties == {"p"}
+
+    assert load_models(cache_file, "other key") is None
+    assert load_models(tmp_path / "missing.odfc", "key") is None
+
+
+def test_cached_models_are_not_rebuilt(tmp_path, monkeypatch, capsys):
+    cache_file = tmp_path / "model.odfc"
+    execute_str(MODELS + "[formulas] {p: 1} A;", cache_file=cache_file)
+
+    def fail(*_):
+        raise AssertionError("models were rebuilt")
+
+    monkeypatch.setattr(ObjectGraphTransformer, "transform", fail)
+    capsys.readouterr()
+    execute_str(MODELS + "[formulas] {p: 0} A;", cache_file=cache_file)
+    assert "Processing Formula 1" in capsys.readouterr().out
+
+
+def test_unwritable_cache_file(tmp_path):
+    cache_file = tmp_path / "missing" / "model.odfc"
+    execute_str(MODELS + "[formulas] {p: 1} A;", check_syntax=True,
+                cache_file=cache_file)
+    assert not cache_file.exists()
+
+
+def test_cache_of_other_layout_is_ignored(tmp_path, monkeypatch):
+    text = MODELS + "[formulas] {p: 1} A;"
+    cache_file = tmp_path / "model.odfc"
+    with monkeypatch.context() as m:
+        m.setattr(model_cache, "CACHE_VERSION", model_cache.CACHE_VERSION - 1)
+        execute_str(text, check_syntax=True, cache_file=cache_file)
+        assert load_models(cache_file, model_key(text)) is not None
+    key = model_key(text)
+    assert load_models(cache_file, key) is None
+
+    # Changing the model classes changes the key without bumping the version
+    monkeypatch.setattr(model_cache, "layout_digest", lambda: "other classes")
+    assert model_key(text) != key
+
+
+def test_corrupt_cache_is_a_miss(tmp_path, caplog):
+    cache_file = tmp_path / "model.odfc"
+    cache_file.write_bytes(b"not a pickle")
+    with caplog.at_level(logging.DEBUG, logger="odf"):
+        assert load_models(cache_file, "key") is None
+    assert "Not using model cache" in caplog.text
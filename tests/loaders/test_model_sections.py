@@ -0,0 +1,106 @@
+import pytest
+from lark.exceptions import UnexpectedInput
+
+from odf.loaders.odf_file import load_sections, extract_parse_trees, \
+    transform_models, load_str
+from odf.models.exceptions import ModelErrors
+from odf.models.validation import validate_models
+from odf.parser.parser import parse
+from odf.transformers.exceptions import MyVisitError
+
+MODELS = """
+[dog.attack_tree]
+toplevel A; // the root
+A AND A1 A2;
+A1 prob = 0.5 objects=[C, D] cond=((p && !q) || (q => p)) impact=3;
+A2 cond=(p && !q);
+A3 Or A4 A5;
+A2 and A3;
+A4; A5 prob=.25;
+
+[dog.fault_tree]
+toplevel B;
+B or B1 A2_;
+B1 OBJECTS=[] PROB=1.;
+A2_;
+
+[dog.object_graph]
+C has D E;
+D properties=[p];
+E PROPERTIES = [ q , r ];
+C;
+"""
+
+
+def load_lark(text):
+    attack, fault, objects, formulas = extract_parse_trees(parse(text), False)
+    return transform_models(attack, fault, objects), formulas
+
+
+def attributes(node):
+    return {slot: getattr(node, slot) for slot in type(node).__slots__}
+
+
+def assert_same_graph(graph1, graph2):
+    assert list(graph1.nodes) == list(graph2.nodes)
+    assert list(graph1.edges) == list(graph2.edges)
+    for node in graph1.nodes:
+        assert attributes(graph1.nodes[node]["data"]) == attributes(
+            graph2.nodes[node]["data"])
+
+
+@pytest.mark.parametrize("formulas", ["", "[formulas] {} A;"])
+def test_same_models_as_lark(formulas):
+    fast, fast_formulas = load_sections(MODELS + formulas, False)
+    lark, lark_formulas = load_lark(MODELS + formulas)
+    assert fast_formulas == lark_formulas
+    for fast_graph, lark_graph in zip(fast, lark):
+        assert_same_graph(fast_graph, lark_graph)
+
+
+@pytest.mark.parametrize("old, new", [
+    ("A4;", "A4; A4 prob=0.1;"),
+    ("A3 Or", "A Or"),
+    ("cond=(p && !q)", "cond=(p) cond=(q)"),
+    ("prob=.25", "prob=1.25"),
+    ("[C, D]", "[C, F]"),
+    ("A2 and A3;", ""),
+    ("A3 Or A4 A5;", "A3 Or A4 A5; A3 and A4;"),
+    ("C;", "C; C;"),
+    ("[p]", "[p, q]"),
+    ("C has D E;", "C has D E; C has E;"),
+    ("E PROPERTIES", "D PROPERTIES"),
+])
+def test_same_errors_as_lark(old, new):
+    text = MODELS.replace(old, new)
+    with pytest.raises((MyVisitError, ModelErrors)) as fast_error:
+        validate_models(*load_sections(text, False)[0], structure=True)
+    with pytest.raises((MyVisitError, ModelErrors)) as lark_error:
+        validate_models(*load_lark(text)[0], structure=True)
+    assert type(fast_error.value) is type(lark_error.value)
+    assert getattr(fast_error.value, "part", None) == \
+           getattr(lark_error.value, "part", None)
+    assert str(fast_error.value) == str(lark_error.value)
+
+
+@pytest.mark.parametrize("old, new", [
+    # Valid, but not accepted by the fast loader
+    ("A AND A1", "A ANDA1"),
+    ("toplevel A;", "toplevelA;"),
+    # Invalid
+    ("A4;", "A4"),
+    ("prob=.25", "prob=0.2.5"),
+    ("cond=(p && !q)", "cond=(p && )"),
+    ("cond=(p && !q)", "cond=(p && q"),
+    ("[formulas] {} A;", "[formulas] {} A"),
+])
+def test_falls_back_to_lark(old, new):
+    text = (MODELS + "[formulas] {} A;").replace(old, new)
+    assert load_sections(text) is None
+
+
+def test_lark_reports_syntax_errors():
+    text = MODELS.replace("prob=.25", "prob=0.2.5") + "[formulas] {} A;"
+    with pytest.raises(UnexpectedInput) as e:
+        load_str(text)
+    assert e.value.line == MODELS.count("\n", 0, MODELS.index("prob=.25")) + 1
@@ -0,0 +1,67 @@
+import json
+
+from odf.__main__ import execute_str, model_context
+from odf.loaders.odf_file import load_str
+from odf.loaders.order_cache import OrderFiles, models_key, load_order, \
+    save_order, order_file_for
+
+MODELS = """
+[dog.attack_tree]
+toplevel A;
+A and A1 A2;
+A1 objects=[C] cond=(p && q);
+A2;
+
+[dog.fault_tree]
+toplevel B;
+B;
+
+[dog.object_graph]
+C properties=[p, q];
+"""
+
+
+def test_models_key_ignores_formulas():
+    models, _ = load_str(MODELS + "[formulas] {p: 1} A;")
+    same, _ = load_str(MODELS + "[formulas] {p: 0} A && B;")
+    other, _ = load_str(MODELS.replace("\nB;", "\nB or B1;\nB1;") +
+                        "[formulas] {p: 1} A;")
+    assert models_key(models) == models_key(same)
+    assert models_key(models) != models_key(other)
+
+
+def test_order_saved_and_reused(tmp_path):
+    order_file = order_file_for(tmp_path / "model.odf")
+    assert order_file == tmp_path / "model.odfo"
+    orders = OrderFiles(order_file, order_file)
+    execute_str(MODELS + "[formulas] {p: 1, q: 1} A;", orders=orders)
+
+    models, _ = load_str(MODELS + "[formulas] {p: 1} A;")
+    saved = load_order(order_file, models_key(models))
+    assert sorted(saved) == ["A", "A1", "A2", "B", "p", "q"]
+
+    # A saved order is split into blocks, keeping the properties on top
+    save_order(order_file, models_key(models),
+               ["A2", "q", "A1", "B", "A", "p"])
+    context = model_context(models, "dfs", orders)
+    assert context.current_order() == ["q", "p", "A2", "A1", "B", "A"]
+
+
+def test_orders_of_other_models_kept(tmp_path):
+    order_file = tmp_path / "orders.json"
+    save_order(order_file, "first", ["a", "b"])
+    save_order(order_file, "second", ["c"])
+    assert load_order(order_file, "first") == ["a", "b"]
+    assert load_order(order_file, "second") == ["c"]
+    assert load_order(tmp_path / "missing.json", "first") is None
+
+
+def test_mismatched_order_ignored(tmp_path):
+    order_file = tmp_path / "orders.json"
+    models, _ = load_str(MODELS + "[formulas] {p: 1} A;")
+    save_order(order_file, models_key(models), ["A", "p"])
+    context = model_context(models, "dfs", OrderFiles(order_file))
+    assert context.current_order() == ["p", "q", "B", "A", "A1", "A2"]
+
+    order_file.write_text(json.dumps({"version": 0, "orders": {}}))
+    assert load_order(order_file, models_key(models)) is None
@@ -0,0 +1,117 @@
+import io
+from fractions import Fraction
+
+import pytest
+
+from odf.__main__ import execute_import
+from odf.loaders.odf_file import load_str
+from odf.loaders.structured import load_json, load_csv
+from odf.models.exceptions import ModelDataError, CrossReferenceError
+
+ODF = """
+[dog.attack_tree]
+toplevel A;
+A and A1 A2;
+A1 prob=0.1 objects=[C] cond=(p && !q);
+A2 prob=0.2 impact=3;
+
+[dog.fault_tree]
+toplevel B;
+B or B1 B2;
+B1 prob=1 objects=[D] cond=(p && !q);
+B2 prob=0.5 objects=[];
+
+[dog.object_graph]
+C has D;
+D properties=[p, q];
+"""
+
+JSON = """{
+  "attack_tree": [
+    {"name": "A", "gate": "and", "children": ["A1", "A2"]},
+    {"name": "A1", "prob": 0.1, "objects": ["C"], "cond": "p && !q"},
+    {"name": "A2", "prob": "0.2", "impact": 3}
+  ],
+  "fault_tree": [
+    {"name": "B", "gate": "or", "children": ["B1", "B2"]},
+    {"name": "B1", "prob": 1, "objects": ["D"], "cond": "p && !q"},
+    {"name": "B2", "prob": 0.5, "objects": []}
+  ],
+  "object_graph": [
+    {"name": "C", "children": ["D"]},
+    {"name": "D", "properties": ["p", "q"]}
+  ]
+}"""
+
+CSV = """model,name,gate,children,prob,impact,objects,cond,properties
+object_graph,C,,D,,,,,
+object_graph,D,,,,,,,p q
+attack_tree,A,and,A1 A2,,,,,
+attack_tree,A1,,,0.1,,C,p && !q,
+attack_tree,A2,,,0.2,3,,,
+fault_tree,B,or,B1 B2,,,,,
+fault_tree,B1,,,1,,D,p && !q,
+fault_tree,B2,,,0.5,,,,
+"""
+
+
+def attributes(node):
+    return {slot: getattr(node, slot) for slot in type(node).__slots__}
+
+
+def assert_same_models(models1, models2):
+    for graph1, graph2 in zip(models1, models2):
+        assert list(graph1.nodes) == list(graph2.nodes)
+        assert list(graph1.edges) == list(graph2.edges)
+        for node in graph1.nodes:
+            data1 = attributes(graph1.nodes[node]["data"])
+            data2 = attributes(graph2.nodes[node]["data"])
+            if "objects" in data1 and data1["objects"] == set():
+                # An empty list in a CSV cell is indistinguishable from a
+                # missing one
+                data1["objects"] = data2["objects"]
+            assert data1 == data2
+
+
+def test_json_same_as_odf():
+    models, _ = load_str(ODF, with_formulas=False)
+    imported = load_json(JSON)
+    assert_same_models(imported, models)
+    assert imported[0].nodes["A1"]["data"].probability == Fraction(1, 10)
+
+
+def test_csv_same_as_odf():
+    models, _ = load_str(ODF, with_formulas=False)
+    assert_same_models(models, load_csv(io.StringIO(CSV)))
+
+
+@pytest.mark.parametrize("old, new, message", [
+    ('"fault_tree"', '"fault_trees"', "Model 'fault_tree' is missing"),
+    ('"impact": 3', '"impakt": 3', "Unknown key(s) impakt"),
+    ('"gate": "or"', '"gate": "xor"', "must be 'and' or 'or'"),
+    ('"prob": "0.2"', '"prob": "high"', "must be a number"),
+    ('"p && !q"}', '"p &&"}', "Invalid condition of 'A1'"),
+    ('"objects": ["C"]', '"objects": ["E"]',
+     "Error in attack tree: A non-existing object 'E'"),
+    ('"prob": 1,', '"prob": 2,', "Error in fault tree: "),
+    ('{"name": "D", "properties": ["p", "q"]}',
+     '{"name": "D", "properties": ["p", "q"]}, {"name": "D"}',
+     "Error in object graph: Basic object 'D' is already defined"),
+])
+def test_invalid_json(old, new, message):
+    with pytest.raises(ModelDataError, match=message.replace("(", r"\(")
+            .replace(")", r"\)")):
+        load_json(JSON.replace(old, new))
+
+
+def test_invalid_references():
+    with pytest.raises(CrossReferenceError):
+        load_json(JSON.replace('"B1"', '"A1"'))
+
+
+def test_execute_import(capsys):
+    execute_import(io.StringIO(JSON), "json",
+                   io.StringIO("{}[[A]];\n{p: 1, q: 0}[[B]];"))
+    output = capsys.readouterr().out
+    assert "Processing Formula 2" in output
+    assert "{B1}" in output.replace("\x1b[36m", "").replace("\x1b[0m", "")
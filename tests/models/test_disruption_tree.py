@@ -1,5 +1,6 @@
 import pytest
 
+from odf.models import tree_graph
 from odf.models.disruption_tree import DisruptionTree, DTNode
 
 
@@ -151,3 +152,78 @@ def test_participant_nodes(fault_tree_paper_example, attack_tree_paper_example):
         "Inhabitant") == to_nodes(a, {"Attacker_breaks_in_house"})
     assert fault_tree_paper_example.participant_nodes("Inhabitant") == to_nodes(
         f, {"Fire_and_impossible_escape", "FBO"})
+
+
+def test_descendant_queries(complex_dag):
+    assert complex_dag.get_descendants('A') == {'A', 'C', 'D', 'G'}
+    assert complex_dag.get_strict_descendants('A') == {'C', 'D', 'G'}
+    assert complex_dag.get_basic_descendants('A') == {'C', 'G'}
+    assert complex_dag.get_basic_descendants('G') == {'G'}
+    assert complex_dag.get_ancestors('G') == {'G', 'D', 'F', 'A', 'B', 'Root'}
+
+
+def test_reachability_index_rebuilt_on_change(basic_tree):
+    assert basic_tree.get_descendants('C') == {'C'}
+    index = basic_tree.reachability()
+    assert basic_tree.reachability() is index
+
+    basic_tree.add_node('F', data=DTNode(name='F'))
+    basic_tree.add_edge('C', 'F')
+    assert basic_tree.reachability() is not index
+    assert basic_tree.get_descendants('C') == {'C', 'F'}
+    assert basic_tree.get_basic_descendants('Root') == {'D', 'E', 'F'}
+
+
+def test_modules(complex_dag, dag_with_shared_child):
+    assert complex_dag.modules() == {'Root', 'C', 'E', 'G'}
+    assert dag_with_shared_child.modules() == {'Root', 'C', 'A'}
+
+
+def test_compact(complex_dag):
+    compact = complex_dag.compact()
+    assert compact is complex_dag.compact()
+    assert set(compact.names) == set(complex_dag.nodes)
+    for i, name in enumerate(compact.names):
+        assert compact.data[i] is complex_dag.nodes[name]["data"]
+        assert [compact.names[c] for c in compact.children_of(i)] == list(
+            complex_dag.successors(name))
+        assert {compact.names[p] for p in compact.parents_of(i)} == set(
+            complex_dag.predecessors(name))
+        # Parents are numbered before their children
+        assert all(c > i for c in compact.children_of(i))
+        assert compact.is_leaf(i) == (complex_dag.out_degree(name) == 0)
+    assert compact.node('G') is complex_dag.nodes['G']["data"]
+
+    complex_dag.remove_edge('F', 'G')
+    assert complex_dag.compact() is not compact
+
+
+def test_reachability_of_large_tree():
+    tree = DisruptionTree()
+    size = 20000
+    for i in range(size):
+        tree.add_node(f"N{i}", data=DTNode(name=f"N{i}"))
+    for i in range(1, size):
+        tree.add_edge(f"N{(i - 1) // 3}", f"N{i}")
+    tree.validate_tree()
+
+    # Subtrees are numbered contiguously, so the bitsets stay small
+    index = tree.reachability()
+    assert sum(mask.bit_length() for mask in index.descendants) < size * 20
+    assert len(tree.get_descendants("N0")) == size
+    assert tree.get_ancestors(f"N{size - 1}") == {
+        "N19999", "N6666", "N2221", "N740", "N246", "N81", "N26", "N8", "N2",
+        "N0"}
+
+
+def test_decoded_sets_are_bounded(complex_dag, monkeypatch):
+    monkeypatch.setattr(tree_graph, "MAX_DECODED_SETS", 2)
+    index = complex_dag.reachability()
+    first = index.to_set(0b1)
+    index.to_set(0b10)
+    assert index.to_set(0b1) is first
+    index.to_set(0b11)
+    assert len(index._sets) == 2
+    # The least recently used set was dropped, the re-used one was kept
+    assert (0, 0b10) not in index._sets
+    assert (0, 0b1) in index._sets
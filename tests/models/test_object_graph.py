@@ -0,0 +1,13 @@
+def test_property_owners(object_graph_paper_example):
+    owners = object_graph_paper_example.property_owners()
+    assert owners["HS"] == "House"
+    assert object_graph_paper_example.has_object_property("HS")
+    assert not object_graph_paper_example.has_object_property("House")
+    assert set(object_graph_paper_example.object_properties) == set(owners)
+
+
+def test_get_parts(object_graph_paper_example):
+    parts = object_graph_paper_example.get_parts("House")
+    assert parts == {"House", "Door", "Lock"}
+    assert object_graph_paper_example.get_parts("House") is parts
+    assert object_graph_paper_example.get_parts("Lock") == {"Lock"}
@@ -1,9 +1,11 @@
 import pytest
 from lark.exceptions import VisitError
 
-from odf.models.exceptions import CrossReferenceError
+from odf.__main__ import main
+from odf.models.exceptions import CrossReferenceError, CrossReferenceErrors, \
+    ModelErrors
 from odf.models.validation import validate_disruption_tree_references, \
-    validate_unique_node_names
+    validate_unique_node_names, validate_models
 from odf.parser.parser import parse
 from odf.transformers.disruption_tree import DisruptionTreeTransformer
 from odf.transformers.object_graph import ObjectGraphTransformer
@@ -244,3 +246,79 @@ def test_complex_conditions():
 
     # Should not raise any exceptions
     validate_disruption_tree_references(attack_tree, object_graph)
+
+
+def test_all_problems_reported():
+    odl_text = """
+    [dog.attack_tree]
+    toplevel Root;
+    Root and A B;
+    A objects=[House] cond=(LP);
+    B cond=(HS);
+
+    [dog.fault_tree]
+    toplevel FRoot;
+    FRoot objects=[Lock];
+
+    [dog.object_graph]
+    House properties=[HS];
+    Lock properties=[LP, A];
+    """
+
+    parse_tree = parse(odl_text)
+    trees = parse_tree.children
+    object_graph = ObjectGraphTransformer().transform(trees[2])
+    attack_tree = DisruptionTreeTransformer(object_graph).transform(trees[0])
+    fault_tree = DisruptionTreeTransformer(object_graph).transform(trees[1])
+
+    with pytest.raises(CrossReferenceErrors) as exc_info:
+        validate_models(attack_tree, fault_tree, object_graph)
+    assert [str(error) for error in exc_info.value.errors] == [
+        "Property name 'A' conflicts with existing node name",
+        "Node 'A' references property 'LP' which doesn't exist in any of its"
+        " objects {'House'}",
+        "Node 'B' has properties in its condition but no associated objects",
+    ]
+    assert str(exc_info.value).startswith("Found 3 problems:")
+
+
+def test_structure_and_reference_errors_together(capsys):
+    odl_text = """
+    [dog.attack_tree]
+    toplevel Root;
+    Root or A B;
+    A and B Root;
+    B objects=[House] cond=(Missing);
+
+    [dog.fault_tree]
+    toplevel FRoot;
+
+    [dog.object_graph]
+    House properties=[HS];
+    """
+
+    trees = parse(odl_text).children
+    object_graph = ObjectGraphTransformer().transform(trees[2])
+    attack_tree = DisruptionTreeTransformer(
+        object_graph, validate=False).transform(trees[0])
+    fault_tree = DisruptionTreeTransformer(
+        object_graph, validate=False).transform(trees[1])
+
+    # Without validating the structure, only the reference is reported
+    with pytest.raises(CrossReferenceError):
+        validate_models(attack_tree, fault_tree, object_graph)
+    with pytest.raises(ModelErrors) as exc_info:
+        validate_models(attack_tree, fault_tree, object_graph,
+                        structure=True)
+    assert [str(error) for error in exc_info.value.errors] == [
+        "Error in attack tree: Graph is not acyclic",
+        "Node 'B' references property 'Missing' which doesn't exist in any"
+        " of its objects {'House'}",
+    ]
+
+    # A single structural problem is reported like the transformer does
+    with pytest.raises(SystemExit):
+        main(odl_text.replace("cond=(Missing)", "cond=(HS)") +
+             "[formulas] {}Root;")
+    assert "Error in attack tree: Graph is not acyclic" in \
+           capsys.readouterr().err
@@ -0,0 +1,21 @@
+import io
+
+from odf.parser.formulas import split_formulas, parse_formula
+
+
+def test_split_formulas():
+    text = """// A comment; with a semicolon
+{}A && B; {} C // another; comment
+  && D;
+
+MostRiskyA(X)"""
+    formulas = list(split_formulas(io.StringIO(text)))
+    assert [formula.line for formula in formulas] == [2, 2, 5]
+    assert [" ".join(formula.text.split()) for formula in formulas] == [
+        "{}A && B", "{} C && D", "MostRiskyA(X)"]
+
+
+def test_parse_formula():
+    assert parse_formula("{A: 1} A && B").data == "layer1_query"
+    assert parse_formula("{} P(A) >= 0.5").data == "layer2_query"
+    assert parse_formula("MostRiskyF(X)").data == "layer3_query"
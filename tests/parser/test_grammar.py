@@ -1,7 +1,11 @@
 from pathlib import Path
 
 import pytest
-from lark import UnexpectedInput
+from lark import UnexpectedInput, Lark
+
+from odf.loaders.odf_file import extract_parse_trees
+from odf.transformers.exceptions import MissingSectionError, \
+    DuplicateSectionError
 
 # Define components as variables for reuse
 ATTACK = """[dog.attack_tree]
@@ -90,7 +94,7 @@ def test_valid_component_orderings(parse):
 
 
 def test_invalid_structures(parse):
-    """Test that invalid structures are rejected."""
+    """Test that files with missing sections are rejected."""
     invalid_cases = [
         # Missing fault tree
         ATTACK + OBJ + FORMULAS,
@@ -103,8 +107,22 @@ def test_invalid_structures(parse):
     ]
 
     for case in invalid_cases:
-        with pytest.raises(UnexpectedInput):
-            parse(case)
+        with pytest.raises(MissingSectionError):
+            extract_parse_trees(parse(case))
+
+
+def test_duplicate_sections(parse):
+    """Test that files with a section defined twice are rejected."""
+    with pytest.raises(DuplicateSectionError) as excinfo:
+        extract_parse_trees(parse(ATTACK + FAULT + OBJ + FORMULAS + FAULT))
+    assert excinfo.value.section == "[dog.fault_tree]"
+
+
+def test_grammar_is_lalr(grammar_text):
+    """Test that the grammar has no LALR conflicts or terminal collisions."""
+    pytest.importorskip("interegular")
+    Lark(grammar_text, parser="lalr", lexer="contextual",
+         maybe_placeholders=False, strict=True)
 
 
 def test_individual_attack_tree(parse_rule):
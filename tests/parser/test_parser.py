@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pytest
+
+from odf.parser.parser import parser, cache_path, GRAMMAR_PATH
+
+
+@pytest.fixture
+def fresh_parser():
+    parser.cache_clear()
+    yield parser
+    parser.cache_clear()
+
+
+def test_parser_cache_written_and_reused(tmp_path, monkeypatch, fresh_parser):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    path = Path(cache_path(GRAMMAR_PATH.read_text()))
+    assert path.parent == tmp_path / "odf"
+
+    fresh_parser().parse("[formulas] {} A;", "start")
+    assert path.exists()
+    written = path.stat().st_mtime_ns
+
+    fresh_parser.cache_clear()
+    fresh_parser().parse("[formulas] {} A;", "start")
+    assert path.stat().st_mtime_ns == written
+
+
+def test_parser_cache_unwritable(tmp_path, monkeypatch, fresh_parser):
+    # A file where the cache directory should be makes it impossible to create
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(not_a_dir))
+
+    assert cache_path(GRAMMAR_PATH.read_text()) is None
+    assert fresh_parser().parse("[formulas] {} A;", "start") is not None
+
+
+def test_parser_cache_stale(tmp_path, monkeypatch, fresh_parser):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    path = Path(cache_path(GRAMMAR_PATH.read_text()))
+    path.write_bytes(b"stale\n")
+
+    assert fresh_parser().parse("[formulas] {} A;", "start") is not None
+    assert path.read_bytes() != b"stale\n"
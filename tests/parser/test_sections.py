@@ -0,0 +1,42 @@
+import pytest
+from lark import UnexpectedInput
+
+from odf.parser.sections import split_sections, parse_section, find_section, \
+    is_blank
+from odf.transformers.exceptions import MissingSectionError
+
+TEXT = """// A comment mentioning [formulas]
+[dog.object_graph]
+C;
+
+[DOG.attack_tree]
+toplevel A;
+A;
+[dog.fault_tree] toplevel B; B;
+[formulas]
+{}A;
+{} B &&;
+"""
+
+
+def test_split_sections():
+    preamble, sections = split_sections(TEXT)
+    assert is_blank(preamble)
+    assert [section.name for section in sections] == [
+        "object_graph", "attack_tree", "fault_tree", "doglog"]
+    fault_tree = find_section(sections, "fault_tree")
+    assert TEXT[fault_tree.start:fault_tree.end] == \
+           "[dog.fault_tree] toplevel B; B;\n"
+
+    with pytest.raises(MissingSectionError):
+        find_section(split_sections("[formulas] {}A;")[1], "fault_tree")
+
+
+def test_parse_section_keeps_positions():
+    _, sections = split_sections(TEXT)
+    with pytest.raises(UnexpectedInput) as excinfo:
+        parse_section(TEXT, find_section(sections, "doglog"))
+    assert excinfo.value.line == 11
+
+    tree = parse_section(TEXT, find_section(sections, "attack_tree"))
+    assert tree.data == "attack_tree"
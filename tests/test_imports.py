@@ -0,0 +1,80 @@
+"""Guards against regressions in the import time of the command-line tool."""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+LAYER1_ONLY = """
+[dog.attack_tree]
+toplevel A;
+A;
+
+[dog.fault_tree]
+toplevel B;
+B;
+
+[dog.object_graph]
+C;
+
+[formulas]
+{}A && !B;
+"""
+
+
+# A generous limit on the time it takes to import the modules of the tool
+# (about 0.2 s on a laptop), which only catches gross regressions
+MAX_ODF_IMPORT_SECONDS = 2.0
+
+
+def import_times(*args: str) -> dict[str, tuple[int, bool]]:
+    """Run the command-line tool with `-X importtime` and return, for all
+    modules it imported, their cumulative import time in microseconds and
+    whether they were imported directly by the tool (not by another
+    module)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "odf", *args],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            # Nested imports are indented by two spaces per level
+            times[name.strip()] = (int(cumulative), name[1:2] != " ")
+    return times
+
+
+def imported_modules(*args: str) -> set[str]:
+    """Run the command-line tool and return the names of all modules it
+    imported."""
+    return set(import_times(*args))
+
+
+def test_check_syntax_does_not_load_cudd():
+    modules = imported_modules("--check-syntax", "--no-cache",
+                               "docs/odf-example.odf")
+    assert "odf.parser.parser" in modules
+    assert not any(module == "dd" or module.startswith("dd.")
+                   for module in modules)
+
+
+def test_layer1_file_does_not_load_add(tmp_path):
+    odf_file = tmp_path / "layer1.odf"
+    odf_file.write_text(LAYER1_ONLY)
+
+    modules = imported_modules(str(odf_file))
+    assert "dd.cudd" in modules
+    assert "dd.cudd_add" not in modules
+    assert "odf.checker.layer3.check_layer3" not in modules
+
+
+def test_import_time():
+    times = import_times("--check-syntax", "--no-cache",
+                         "docs/odf-example.odf")
+    # The time of the modules of the tool, including everything they import
+    odf_time = sum(cumulative for name, (cumulative, top_level)
+                   in times.items()
+                   if top_level and name.split(".")[0] == "odf")
+    assert 0 < odf_time < MAX_ODF_IMPORT_SECONDS * 1_000_000
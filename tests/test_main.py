@@ -0,0 +1,55 @@
+import io
+
+from odf.__main__ import execute_stream, FormulaWatcher
+from odf.transformers.object_graph import ObjectGraphTransformer
+
+MODELS = """
+[dog.attack_tree]
+toplevel A;
+A and A1 A2;
+A1;
+A2;
+
+[dog.fault_tree]
+toplevel B;
+B;
+
+[dog.object_graph]
+C;
+"""
+
+
+def test_execute_stream(capsys):
+    formulas = io.StringIO("{}[[A]];\n{} A &&;\n{}[[A1 || B]]")
+    execute_stream(MODELS, formulas)
+
+    captured = capsys.readouterr()
+    assert "Processing Formula 1" in captured.out
+    assert "Parse error in formula 2 (line 2)" in captured.err
+    assert "Processing Formula 3" in captured.out
+
+
+def test_watcher_rechecks_only_changed_formulas(capsys, monkeypatch):
+    watcher = FormulaWatcher()
+    watcher.update(MODELS + "[formulas] {}[[A]]; {}[[A1]];")
+    assert capsys.readouterr().out.count("Processing Formula") == 2
+    context = watcher.context
+
+    def fail(*_):
+        raise AssertionError("models were rebuilt")
+
+    # Only the formulas changed, so the models are not rebuilt
+    monkeypatch.setattr(ObjectGraphTransformer, "transform", fail)
+    watcher.update(MODELS + "[formulas] {}[[A]];\n{}[[A2]];")
+    out = capsys.readouterr().out
+    assert watcher.context is context
+    assert "Skipping 1 unchanged formula(s)" in out
+    assert out.count("Processing Formula") == 1
+    assert "Processing Formula 2" in out
+    monkeypatch.undo()
+
+    # A changed model invalidates everything
+    watcher.update(MODELS.replace("A1;", "A1 prob=0.5;") +
+                   "[formulas] {}[[A]]; {}[[A2]];")
+    assert watcher.context is not context
+    assert capsys.readouterr().out.count("Processing Formula") == 2
@@ -7,6 +7,8 @@ from odf.checker.exceptions import InvalidProbabilityError, InvalidImpactError
 from odf.models.disruption_tree import DTNode
 from odf.models.object_graph import ObjectGraph
 from odf.transformers.disruption_tree import DisruptionTreeTransformer
+from odf.transformers.exceptions import MalformedTreeErrors, \
+    NotAcyclicError, NotConnectedError, NotExactlyOneRootError
 
 
 def test_basic_disruption_tree(parse_rule):
@@ -115,6 +117,19 @@ def test_duplicate_basic_node_definition_raises_error(parse_rule,
     assert "Basic node 'A' is already defined" in str(excinfo.value.orig_exc)
 
 
+def test_duplicate_attribute_raises_error(parse_rule, object_graph1):
+    """Test that specifying an attribute of a node twice raises an error."""
+    transformer = DisruptionTreeTransformer(object_graph1)
+    tree = parse_rule("""toplevel A;
+    A prob = 0.5 impact = 1 prob = 0.3;
+    """, "disruption_tree")
+
+    with pytest.raises(VisitError) as excinfo:
+        transformer.transform(tree)
+    assert "Attribute 'prob' is specified more than once" in str(
+        excinfo.value.orig_exc)
+
+
 def test_duplicate_intermediate_node_definition_raises_error(parse_rule):
     """Test that defining an intermediate node multiple times raises an error."""
     transformer = DisruptionTreeTransformer(ObjectGraph())
@@ -421,6 +436,23 @@ def test_multiple_roots_raises_error(parse_rule):
     assert "Graph has more than one root" in str(excinfo.value.orig_exc)
 
 
+def test_structure_problems_reported_together(parse_rule):
+    """Test that all problems with the structure are reported at once."""
+    transformer = DisruptionTreeTransformer(ObjectGraph())
+    tree = parse_rule("""toplevel A;
+    A and B C;
+    D and E F;  // Disconnected subgraph with a second root
+    E and F G;
+    G and E;    // Cycle below the second root
+    """, "disruption_tree")
+
+    with pytest.raises(VisitError) as excinfo:
+        transformer.transform(tree)
+    assert isinstance(excinfo.value.orig_exc, MalformedTreeErrors)
+    assert [type(error) for error in excinfo.value.orig_exc.errors] == [
+        NotAcyclicError, NotConnectedError, NotExactlyOneRootError]
+
+
 def test_invalid_probability_values(parse_rule):
     """Test validation of probability values in the trees."""
     transformer = DisruptionTreeTransformer(ObjectGraph())
@@ -0,0 +1,33 @@
+from fractions import Fraction
+
+import pytest
+
+from odf.transformers.exceptions import DuplicateTruncationOptionError
+from odf.transformers.truncation import Truncation, parse_truncation
+
+
+def test_truncation_options(parse_rule):
+    tree = parse_rule("order=2 prob=0.25 top=3", "truncation")
+    assert parse_truncation(tree) == Truncation(2, Fraction(1, 4), 3)
+
+    tree = parse_rule("TOP=1", "truncation")
+    assert parse_truncation(tree) == Truncation(top=1)
+
+
+def test_duplicate_truncation_options(parse_rule):
+    tree = parse_rule("order=2 top=1 order=3", "truncation")
+    with pytest.raises(DuplicateTruncationOptionError,
+                       match="'order' is specified more than once"):
+        parse_truncation(tree)
+
+    tree = parse_rule("prob=0.5 PROB=0.1", "truncation")
+    with pytest.raises(DuplicateTruncationOptionError, match="'prob'"):
+        parse_truncation(tree)
+
+
+def test_truncation_over_defaults():
+    defaults = Truncation(order=3, top=10)
+    assert Truncation(top=2).over(defaults) == Truncation(3, None, 2)
+    assert Truncation().over(defaults) == defaults
+    assert not Truncation(order=1).probabilistic
+    assert Truncation(top=1).probabilistic
@@ -17,6 +17,8 @@ from odf.utils.reconstructor import reconstruct
         ("{A: 1} [[B]]", "{A: 1} [[B]]"),
         ("{} [[A && B]]", "{} [[A && B]]"),
         ("{A: 1, B: 0} [[C || D]]", "{A: 1, B: 0} [[C || D]]"),
+        ("{} [[A]] order=2 prob=0.1", "{} [[A]] order=2 prob=0.1"),
+        ("{} [[A]] TOP=3", "{} [[A]] top=3"),
         # Layer 1 with boolean evidence
         ("{A: 1} B [C: 1]", "{A: 1} (B [C: 1])"),
         ("{} A && B [C: 1, D: 0]", "{} (A && B [C: 1, D: 0])"),